@@ -0,0 +1,373 @@
+"""
+Offline benchmarks, the responses are replayed by the local stub server of benchmarks/stub_server.py.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --output results.json --compare baseline.json --max-regression 10
+
+Metrics ending with `_per_s` are better when higher, the other ones (latencies, sizes) when lower.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from dependency_injector import providers
+
+from benchmarks.stub_server import StubServer, build_home_timeline_page
+from twitter_api.container import TwitterContainer
+from twitter_api.models.twitter_compact_models import CompactTweetFactory
+from twitter_api.models.twitter_home_timeline_models import TwitterHomeTimelineResponseRawModel
+from twitter_api.models.twitter_models import RawResponseModel
+from twitter_api.parse_pool import ParsePool
+from twitter_api.rate_limiter import RateLimiterOptions
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_parser import parse_home_timeline_response
+from twitter_api.timestamps import (
+    TWITTER_DATE_FORMAT, parse_twitter_datetime, parse_twitter_timestamp, parse_twitter_timestamps
+)
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+RESULTS_VERSION: int = 1
+
+PAGE_SIZES: List[int] = [20, 100, 500]
+MEMORY_TWEETS: int = 10_000
+PARSE_POOL_PAGES: int = 40
+TIMESTAMPS_COUNT: int = 10_000
+
+Metrics = Dict[str, float]
+
+
+def build_client_options(url: str) -> TwitterClientOptions:
+    # the client rate limiter would measure its own waits instead of the library
+    return TwitterClientOptions(
+        api_base_url_v_1_1=f'{url}/1.1',
+        base_url=url,
+        gql_url=f'{url}/i/api/graphql',
+        rate_limiter=RateLimiterOptions(rules={}, default_rule=None))
+
+
+def summarize(durations: List[float], prefix: str) -> Metrics:
+    durations = sorted(durations)
+
+    return {
+        f'{prefix}_mean_ms': statistics.fmean(durations) * 1000,
+        f'{prefix}_p50_ms': durations[len(durations) // 2] * 1000,
+        f'{prefix}_p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int) -> List[float]:
+    durations: List[float] = []
+
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started_at)
+
+    return durations
+
+
+def bench_login(url: str, iterations: int) -> Metrics:
+    """
+    Latency of a login through the whole TwitterAuthenticationContext flow, followed by the Viewer query
+    """
+    options = build_client_options(url)
+    durations: List[float] = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(iterations):
+            with TwitterClient(options) as twitter_client:
+                auth_module = TwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(directory))
+
+                started_at = time.perf_counter()
+
+                if not auth_module.login('benchmark', 'benchmark', 'benchmark', persist_session=False):
+                    raise RuntimeError('Login failed against the stub server')
+
+                durations.append(time.perf_counter() - started_at)
+
+    return summarize(durations, 'login')
+
+
+def bench_service_throughput(url: str, iterations: int, page_size: int) -> Metrics:
+    """
+    End-to-end throughput of TwitterAPIService, from the request to the pydantic models
+    """
+    metrics: Metrics = {}
+    container = TwitterContainer()
+    container.twitter_client_options.override(providers.Object(build_client_options(url)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        container.cookie_cache_service.override(providers.Object(LocalCookiesCacheService(directory)))
+        container.init_resources()
+
+        try:
+            service = container.twitter_api_service()
+
+            if not service.login('benchmark', 'benchmark', 'benchmark', persist_session=False):
+                raise RuntimeError('Login failed against the stub server')
+
+            elapsed = sum(measure(lambda: service.get_home_timeline(page_size), iterations))
+            metrics['home_timeline_pages_per_s'] = iterations / elapsed
+
+            started_at = time.perf_counter()
+            tweets_count = sum(1 for _ in service.get_home_timeline_tweets_stream(page_size))
+            metrics['home_timeline_stream_tweets_per_s'] = tweets_count / (time.perf_counter() - started_at)
+
+            elapsed = sum(measure(lambda: service.create_tweet('benchmark'), iterations))
+            metrics['create_tweet_per_s'] = iterations / elapsed
+
+            elapsed = sum(measure(lambda: service.favorite_tweet('1712000000000000005'), iterations))
+            metrics['favorite_tweet_per_s'] = iterations / elapsed
+        finally:
+            container.shutdown_resources()
+
+    return metrics
+
+
+def bench_parse_home_timeline(iterations: int) -> Metrics:
+    """
+    Time per page of prepare_home_timeline_response with both parsers, the json decoding and the validation
+    of the raw models, done by the client, are measured apart
+    """
+    metrics: Metrics = {}
+
+    for page_size in PAGE_SIZES:
+        body = build_home_timeline_page(page_size)
+        json_data = json.loads(body)
+        raw_response = TwitterHomeTimelineResponseRawModel.model_validate(json_data)
+        fast_raw_response = RawResponseModel.model_validate(json_data)
+
+        decode = measure(lambda: json.loads(body), iterations)
+        validate = measure(lambda: TwitterHomeTimelineResponseRawModel.model_validate(json_data), iterations)
+        prepare = measure(lambda: TwitterHomeTimelineAPIModule.prepare_home_timeline_response(raw_response), iterations)
+        prepare_fast = measure(
+            lambda: TwitterHomeTimelineAPIModule.prepare_home_timeline_response(fast_raw_response), iterations)
+
+        metrics[f'page_{page_size}_decode_ms'] = statistics.median(decode) * 1000
+        metrics[f'page_{page_size}_validate_ms'] = statistics.median(validate) * 1000
+        metrics[f'page_{page_size}_prepare_pydantic_ms'] = statistics.median(prepare) * 1000
+        metrics[f'page_{page_size}_prepare_fast_ms'] = statistics.median(prepare_fast) * 1000
+
+    return metrics
+
+
+def bench_timestamps(iterations: int) -> Metrics:
+    """
+    Tweet dates decoded per second by strptime and by the decoders of twitter_api.timestamps
+    """
+    tweets = parse_home_timeline_response(json.loads(build_home_timeline_page(500))).tweets
+    # the recorded dates, spread over a month as in a long crawl
+    dates = [
+        (tweets[i % len(tweets)].created_at - timedelta(seconds=i * 257)).strftime(TWITTER_DATE_FORMAT)
+        for i in range(TIMESTAMPS_COUNT)
+    ]
+    decoders: Dict[str, Callable[[], Any]] = {
+        'strptime': lambda: [datetime.strptime(date, TWITTER_DATE_FORMAT) for date in dates],
+        'datetime': lambda: [parse_twitter_datetime(date) for date in dates],
+        'timestamp': lambda: [parse_twitter_timestamp(date) for date in dates],
+        'batch': lambda: parse_twitter_timestamps(dates),
+    }
+    # a few rounds of 10k dates are enough for stable numbers
+    rounds = max(1, iterations // 10)
+
+    return {
+        f'{name}_dates_per_s': TIMESTAMPS_COUNT / statistics.median(measure(decode, rounds))
+        for name, decode in decoders.items()
+    }
+
+
+def bench_parse_pool() -> Metrics:
+    """
+    Tweets per second turned into compact records, in the current process and by a ParsePool using every core
+    """
+    page_size = 500
+    bodies = [build_home_timeline_page(page_size, page, PARSE_POOL_PAGES) for page in range(PARSE_POOL_PAGES)]
+    parse = TwitterHomeTimelineAPIModule.parse_compact_home_timeline
+    tweets_count = PARSE_POOL_PAGES * page_size
+
+    started_at = time.perf_counter()
+
+    for body in bodies:
+        parse(body)
+
+    metrics: Metrics = {'in_process_tweets_per_s': tweets_count / (time.perf_counter() - started_at)}
+
+    with ParsePool() as parse_pool:
+        # the workers are started and import the library before the measure
+        for _ in parse_pool.ingest({str(i): bodies[:1] for i in range(parse_pool.workers)}, parse):
+            pass
+
+        started_at = time.perf_counter()
+
+        for _ in parse_pool.ingest({'bench': bodies}, parse):
+            pass
+
+        metrics['pool_tweets_per_s'] = tweets_count / (time.perf_counter() - started_at)
+
+    return metrics
+
+
+def bench_memory() -> Metrics:
+    """
+    Memory held by 10k tweets, as pydantic models and as compact records
+    """
+    page_size = 500
+    pages = MEMORY_TWEETS // page_size
+    bodies = [build_home_timeline_page(page_size, page, pages) for page in range(pages)]
+
+    def load_tweets() -> List[Any]:
+        tweets: List[Any] = []
+
+        for body in bodies:
+            tweets.extend(parse_home_timeline_response(json.loads(body)).tweets)
+
+        return tweets
+
+    def load_compact_tweets() -> List[Any]:
+        factory = CompactTweetFactory()
+        # the pydantic models of a page are released once the page is converted
+        return [factory.from_model(tweet) for body in bodies for tweet in parse_home_timeline_response(json.loads(body)).tweets]
+
+    metrics: Metrics = {}
+
+    for name, load in (('pydantic', load_tweets), ('compact', load_compact_tweets)):
+        gc.collect()
+        tracemalloc.start()
+        tweets = load()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        scale = MEMORY_TWEETS / len(tweets)
+        metrics[f'{name}_bytes_per_10k_tweets'] = current * scale
+        metrics[f'{name}_peak_bytes_per_10k_tweets'] = peak * scale
+        del tweets
+
+    return metrics
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(iterations: int, page_size: int, only: List[str] | None = None) -> Dict[str, Any]:
+    benchmarks: Dict[str, Metrics] = {}
+
+    def enabled(name: str) -> bool:
+        return only is None or name in only
+
+    if enabled('login') or enabled('service_throughput'):
+        with StubServer() as server:
+            if enabled('login'):
+                benchmarks['login'] = bench_login(server.url, iterations)
+
+            if enabled('service_throughput'):
+                benchmarks['service_throughput'] = bench_service_throughput(server.url, iterations, page_size)
+
+    if enabled('parse_home_timeline'):
+        benchmarks['parse_home_timeline'] = bench_parse_home_timeline(iterations)
+
+    if enabled('timestamps'):
+        benchmarks['timestamps'] = bench_timestamps(iterations)
+
+    if enabled('parse_pool'):
+        benchmarks['parse_pool'] = bench_parse_pool()
+
+    if enabled('memory'):
+        benchmarks['memory'] = bench_memory()
+
+    return {
+        'version': RESULTS_VERSION,
+        'commit': get_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'iterations': iterations,
+        'benchmarks': benchmarks,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Print the change of every metric against the baseline, returns the metrics that regressed more than
+    `max_regression` percent
+    """
+    regressions: List[str] = []
+
+    print(f"{'metric':<60} {'baseline':>12} {'current':>12} {'change':>9}")
+
+    for benchmark, metrics in results['benchmarks'].items():
+        baseline_metrics = baseline.get('benchmarks', {}).get(benchmark, {})
+
+        for name, value in metrics.items():
+            baseline_value = baseline_metrics.get(name)
+
+            if not baseline_value:
+                continue
+
+            change = (value - baseline_value) / baseline_value * 100
+            # positive when worse
+            regression = -change if name.endswith('_per_s') else change
+            flag = ' !' if regression > max_regression else ''
+
+            print(f'{benchmark + "." + name:<60} {baseline_value:>12.3f} {value:>12.3f} {change:>+8.1f}%{flag}')
+
+            if regression > max_regression:
+                regressions.append(f'{benchmark}.{name}')
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Offline benchmarks of twitter_api')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--compare', help='json results of a previous run to compare with')
+    parser.add_argument('--max-regression', type=float, default=10, help='percent, exit with 1 above it')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=20, help='tweets per home timeline page of the service benchmarks')
+    parser.add_argument('--only', nargs='+', choices=['login', 'service_throughput', 'parse_home_timeline', 'timestamps', 'parse_pool', 'memory'])
+    args = parser.parse_args()
+
+    # the library logs every login at info level
+    logging.disable(logging.INFO)
+
+    results = run(args.iterations, args.page_size, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+
+        if regressions:
+            print(f'{len(regressions)} metrics regressed more than {args.max_regression}%: {", ".join(regressions)}')
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Local HTTP server replaying the recorded responses of benchmarks/fixtures. It runs in a child process, so that
+its CPU time is not charged to the measured client. Home timeline pages of any size are built from the recorded
+tweet entries, with unique tweet ids, and cached once encoded.
+With a rate limit, every login gets its own auth token and the GraphQL calls of each account are counted per
+operation in fixed windows, reported by the x-rate-limit-* headers and answered with 429 once exhausted.
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from functools import lru_cache
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+FIXTURES_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+DEFAULT_PAGES: int = 5
+
+# one year, the session cookies set by the login flow
+COOKIE_MAX_AGE: int = 365 * 24 * 3600
+
+# GraphQL operations counted by the rate limit, the Viewer query ends every login and is never limited
+RATE_LIMITED_OPERATIONS = ('HomeTimeline', 'CreateTweet', 'FavoriteTweet')
+DEFAULT_RATE_LIMIT_WINDOW: float = 15 * 60
+
+RATE_LIMIT_ERROR: bytes = b'{"errors":[{"code":88,"message":"Rate limit exceeded."}]}'
+
+SESSION_COOKIES: List[str] = [
+    f'auth_token=0123456789abcdef0123456789abcdef01234567; Max-Age={COOKIE_MAX_AGE}; Path=/',
+    f'ct0=0123456789abcdef0123456789abcdef; Max-Age={COOKIE_MAX_AGE}; Path=/',
+    f'twid="u=1001"; Max-Age={COOKIE_MAX_AGE}; Path=/',
+]
+
+
+def load_fixture(name: str) -> Any:
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def _get_home_timeline_templates() -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Recorded entries as json strings: the tweet entries with their tweet id, to be replaced, and the other entries
+    (modules, tombstones) inserted as they are. Cursor entries are rebuilt for every page.
+    """
+    entries = load_fixture('home_timeline.json')['data']['home']['home_timeline_urt']['instructions'][0]['entries']
+    tweets: List[Tuple[str, str]] = []
+    others: List[str] = []
+
+    for entry in entries:
+        entry_id: str = entry['entryId']
+
+        if entry_id.startswith('cursor'):
+            continue
+
+        result = entry['content'].get('itemContent', {}).get('tweet_results', {}).get('result', {})
+
+        if entry_id.startswith('tweet') and 'rest_id' in result:
+            tweets.append((result['rest_id'], json.dumps(entry, separators=(',', ':'), ensure_ascii=False)))
+        else:
+            others.append(json.dumps(entry, separators=(',', ':'), ensure_ascii=False))
+
+    return tweets, others
+
+
+@lru_cache(maxsize=64)
+def build_home_timeline_page(count: int, page: int = 0, pages: int = DEFAULT_PAGES) -> bytes:
+    """
+    Body of the page `page` of a timeline of `pages` pages, with `count` tweet entries
+    """
+    tweets, others = _get_home_timeline_templates()
+    entries: List[str] = []
+
+    for i in range(count):
+        recorded_id, template = tweets[i % len(tweets)]
+        # decreasing ids from a page to the next one, as in a real timeline
+        entries.append(template.replace(recorded_id, str(1800000000000000000 - page * count - i)))
+
+        if i % 10 == 9 and others:
+            entries.append(others[(i // 10) % len(others)])
+
+    entries.append(json.dumps({
+        'entryId': f'cursor-top-{page}', 'sortIndex': str(page),
+        'content': {'entryType': 'TimelineTimelineCursor', 'value': f'top-{page}', 'cursorType': 'Top'}}))
+
+    if page < pages - 1:
+        entries.append(json.dumps({
+            'entryId': f'cursor-bottom-{page}', 'sortIndex': str(page),
+            'content': {'entryType': 'TimelineTimelineCursor', 'value': f'page-{page + 1}', 'cursorType': 'Bottom'}}))
+
+    return (
+        '{"data":{"home":{"home_timeline_urt":{"instructions":[{"type":"TimelineAddEntries","entries":['
+        + ','.join(entries)
+        + ']}]}}}}'
+    ).encode()
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are sent in one segment, without waiting for the delayed ack of the client
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+    pages: int = DEFAULT_PAGES
+    fixtures: Dict[str, bytes] = {}
+    onboarding: Dict[str, bytes] = {}
+    # calls per account, operation and window, None serves without rate limit
+    rate_limit: int | None = None
+    rate_limit_window: float = DEFAULT_RATE_LIMIT_WINDOW
+    # start and calls of the current window, per auth token and operation
+    windows: Dict[Tuple[str, str], Tuple[float, int]] = {}
+    windows_lock = threading.Lock()
+    auth_tokens = itertools.count(1)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.__route()
+
+    def do_POST(self) -> None:
+        self.__route()
+
+    def __route(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length > 0 else None
+        path = self.path.split('?', 1)[0]
+
+        if path.endswith('/1.1/guest/activate.json'):
+            return self.__send(self.fixtures['guest_activate'])
+
+        if path.endswith('/1.1/onboarding/task.json'):
+            subtask_inputs = (body or {}).get('subtask_inputs') or [{}]
+            subtask_id = subtask_inputs[0].get('subtask_id', '')
+            response = self.onboarding[subtask_id]
+            cookies = self.__get_session_cookies() if b'LoginSuccessSubtask' in response else []
+
+            return self.__send(response, cookies)
+
+        operation = path.rsplit('/', 1)[-1]
+        rate_limit_headers, rate_limited = self.__count_call(operation)
+
+        if rate_limited:
+            return self.__send(RATE_LIMIT_ERROR, status=429, headers=rate_limit_headers)
+
+        if operation == 'HomeTimeline':
+            variables = (body or {}).get('variables') or {}
+            cursor = variables.get('cursor')
+            page = int(cursor.split('-', 1)[1]) if cursor else 0
+
+            return self.__send(
+                build_home_timeline_page(variables.get('count', 20), page, self.pages), headers=rate_limit_headers)
+
+        if operation in ('CreateTweet', 'FavoriteTweet'):
+            return self.__send(self.fixtures[operation], headers=rate_limit_headers)
+
+        if operation == 'Viewer':
+            return self.__send(self.fixtures[operation], SESSION_COOKIES[1:2])
+
+        self.__send(b'{"errors":[{"code":34,"message":"Sorry, that page does not exist."}]}', status=404)
+
+    def __get_session_cookies(self) -> List[str]:
+        if self.rate_limit is None:
+            return SESSION_COOKIES
+
+        # the calls are counted per auth token, so that the accounts of a pool have their own limits
+        auth_token = f'{next(self.auth_tokens):040x}'
+
+        return [f'auth_token={auth_token}; Max-Age={COOKIE_MAX_AGE}; Path=/', *SESSION_COOKIES[1:]]
+
+    def __count_call(self, operation: str) -> Tuple[Dict[str, str] | None, bool]:
+        """
+        Rate limit headers of the call and whether it exceeds the limit of its window
+        """
+        if self.rate_limit is None or operation not in RATE_LIMITED_OPERATIONS:
+            return None, False
+
+        cookie = SimpleCookie(self.headers.get('Cookie', '')).get('auth_token')
+        key = (cookie.value if cookie is not None else '', operation)
+        now = time.time()
+
+        with self.windows_lock:
+            started_at, calls = self.windows.get(key, (now, 0))
+
+            if now >= started_at + self.rate_limit_window:
+                started_at, calls = now, 0
+
+            calls += 1
+            self.windows[key] = (started_at, calls)
+
+        headers = {
+            'x-rate-limit-limit': str(self.rate_limit),
+            'x-rate-limit-remaining': str(max(0, self.rate_limit - calls)),
+            'x-rate-limit-reset': str(started_at + self.rate_limit_window),
+        }
+
+        return headers, calls > self.rate_limit
+
+    def __send(
+            self,
+            body: bytes,
+            cookies: List[str] | None = None,
+            status: int = 200,
+            headers: Dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        for cookie in cookies or []:
+            self.send_header('Set-Cookie', cookie)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+def _serve(pages: int, ready: Any, rate_limit: int | None, rate_limit_window: float) -> None:
+    StubRequestHandler.pages = pages
+    StubRequestHandler.rate_limit = rate_limit
+    StubRequestHandler.rate_limit_window = rate_limit_window
+    StubRequestHandler.fixtures = {
+        'guest_activate': _encode(load_fixture('guest_activate.json')),
+        'CreateTweet': _encode(load_fixture('create_tweet.json')),
+        'FavoriteTweet': _encode(load_fixture('favorite_tweet.json')),
+        'Viewer': _encode(load_fixture('viewer.json')),
+    }
+    StubRequestHandler.onboarding = {
+        subtask_id: _encode(response) for subtask_id, response in load_fixture('onboarding_task.json').items()
+    }
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubRequestHandler)
+    server.daemon_threads = True
+    ready.send(server.server_address[1])
+    ready.close()
+    server.serve_forever()
+
+
+class StubServer:
+    """
+    Start the stub in a child process, `url` is its base url, e.g.:
+    TwitterClientOptions(api_base_url_v_1_1=f'{server.url}/1.1', gql_url=f'{server.url}/i/api/graphql')
+    With `rate_limit`, each account may call a limited operation that many times per `rate_limit_window` seconds.
+    """
+
+    __pages: int
+    __rate_limit: int | None
+    __rate_limit_window: float
+    __process: multiprocessing.process.BaseProcess | None = None
+    __url: str | None = None
+
+    def __init__(
+            self,
+            pages: int = DEFAULT_PAGES,
+            rate_limit: int | None = None,
+            rate_limit_window: float = DEFAULT_RATE_LIMIT_WINDOW) -> None:
+        self.__pages = pages
+        self.__rate_limit = rate_limit
+        self.__rate_limit_window = rate_limit_window
+
+    def __enter__(self) -> 'StubServer':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        if self.__url is None:
+            raise RuntimeError('The stub server is not started')
+
+        return self.__url
+
+    def start(self) -> None:
+        context = multiprocessing.get_context('spawn')
+        receiver, sender = context.Pipe(duplex=False)
+
+        process = context.Process(target=_serve, args=(self.__pages, sender, self.__rate_limit, self.__rate_limit_window), daemon=True)
+        process.start()
+        self.__process = process
+        sender.close()
+
+        if not receiver.poll(30):
+            self.stop()
+            raise RuntimeError('The stub server did not start')
+
+        self.__url = f'http://127.0.0.1:{receiver.recv()}'
+        receiver.close()
+
+    def stop(self) -> None:
+        if self.__process is not None:
+            self.__process.terminate()
+            self.__process.join()
+            self.__process = None
+            self.__url = None
+
@@ -0,0 +1,31 @@
+import json
+from typing import Generator, List
+
+import pytest
+
+from benchmarks.run import build_client_options
+from benchmarks.stub_server import StubServer, build_home_timeline_page
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel
+from twitter_api.services.modules.timeline.twitter_home_timeline_parser import parse_home_timeline_response
+from twitter_api.twitter_client import TwitterClientOptions
+
+
+@pytest.fixture(scope='session')
+def stub_server() -> Generator[StubServer, None, None]:
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client_options(stub_server: StubServer) -> TwitterClientOptions:
+    return build_client_options(stub_server.url)
+
+
+@pytest.fixture(scope='session')
+def home_timeline_page() -> bytes:
+    return build_home_timeline_page(20)
+
+
+@pytest.fixture
+def timeline_tweets(home_timeline_page: bytes) -> List[TwitterTweetModel]:
+    return parse_home_timeline_response(json.loads(home_timeline_page)).tweets
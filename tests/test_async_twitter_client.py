@@ -0,0 +1,115 @@
+import asyncio
+from typing import List
+
+from benchmarks.run import build_client_options
+from benchmarks.stub_server import DEFAULT_PAGES, StubServer
+from twitter_api.async_twitter_client import AsyncTwitterClient
+from twitter_api.models.twitter_tweets_models import CreateTweetItem, TwitterTweetActionResultModel
+from twitter_api.rate_limiter import NoRateLimiter
+from twitter_api.services.modules.auth.async_twitter_auth_api_module import AsyncTwitterAuthAPIModule
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.timeline.async_twitter_home_timeline_api_module import AsyncTwitterHomeTimelineAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.tweets.async_twitter_tweets_api_module import AsyncTwitterTweetsAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+COUNT = 20
+TWEET_ID = '1712000000000000005'
+
+
+async def login(twitter_client: AsyncTwitterClient, directory: str) -> None:
+    assert await AsyncTwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(directory)).login(
+        'user', 'user', 'password', persist_session=False)
+
+
+def get_sync_pages(options: TwitterClientOptions, directory: str) -> List[List[str]]:
+    with TwitterClient(options) as twitter_client:
+        assert TwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(directory)).login(
+            'user', 'user', 'password', persist_session=False)
+
+        timeline_module = TwitterHomeTimelineAPIModule(twitter_client, TwitterTweetsAPIModule(twitter_client))
+
+        return [[tweet.rest_id for tweet in page.tweets] for page in timeline_module.get_home_timeline_stream(COUNT)]
+
+
+def get_async_pages(options: TwitterClientOptions, directory: str, prefetch: int = 0) -> List[List[str]]:
+    async def crawl() -> List[List[str]]:
+        async with AsyncTwitterClient(options) as twitter_client:
+            await login(twitter_client, directory)
+            timeline_module = AsyncTwitterHomeTimelineAPIModule(twitter_client, AsyncTwitterTweetsAPIModule(twitter_client))
+
+            return [[tweet.rest_id for tweet in page.tweets]
+                    async for page in timeline_module.get_home_timeline_stream(COUNT, prefetch=prefetch)]
+
+    return asyncio.run(crawl())
+
+
+def test_async_stream_matches_the_sync_client(client_options: TwitterClientOptions, tmp_path) -> None:
+    pages = get_async_pages(client_options, str(tmp_path))
+
+    assert len(pages) == DEFAULT_PAGES
+    assert pages == get_sync_pages(client_options, str(tmp_path / 'sync'))
+
+
+def test_async_prefetched_stream_matches_the_stream(client_options: TwitterClientOptions, tmp_path) -> None:
+    assert get_async_pages(client_options, str(tmp_path), prefetch=2) == get_async_pages(client_options, str(tmp_path / 'stream'))
+
+
+def test_async_incremental_stream_matches_the_stream(client_options: TwitterClientOptions, tmp_path) -> None:
+    async def crawl() -> List[str]:
+        async with AsyncTwitterClient(client_options) as twitter_client:
+            await login(twitter_client, str(tmp_path))
+            timeline_module = AsyncTwitterHomeTimelineAPIModule(twitter_client, AsyncTwitterTweetsAPIModule(twitter_client))
+
+            return [tweet.rest_id async for tweet in timeline_module.get_home_timeline_tweets_incremental(COUNT)]
+
+    pages = get_async_pages(client_options, str(tmp_path / 'stream'))
+
+    assert set(asyncio.run(crawl())) == {rest_id for page in pages for rest_id in page}
+
+
+def test_concurrent_requests_share_the_client(client_options: TwitterClientOptions, tmp_path) -> None:
+    async def read_pages() -> List[int]:
+        async with AsyncTwitterClient(client_options) as twitter_client:
+            await login(twitter_client, str(tmp_path))
+            timeline_module = AsyncTwitterHomeTimelineAPIModule(twitter_client, AsyncTwitterTweetsAPIModule(twitter_client))
+            timelines = await asyncio.gather(*[
+                timeline_module.get_home_timeline(COUNT, f'page-{page}') for page in range(DEFAULT_PAGES)
+            ])
+
+            return [len(timeline.tweets) if timeline is not None else 0 for timeline in timelines]
+
+    assert all(count > 0 for count in asyncio.run(read_pages()))
+
+
+def test_bulk_create_reports_every_item(client_options: TwitterClientOptions, tmp_path) -> None:
+    items = [CreateTweetItem(content=f'tweet {i}') for i in range(10)]
+
+    async def create() -> List[TwitterTweetActionResultModel]:
+        async with AsyncTwitterClient(client_options) as twitter_client:
+            await login(twitter_client, str(tmp_path))
+
+            return await AsyncTwitterTweetsAPIModule(twitter_client).create_tweets(items, concurrency=4)
+
+    results = asyncio.run(create())
+
+    assert len(results) == len(items)
+    assert all(result.success and result.status_code == 200 for result in results)
+
+
+def test_rate_limited_mutations_are_reported(tmp_path) -> None:
+    rate_limit = 2
+
+    async def favorite(url: str) -> List[TwitterTweetActionResultModel]:
+        async with AsyncTwitterClient(build_client_options(url), rate_limiter=NoRateLimiter()) as twitter_client:
+            await login(twitter_client, str(tmp_path))
+
+            return await AsyncTwitterTweetsAPIModule(twitter_client).favorite_tweets([TWEET_ID] * (rate_limit + 1), concurrency=1)
+
+    with StubServer(rate_limit=rate_limit, rate_limit_window=60) as server:
+        results = asyncio.run(favorite(server.url))
+
+    assert [(result.success, result.status_code, result.error_code) for result in results] == \
+        [(True, 200, None)] * rate_limit + [(False, 429, 88)]
@@ -0,0 +1,97 @@
+from typing import List
+
+import pytest
+
+from twitter_api.columnar_export import COUNT_COLUMNS, FLAG_COLUMNS, TweetColumnarExporter
+from twitter_api.models.twitter_compact_models import CompactTweetFactory
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel
+
+
+def test_batches_hold_the_fields_of_the_tweets(timeline_tweets: List[TwitterTweetModel]) -> None:
+    with TweetColumnarExporter(batch_size=len(timeline_tweets)) as exporter:
+        exporter.extend(timeline_tweets)
+
+    assert len(exporter.batches) == 1
+    batch = exporter.batches[0]
+
+    assert batch.num_rows == len(timeline_tweets)
+    assert list(batch.columns['rest_id']) == [tweet.rest_id for tweet in timeline_tweets]
+    assert list(batch.columns['created_at']) == [int(tweet.created_at.timestamp()) for tweet in timeline_tweets]
+    assert batch.decode('lang') == [tweet.lang for tweet in timeline_tweets]
+    assert batch.decode('author_rest_id') == [tweet.author.rest_id for tweet in timeline_tweets]
+    assert list(batch.columns['content']) == [tweet.content for tweet in timeline_tweets]
+
+    for name in COUNT_COLUMNS:
+        values = [getattr(tweet, name) for tweet in timeline_tweets]
+
+        assert [bool(is_null) for is_null in batch.null_masks[name]] == [value is None for value in values]
+        assert list(batch.columns[name]) == [value or 0 for value in values]
+
+    for name in FLAG_COLUMNS:
+        assert [bool(value) for value in batch.columns[name]] == [getattr(tweet, name) for tweet in timeline_tweets]
+
+
+def test_compact_tweets_give_the_same_batches(timeline_tweets: List[TwitterTweetModel]) -> None:
+    factory = CompactTweetFactory()
+
+    with TweetColumnarExporter(include_content=False) as exporter, TweetColumnarExporter(include_content=False) as compact:
+        exporter.extend(timeline_tweets)
+        compact.extend(factory.compact_stream(timeline_tweets))
+
+    expected, batch = exporter.batches[0], compact.batches[0]
+
+    assert 'content' not in batch.columns
+    assert {name: list(values) for name, values in batch.columns.items()} == \
+        {name: list(values) for name, values in expected.columns.items()}
+    assert batch.dictionaries == expected.dictionaries
+
+
+def test_dictionaries_are_shared_by_the_batches(timeline_tweets: List[TwitterTweetModel]) -> None:
+    exporter = TweetColumnarExporter(batch_size=7)
+    exporter.extend(timeline_tweets)
+    exporter.close()
+
+    assert [batch.num_rows for batch in exporter.batches] == \
+        [7] * (len(timeline_tweets) // 7) + ([len(timeline_tweets) % 7] if len(timeline_tweets) % 7 else [])
+    assert [lang for batch in exporter.batches for lang in batch.decode('lang')] == [tweet.lang for tweet in timeline_tweets]
+    # the dictionary of a batch extends the dictionaries of the previous ones
+    dictionaries = [batch.dictionaries['author_rest_id'] for batch in exporter.batches]
+    assert all(later[:len(earlier)] == earlier for earlier, later in zip(dictionaries, dictionaries[1:]))
+    assert exporter.flush() is None
+
+
+@pytest.mark.parametrize('extension', ['arrow', 'parquet'])
+def test_batches_are_written_to_files(tmp_path, timeline_tweets: List[TwitterTweetModel], extension: str) -> None:
+    pyarrow = pytest.importorskip('pyarrow')
+    pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'export' / f'tweets.{extension}')
+
+    with TweetColumnarExporter(path, batch_size=7) as exporter:
+        exporter.extend(timeline_tweets)
+
+    if extension == 'parquet':
+        table = pyarrow.parquet.read_table(path)
+    else:
+        with pyarrow.ipc.open_stream(path) as reader:
+            table = reader.read_all()
+
+    assert exporter.batches == []
+    assert table.column('rest_id').to_pylist() == [tweet.rest_id for tweet in timeline_tweets]
+    assert table.column('created_at').to_pylist() == [tweet.created_at for tweet in timeline_tweets]
+
+
+def test_files_require_pyarrow(
+        monkeypatch: pytest.MonkeyPatch, tmp_path, timeline_tweets: List[TwitterTweetModel]) -> None:
+    monkeypatch.setattr('twitter_api.columnar_export.pyarrow', None)
+
+    with pytest.raises(ImportError):
+        TweetColumnarExporter(str(tmp_path / 'tweets.arrow'))
+
+    # the batches kept in memory do not need it
+    with TweetColumnarExporter() as exporter:
+        exporter.extend(timeline_tweets[:3])
+
+    assert [batch.num_rows for batch in exporter.batches] == [3]
+
+    with pytest.raises(ImportError):
+        exporter.batches[0].to_arrow()
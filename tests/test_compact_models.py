@@ -0,0 +1,77 @@
+import asyncio
+import pickle
+from typing import AsyncGenerator, List
+
+from twitter_api.models.twitter_compact_models import CompactTweetFactory
+from twitter_api.models.twitter_home_timeline_models import TwitterHomeTimelineResponseRawModel
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+
+
+def test_compact_tweets_convert_back_to_the_models(timeline_tweets: List[TwitterTweetModel]) -> None:
+    factory = CompactTweetFactory()
+
+    for tweet in timeline_tweets:
+        compact = factory.from_model(tweet)
+
+        assert compact.to_model() == tweet
+        assert compact.created_at_datetime == tweet.created_at
+        assert compact.uri == tweet.uri
+
+
+def test_authors_are_interned(timeline_tweets: List[TwitterTweetModel]) -> None:
+    factory = CompactTweetFactory()
+    compact_tweets = [factory.from_model(tweet) for tweet in timeline_tweets]
+    authors = {tweet.author.rest_id for tweet in timeline_tweets}
+
+    assert len(factory.users) == len(authors)
+
+    for author in authors:
+        assert len({id(tweet.author) for tweet in compact_tweets if tweet.author.rest_id == author}) == 1
+
+
+def test_author_records_keep_the_latest_values(timeline_tweets: List[TwitterTweetModel]) -> None:
+    factory = CompactTweetFactory()
+    tweet = timeline_tweets[0]
+    first = factory.from_model(tweet)
+    author = tweet.author.model_copy(update={'followers_count': (tweet.author.followers_count or 0) + 1})
+
+    second = factory.from_model(tweet.model_copy(update={'author': author}))
+
+    assert second.author is first.author
+    assert first.author.followers_count == author.followers_count
+
+
+def test_intern_shares_the_authors_of_another_factory(timeline_tweets: List[TwitterTweetModel]) -> None:
+    factory = CompactTweetFactory()
+    local = factory.from_model(timeline_tweets[0])
+    # a page built in a worker process of a parse pool
+    page = pickle.loads(pickle.dumps(CompactTweetFactory().from_model(timeline_tweets[0])))
+
+    assert page.author is not local.author
+    assert factory.intern(page).author is local.author
+
+
+def test_timeline_pages_keep_their_cursors(home_timeline_page: bytes) -> None:
+    timeline = TwitterHomeTimelineAPIModule.prepare_home_timeline_response(
+        TwitterHomeTimelineResponseRawModel.model_validate_json(home_timeline_page))
+    page = CompactTweetFactory().from_timeline(timeline)
+
+    assert [tweet.rest_id for tweet in page.tweets] == [tweet.rest_id for tweet in timeline.tweets]
+    assert (page.previous_cursor, page.next_cursor) == (timeline.pagination.previous_cursor, timeline.pagination.next_cursor)
+
+
+def test_compact_streams(timeline_tweets: List[TwitterTweetModel]) -> None:
+    factory = CompactTweetFactory()
+
+    async def tweets() -> AsyncGenerator[TwitterTweetModel, None]:
+        for tweet in timeline_tweets:
+            yield tweet
+
+    async def collect() -> List[str]:
+        return [tweet.rest_id async for tweet in factory.async_compact_stream(tweets())]
+
+    expected = [tweet.rest_id for tweet in timeline_tweets]
+
+    assert [tweet.rest_id for tweet in factory.compact_stream(timeline_tweets)] == expected
+    assert asyncio.run(collect()) == expected
@@ -0,0 +1,40 @@
+from typing import Generator
+
+import pytest
+from dependency_injector import providers
+
+from benchmarks.run import build_client_options
+from benchmarks.stub_server import StubServer
+from twitter_api.container import TwitterContainer
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.pooled_twitter_api_service import PooledTwitterAPIService
+from twitter_api.twitter_client_pool import TwitterAccountCredentials
+
+
+@pytest.fixture
+def container(stub_server: StubServer, tmp_path) -> Generator[TwitterContainer, None, None]:
+    container = TwitterContainer()
+    container.twitter_client_options.override(providers.Object(build_client_options(stub_server.url)))
+    container.cookie_cache_service.override(providers.Singleton(LocalCookiesCacheService, str(tmp_path)))
+
+    try:
+        yield container
+    finally:
+        container.shutdown_resources()
+
+
+def test_pooled_service_requires_accounts(container: TwitterContainer) -> None:
+    with pytest.raises(ValueError, match='needs accounts'):
+        container.pooled_twitter_api_service()
+
+
+def test_pooled_service_runs_on_the_accounts(container: TwitterContainer) -> None:
+    container.twitter_accounts.override(providers.Object([
+        TwitterAccountCredentials(user_id='user', alternate_id='user', password='password')
+    ]))
+
+    service = container.pooled_twitter_api_service()
+
+    assert isinstance(service, PooledTwitterAPIService)
+    assert service.login()
+    assert service.get_home_timeline() is not None
@@ -0,0 +1,188 @@
+import os
+import time
+from typing import Callable, Dict, Generator
+
+import pytest
+import requests
+
+from twitter_api.services.modules.auth.session.cookies_cache_service_interface import CookiesCacheServiceInterface
+from twitter_api.services.modules.auth.session.cookies_file import LOCK_FILE_NAME
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.session.local_json_cookies_cache_service import (
+    LocalCookiesCacheService as LocalJsonCookiesCacheService
+)
+from twitter_api.services.modules.auth.session.sqlite_cookies_cache_service import SqliteCookiesCacheService
+
+DAY = 24 * 3600
+
+CookiesCacheFactory = Callable[[str], CookiesCacheServiceInterface]
+
+FACTORIES: Dict[str, CookiesCacheFactory] = {
+    'pickle': LocalCookiesCacheService,
+    'json': LocalJsonCookiesCacheService,
+    'sqlite': lambda directory: SqliteCookiesCacheService(os.path.join(directory, 'cookies.db')),
+}
+
+
+def build_session(auth_token: str = 'token', expires_in: float = 30 * DAY, tracking_expires_in: float = 30 * DAY) -> requests.Session:
+    session = requests.Session()
+    now = time.time()
+    session.cookies.set('auth_token', auth_token, domain='.twitter.com', expires=int(now + expires_in))
+    session.cookies.set('ct0', 'csrf', domain='.twitter.com', expires=int(now + expires_in))
+    session.cookies.set('tracking', 'x', domain='.twitter.com', expires=int(now + tracking_expires_in))
+
+    return session
+
+
+@pytest.fixture(params=list(FACTORIES))
+def cookies_cache(request, tmp_path) -> CookiesCacheServiceInterface:
+    return FACTORIES[request.param](str(tmp_path))
+
+
+@pytest.fixture
+def tokyo_time_zone(monkeypatch) -> Generator[None, None, None]:
+    # ahead of utc, a naive utc time read as a local time would be 9 hours in the past
+    monkeypatch.setenv('TZ', 'Asia/Tokyo')
+    time.tzset()
+
+    try:
+        yield
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_saved_cookies_are_loaded(cookies_cache: CookiesCacheServiceInterface) -> None:
+    cookies_cache.save_cookies(build_session(), 'user')
+    session = requests.Session()
+
+    assert cookies_cache.cookies_exists('user')
+    cookies_cache.load_cookies(session, 'user')
+
+    assert session.cookies.get('auth_token') == 'token'
+    assert session.cookies.get('ct0') == 'csrf'
+
+
+def test_saved_cookies_replace_the_previous_ones(cookies_cache: CookiesCacheServiceInterface) -> None:
+    cookies_cache.save_cookies(build_session('old'), 'user')
+    cookies_cache.refresh_cookies(build_session('new'), 'user')
+    session = requests.Session()
+
+    assert cookies_cache.load_if_valid(session, 'user')
+    assert session.cookies.get('auth_token') == 'new'
+
+
+def test_expired_cookies_are_not_loaded(cookies_cache: CookiesCacheServiceInterface) -> None:
+    cookies_cache.save_cookies(build_session(expires_in=-2 * DAY), 'user')
+    session = requests.Session()
+
+    assert not cookies_cache.are_cookies_valid('user', ['auth_token'])
+    assert not cookies_cache.load_if_valid(session, 'user', ['auth_token'])
+    assert session.cookies.get('auth_token') is None
+
+
+@pytest.mark.usefixtures('tokyo_time_zone')
+def test_expired_cookies_do_not_depend_on_the_time_zone(cookies_cache: CookiesCacheServiceInterface) -> None:
+    cookies_cache.save_cookies(build_session(expires_in=-3600), 'user')
+
+    assert not cookies_cache.are_cookies_valid('user', ['auth_token'])
+
+
+def test_only_the_checked_cookies_must_be_valid(cookies_cache: CookiesCacheServiceInterface) -> None:
+    cookies_cache.save_cookies(build_session(tracking_expires_in=-2 * DAY), 'user')
+
+    assert cookies_cache.are_cookies_valid('user', ['auth_token', 'ct0'])
+    assert not cookies_cache.are_cookies_valid('user')
+
+
+def test_missing_and_deleted_cookies(cookies_cache: CookiesCacheServiceInterface) -> None:
+    assert not cookies_cache.cookies_exists('user')
+    assert not cookies_cache.load_if_valid(requests.Session(), 'user')
+
+    cookies_cache.save_cookies(build_session(), 'user')
+    cookies_cache.delete_cookies('user')
+
+    assert not cookies_cache.cookies_exists('user')
+
+
+def test_many_sessions_are_saved_and_loaded(cookies_cache: CookiesCacheServiceInterface) -> None:
+    cookies_cache.save_many({f'user{i}': build_session(f'token{i}') for i in range(3)})
+    sessions = {f'user{i}': requests.Session() for i in range(4)}
+
+    loaded = cookies_cache.load_many(sessions, ['auth_token'])
+
+    assert loaded == {'user0': True, 'user1': True, 'user2': True, 'user3': False}
+    assert [sessions[f'user{i}'].cookies.get('auth_token') for i in range(3)] == ['token0', 'token1', 'token2']
+
+
+@pytest.mark.parametrize('factory', [LocalCookiesCacheService, LocalJsonCookiesCacheService])
+def test_cookies_files_share_one_lock_file(factory: Callable[[str], LocalCookiesCacheService], tmp_path) -> None:
+    cookies_cache = factory(str(tmp_path))
+
+    for i in range(3):
+        cookies_cache.save_cookies(build_session(), f'user{i}')
+
+    cookies_cache.delete_cookies('user0')
+
+    expected = {LOCK_FILE_NAME, *(os.path.basename(cookies_cache.build_path(key)) for key in ('user1', 'user2'))}
+
+    assert set(os.listdir(tmp_path)) == expected
+
+
+@pytest.mark.parametrize('factory', [LocalCookiesCacheService, LocalJsonCookiesCacheService])
+def test_cookies_deleted_by_another_process_are_ignored(factory: CookiesCacheFactory, tmp_path) -> None:
+    first = factory(str(tmp_path))
+    second = factory(str(tmp_path))
+    first.save_cookies(build_session(), 'user')
+    assert second.cookies_exists('user')
+
+    # both found the rejected cookies, the first one deletes them
+    first.delete_cookies('user')
+    second.delete_cookies('user')
+
+    assert not second.cookies_exists('user')
+
+
+@pytest.mark.parametrize('factory', [LocalCookiesCacheService, LocalJsonCookiesCacheService])
+def test_cookies_written_by_another_process_are_read_again(factory: CookiesCacheFactory, tmp_path) -> None:
+    reader = factory(str(tmp_path))
+    writer = factory(str(tmp_path))
+    writer.save_cookies(build_session('old'), 'user')
+    assert reader.are_cookies_valid('user')
+
+    # a different size changes the version of the file even within the resolution of its modification time
+    writer.save_cookies(build_session('newer'), 'user')
+    session = requests.Session()
+    reader.load_cookies(session, 'user')
+
+    assert session.cookies.get('auth_token') == 'newer'
+
+
+def test_sqlite_expiring_keys_only_consider_the_session_cookies(tmp_path) -> None:
+    cookies_cache = SqliteCookiesCacheService(str(tmp_path / 'cookies.db'), session_cookies=['auth_token', 'ct0'])
+    cookies_cache.save_many({
+        'healthy': build_session(expires_in=100 * DAY, tracking_expires_in=DAY),
+        'expiring': build_session(expires_in=10 * DAY),
+        'expired': build_session(expires_in=-10 * DAY),
+    })
+
+    assert cookies_cache.get_expiring_keys() == ['expired']
+    assert cookies_cache.get_expiring_keys(within=30 * DAY) == ['expired', 'expiring']
+    assert cookies_cache.get_keys() == ['expired', 'expiring', 'healthy']
+
+
+@pytest.mark.usefixtures('tokyo_time_zone')
+def test_sqlite_expiring_keys_do_not_depend_on_the_time_zone(tmp_path) -> None:
+    cookies_cache = SqliteCookiesCacheService(str(tmp_path / 'cookies.db'), session_cookies=['auth_token'])
+    cookies_cache.save_cookies(build_session(expires_in=-3600), 'expired')
+
+    assert cookies_cache.get_expiring_keys() == ['expired']
+
+
+def test_sqlite_cookies_are_shared_by_connections(tmp_path) -> None:
+    path = str(tmp_path / 'cookies.db')
+    SqliteCookiesCacheService(path).save_cookies(build_session(), 'user')
+    session = requests.Session()
+
+    assert SqliteCookiesCacheService(path).load_if_valid(session, 'user', ['auth_token'])
+    assert session.cookies.get('auth_token') == 'token'
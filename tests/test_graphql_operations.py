@@ -0,0 +1,110 @@
+import json
+import os
+from typing import Any, Dict
+from urllib.parse import parse_qs
+
+from twitter_api.graphql_operations import DEFAULT_GRAPHQL_OPERATIONS, GRAPHQL_OPERATIONS_FILE_VERSION, \
+    HOME_TIMELINE_OPERATION, VIEWER_OPERATION, GraphQLOperation, GraphQLOperationRegistry
+
+
+def dump(operations: Dict[str, GraphQLOperation]) -> Dict[str, Any]:
+    # the encoded payload cached by the operations is not part of their definition
+    return {name: operation.model_dump() for name, operation in operations.items()}
+
+
+def write_operations(path: str, operations: Dict[str, Any], version: int = GRAPHQL_OPERATIONS_FILE_VERSION) -> None:
+    with open(path, 'w') as f:
+        json.dump({'version': version, 'operations': operations}, f)
+
+    # a rewrite within the same mtime tick is told apart by the size only
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_body_matches_the_json_encoding() -> None:
+    operation = GraphQLOperation(name='Op', query_id='id', features={'f': True}, field_toggles={'t': False})
+
+    assert json.loads(operation.build_body({'count': 20, 'cursor': None})) == {
+        'variables': {'count': 20, 'cursor': None}, 'features': {'f': True}, 'fieldToggles': {'t': False}, 'queryId': 'id'
+    }
+    assert json.loads(GraphQLOperation(name='Op', query_id='id').build_body({})) == {'variables': {}, 'queryId': 'id'}
+    assert operation.build_url('https://x.com/i/api/graphql') == 'https://x.com/i/api/graphql/id/Op'
+
+
+def test_params_match_the_json_encoding() -> None:
+    operation = DEFAULT_GRAPHQL_OPERATIONS[VIEWER_OPERATION]
+    params = parse_qs(operation.build_params({'withCommunitiesMemberships': True}))
+
+    assert json.loads(params['variables'][0]) == {'withCommunitiesMemberships': True}
+    assert json.loads(params['features'][0]) == operation.features
+    assert json.loads(params['fieldToggles'][0]) == operation.field_toggles
+
+
+def test_registry_without_file_serves_the_defaults() -> None:
+    registry = GraphQLOperationRegistry()
+
+    assert dump(registry.operations) == dump(DEFAULT_GRAPHQL_OPERATIONS)
+    assert not registry.reload()
+
+
+def test_file_overrides_the_defaults(tmp_path) -> None:
+    path = str(tmp_path / 'operations.json')
+    write_operations(path, {HOME_TIMELINE_OPERATION: {'query_id': 'rotated'}, 'Bookmarks': {'query_id': 'b', 'method': 'GET'}})
+
+    registry = GraphQLOperationRegistry(path, reload_interval=0)
+
+    assert registry.get(HOME_TIMELINE_OPERATION).query_id == 'rotated'
+    assert registry.get(HOME_TIMELINE_OPERATION).features is None
+    assert registry.get('Bookmarks').name == 'Bookmarks'
+    assert registry.get(VIEWER_OPERATION) is DEFAULT_GRAPHQL_OPERATIONS[VIEWER_OPERATION]
+
+
+def test_changes_of_the_file_are_reloaded(tmp_path) -> None:
+    path = str(tmp_path / 'operations.json')
+    write_operations(path, {HOME_TIMELINE_OPERATION: {'query_id': 'first'}})
+    registry = GraphQLOperationRegistry(path, reload_interval=0)
+
+    assert not registry.reload()
+
+    write_operations(path, {HOME_TIMELINE_OPERATION: {'query_id': 'second'}})
+
+    assert registry.get(HOME_TIMELINE_OPERATION).query_id == 'second'
+
+
+def test_changes_are_checked_once_per_interval(tmp_path) -> None:
+    path = str(tmp_path / 'operations.json')
+    write_operations(path, {HOME_TIMELINE_OPERATION: {'query_id': 'first'}})
+    registry = GraphQLOperationRegistry(path, reload_interval=3600)
+
+    write_operations(path, {HOME_TIMELINE_OPERATION: {'query_id': 'second'}})
+
+    assert registry.get(HOME_TIMELINE_OPERATION).query_id == 'first'
+    assert registry.reload()
+    assert registry.get(HOME_TIMELINE_OPERATION).query_id == 'second'
+
+
+def test_invalid_files_keep_the_current_operations(tmp_path) -> None:
+    path = str(tmp_path / 'operations.json')
+    write_operations(path, {HOME_TIMELINE_OPERATION: {'query_id': 'first'}})
+    registry = GraphQLOperationRegistry(path, reload_interval=0)
+
+    with open(path, 'w') as f:
+        f.write('{not json')
+
+    assert not registry.reload()
+
+    write_operations(path, {HOME_TIMELINE_OPERATION: {'query_id': 'next'}}, version=GRAPHQL_OPERATIONS_FILE_VERSION + 1)
+
+    assert not registry.reload()
+
+    os.remove(path)
+
+    assert not registry.reload()
+    assert registry.get(HOME_TIMELINE_OPERATION).query_id == 'first'
+
+
+def test_saved_operations_are_loaded_back(tmp_path) -> None:
+    path = str(tmp_path / 'operations.json')
+    GraphQLOperationRegistry().save(path)
+
+    assert dump(GraphQLOperationRegistry(path).operations) == dump(DEFAULT_GRAPHQL_OPERATIONS)
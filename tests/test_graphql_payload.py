@@ -0,0 +1,25 @@
+import json
+from urllib.parse import parse_qs
+
+from twitter_api.graphql_payload import GraphQLPayload
+
+
+def test_body_matches_the_json_encoding() -> None:
+    payload = GraphQLPayload('id', features={'f': True}, field_toggles={'t': False})
+
+    assert json.loads(payload.build_body({'count': 20, 'cursor': None, 'text': 'é"'})) == {
+        'variables': {'count': 20, 'cursor': None, 'text': 'é"'}, 'features': {'f': True}, 'fieldToggles': {'t': False},
+        'queryId': 'id'
+    }
+    assert json.loads(GraphQLPayload('id').build_body({})) == {'variables': {}, 'queryId': 'id'}
+
+
+def test_params_match_the_json_encoding() -> None:
+    payload = GraphQLPayload('id', features={'f': True}, field_toggles={'t': False})
+    params = parse_qs(payload.build_params({'withCommunitiesMemberships': True}))
+
+    assert {key: json.loads(value[0]) for key, value in params.items()} == {
+        'variables': {'withCommunitiesMemberships': True}, 'features': {'f': True}, 'fieldToggles': {'t': False}
+    }
+    # the query id is part of the url, not of the query string
+    assert parse_qs(GraphQLPayload('id').build_params({'count': 1})) == {'variables': ['{"count":1}']}
@@ -0,0 +1,106 @@
+import itertools
+import threading
+import time
+from typing import Callable
+
+from twitter_api.guest_token_pool import GuestTokenPool, GuestTokenPoolOptions
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+
+        time.sleep(0.01)
+
+    return True
+
+
+class Activator:
+    """
+    Fake guest/activate.json, returns increasing tokens and counts the activations
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.__tokens = itertools.count(1)
+        self.__lock = threading.Lock()
+
+    def __call__(self) -> str:
+        with self.__lock:
+            self.calls += 1
+            return str(next(self.__tokens))
+
+
+def test_empty_pool_activates_a_token_synchronously() -> None:
+    activate = Activator()
+    pool = GuestTokenPool(activate, GuestTokenPoolOptions(size=2))
+
+    assert pool.acquire() == '1'
+    assert activate.calls == 1
+
+
+def test_background_refresh_keeps_the_pool_full() -> None:
+    activate = Activator()
+
+    with GuestTokenPool(activate, GuestTokenPoolOptions(size=3)) as pool:
+        assert wait_until(lambda: len(pool.tokens) == 3)
+
+        token = pool.acquire()
+
+    assert token in {'1', '2', '3'}
+    assert activate.calls == 3
+
+
+def test_tokens_are_retired_after_max_uses() -> None:
+    activate = Activator()
+    pool = GuestTokenPool(activate, GuestTokenPoolOptions(size=1, max_uses=2))
+    token = pool.acquire()
+
+    # every request sent with the token is a use
+    assert pool.is_valid(token)
+    assert pool.is_valid(token)
+    assert not pool.is_valid(token)
+
+    assert pool.acquire() != token
+    assert activate.calls == 2
+
+
+def test_tokens_are_retired_after_max_age() -> None:
+    pool = GuestTokenPool(Activator(), GuestTokenPoolOptions(size=1, max_age=0.05))
+    token = pool.acquire()
+
+    time.sleep(0.1)
+
+    assert not pool.is_valid(token)
+    assert pool.acquire() != token
+
+
+def test_invalidated_token_is_replaced_in_background() -> None:
+    activate = Activator()
+
+    with GuestTokenPool(activate, GuestTokenPoolOptions(size=1)) as pool:
+        token = pool.acquire()
+        pool.invalidate(token)
+
+        assert not pool.is_valid(token)
+        assert wait_until(lambda: [t.value for t in pool.tokens] not in ([], [token]))
+
+
+def test_failed_activation_is_retried() -> None:
+    attempts = []
+
+    def activate() -> str:
+        attempts.append(time.monotonic())
+
+        if len(attempts) == 1:
+            raise ConnectionError('guest/activate.json failed')
+
+        return 'token'
+
+    with GuestTokenPool(activate, GuestTokenPoolOptions(size=1, retry_interval=0.05)) as pool:
+        assert wait_until(lambda: len(pool.tokens) == 1)
+
+    assert len(attempts) == 2
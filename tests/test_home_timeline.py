@@ -0,0 +1,153 @@
+import json
+from typing import Generator, List
+
+import pytest
+
+from benchmarks.stub_server import DEFAULT_PAGES, build_home_timeline_page
+from twitter_api.models.twitter_home_timeline_models import TwitterHomeTimelineResponseRawModel
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel
+from twitter_api.parse_pool import ParsePool, ParsePoolOptions
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.store.sqlite_tweets_store import SqliteTweetsStore
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_parser import find_bottom_cursor, \
+    parse_home_timeline_response
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+COUNT = 20
+
+
+def get_ids(tweets: List[TwitterTweetModel]) -> List[str]:
+    return [tweet.rest_id for tweet in tweets]
+
+
+@pytest.fixture
+def twitter_client(client_options: TwitterClientOptions, tmp_path) -> Generator[TwitterClient, None, None]:
+    with TwitterClient(client_options) as twitter_client:
+        assert TwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(str(tmp_path))).login(
+            'user', 'user', 'password', persist_session=False)
+
+        yield twitter_client
+
+
+@pytest.fixture
+def tweets_store(tmp_path) -> SqliteTweetsStore:
+    return SqliteTweetsStore(str(tmp_path / 'tweets.db'))
+
+
+def build_timeline_module(
+        twitter_client: TwitterClient,
+        tweets_store: SqliteTweetsStore | None = None,
+        timeline_parser='pydantic') -> TwitterHomeTimelineAPIModule:
+    return TwitterHomeTimelineAPIModule(
+        twitter_client, TwitterTweetsAPIModule(twitter_client), timeline_parser=timeline_parser, tweets_store=tweets_store)
+
+
+@pytest.mark.parametrize('page', range(DEFAULT_PAGES))
+def test_fast_parser_matches_the_validated_parser(page: int) -> None:
+    body = build_home_timeline_page(COUNT, page)
+    raw_response = TwitterHomeTimelineResponseRawModel.model_validate_json(body)
+    expected = TwitterHomeTimelineAPIModule.prepare_home_timeline_response(raw_response)
+    fast = TwitterHomeTimelineAPIModule.prepare_home_timeline_response(
+        TwitterHomeTimelineAPIModule.get_home_timeline_model_type('fast').model_validate_json(body))
+
+    assert fast.tweets == expected.tweets
+    assert fast.pagination == expected.pagination
+
+
+def test_fast_parser_falls_back_on_unexpected_payloads() -> None:
+    data = json.loads(build_home_timeline_page(COUNT))
+    entries = data['data']['home']['home_timeline_urt']['instructions'][0]['entries']
+    # a tweet without its legacy fields, which the fast path reads by key
+    tweet_entry = next(entry for entry in entries if entry['entryId'].startswith('tweet'))
+    del tweet_entry['content']['itemContent']['tweet_results']['result']['legacy']['created_at']
+
+    with pytest.raises(KeyError):
+        parse_home_timeline_response(data)
+
+
+@pytest.mark.parametrize('page', range(DEFAULT_PAGES))
+def test_find_bottom_cursor(page: int) -> None:
+    body = build_home_timeline_page(COUNT, page)
+
+    assert find_bottom_cursor(body) == parse_home_timeline_response(json.loads(body)).pagination.next_cursor
+
+
+def test_find_bottom_cursor_decodes_the_escaped_values() -> None:
+    body = json.dumps({'data': {'home': {'home_timeline_urt': {'instructions': [{'entries': [{
+        'entryId': 'cursor-bottom-0', 'content': {'value': 'a"b\\cé', 'cursorType': 'Bottom'}}]}]}}}}).encode()
+
+    assert find_bottom_cursor(body) == 'a"b\\cé'
+    assert find_bottom_cursor(b'{"data":{}}') is None
+
+
+@pytest.mark.parametrize('timeline_parser', ['pydantic', 'fast'])
+def test_stream_walks_every_page(twitter_client: TwitterClient, timeline_parser) -> None:
+    timeline_module = build_timeline_module(twitter_client, timeline_parser=timeline_parser)
+    pages = list(timeline_module.get_home_timeline_stream(COUNT))
+
+    assert len(pages) == DEFAULT_PAGES
+    assert [page.pagination.next_cursor for page in pages] == [f'page-{i}' for i in range(1, DEFAULT_PAGES)] + [None]
+
+    for page in pages:
+        assert [tweet.created_at for tweet in page.tweets] == sorted((tweet.created_at for tweet in page.tweets), reverse=True)
+
+
+def test_prefetched_stream_matches_the_stream(twitter_client: TwitterClient) -> None:
+    timeline_module = build_timeline_module(twitter_client)
+
+    assert get_ids(list(timeline_module.get_home_timeline_tweets_stream(COUNT, prefetch=2))) == \
+        get_ids(list(timeline_module.get_home_timeline_tweets_stream(COUNT)))
+
+
+def test_incremental_stream_matches_the_stream(twitter_client: TwitterClient) -> None:
+    timeline_module = build_timeline_module(twitter_client)
+    expected = set(get_ids(list(timeline_module.get_home_timeline_tweets_stream(COUNT))))
+
+    assert set(get_ids(list(timeline_module.get_home_timeline_tweets_incremental(COUNT)))) == expected
+
+
+def test_stop_at_known_tweet_requires_a_store(twitter_client: TwitterClient) -> None:
+    with pytest.raises(ValueError):
+        next(build_timeline_module(twitter_client).get_home_timeline_stream(COUNT, stop_at_known_tweet=True))
+
+
+def test_pages_are_persisted_once_delivered(twitter_client: TwitterClient, tweets_store: SqliteTweetsStore) -> None:
+    timeline_module = build_timeline_module(twitter_client, tweets_store)
+    stream = timeline_module.get_home_timeline_stream(COUNT, prefetch=2)
+    first = next(stream)
+
+    # the page being consumed and the prefetched ones are not stored yet
+    assert not tweets_store.get_known_tweet_ids(get_ids(first.tweets))
+
+    stream.close()
+
+    assert tweets_store.get_known_tweet_ids(get_ids(first.tweets)) == set(get_ids(first.tweets))
+    assert len(tweets_store.get_latest_tweets(1000)) == len(first.tweets)
+
+
+def test_stream_stops_at_the_tweets_of_a_previous_crawl(twitter_client: TwitterClient, tweets_store: SqliteTweetsStore) -> None:
+    pages = list(build_timeline_module(twitter_client).get_home_timeline_stream(COUNT))
+    timeline_module = build_timeline_module(twitter_client, tweets_store)
+    # the previous crawl stored the second page and the next ones
+    tweets_store.save_tweets([tweet for page in pages[1:] for tweet in page.tweets])
+    tweets_store_count = len(tweets_store.get_latest_tweets(1000))
+
+    new_pages = list(timeline_module.get_home_timeline_stream(COUNT, stop_at_known_tweet=True))
+
+    assert len(new_pages) == 2
+    assert get_ids(new_pages[0].tweets) == get_ids(pages[0].tweets)
+    assert new_pages[1].tweets == []
+    assert len(tweets_store.get_latest_tweets(1000)) == tweets_store_count + len(pages[0].tweets)
+
+
+def test_parsed_stream_matches_the_stream(twitter_client: TwitterClient) -> None:
+    timeline_module = build_timeline_module(twitter_client, timeline_parser='fast')
+    expected = [get_ids(page.tweets) for page in timeline_module.get_home_timeline_stream(COUNT)]
+
+    with ParsePool(ParsePoolOptions(workers=2)) as parse_pool:
+        pages = list(timeline_module.get_home_timeline_parsed_stream(parse_pool, COUNT))
+
+    assert [[tweet.rest_id for tweet in page.tweets] for page in pages] == expected
@@ -0,0 +1,89 @@
+from benchmarks.stub_server import DEFAULT_PAGES
+from twitter_api.instrumentation import Histogram, InstrumentationHooks, MetricsCollector, ResponseEvent
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+
+def build_response_event(operation: str, status_code: int | None, elapsed: float, bytes_received: int = 0) -> ResponseEvent:
+    return ResponseEvent(
+        operation=operation, method='POST', url=f'https://x.com/{operation}', attempt=0, status_code=status_code,
+        elapsed=elapsed, bytes_received=bytes_received)
+
+
+class FailingHooks(InstrumentationHooks):
+    def on_response(self, event: ResponseEvent) -> None:
+        raise RuntimeError('failing hook')
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    histogram = Histogram((0.1, 1))
+
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == {'buckets': {'0.1': 2, '1': 3, '+Inf': 4}, 'sum': 2.65, 'count': 4}
+
+
+def test_collector_groups_the_metrics_by_operation() -> None:
+    collector = MetricsCollector((0.1, 1))
+    collector.on_response(build_response_event('HomeTimeline', 200, 0.05, 100))
+    collector.on_response(build_response_event('HomeTimeline', 429, 0.5, 10))
+    collector.on_response(build_response_event('CreateTweet', None, 2))
+    collector.on_wait('HomeTimeline', 1.5, 'rate_limit')
+    collector.on_wait('HomeTimeline', 0.5, 'retry')
+    collector.on_deserialize('HomeTimeline', 0.01)
+
+    snapshot = collector.snapshot()
+
+    assert list(snapshot) == ['CreateTweet', 'HomeTimeline']
+    assert snapshot['HomeTimeline']['latency']['count'] == 2
+    assert snapshot['HomeTimeline']['deserialization']['count'] == 1
+    assert snapshot['HomeTimeline']['bytes_received'] == 110
+    assert snapshot['HomeTimeline']['wait_time'] == {'rate_limit': 1.5, 'retry': 0.5}
+    assert snapshot['HomeTimeline']['responses'] == {'200': 1, '429': 1}
+    assert snapshot['CreateTweet']['responses'] == {'error': 1}
+    assert snapshot['CreateTweet']['deserialization'] is None
+
+    collector.reset()
+
+    assert collector.snapshot() == {}
+
+
+def test_prometheus_exposition() -> None:
+    collector = MetricsCollector((0.1, 1))
+    collector.on_response(build_response_event('HomeTimeline', 200, 0.05, 100))
+    collector.on_wait('HomeTimeline', 1.5, 'rate_limit')
+
+    lines = collector.to_prometheus('test').splitlines()
+
+    assert '# TYPE test_request_duration_seconds histogram' in lines
+    assert 'test_request_duration_seconds_bucket{operation="HomeTimeline",le="0.1"} 1' in lines
+    assert 'test_request_duration_seconds_bucket{operation="HomeTimeline",le="+Inf"} 1' in lines
+    assert 'test_request_duration_seconds_count{operation="HomeTimeline"} 1' in lines
+    assert 'test_received_bytes_total{operation="HomeTimeline"} 100' in lines
+    assert 'test_wait_seconds_total{operation="HomeTimeline",reason="rate_limit"} 1.5' in lines
+    assert 'test_responses_total{operation="HomeTimeline",status="200"} 1' in lines
+    # no deserialization was observed
+    assert not any(line.startswith('test_deserialization_duration_seconds_bucket') for line in lines)
+
+
+def test_client_reports_its_requests(client_options: TwitterClientOptions, tmp_path) -> None:
+    collector = MetricsCollector()
+
+    # a failing hook is logged and does not break the requests nor the other hooks
+    with TwitterClient(client_options, hooks=[FailingHooks(), collector]) as twitter_client:
+        assert TwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(str(tmp_path))).login(
+            'user', 'user', 'password', persist_session=False)
+
+        timeline_module = TwitterHomeTimelineAPIModule(twitter_client, TwitterTweetsAPIModule(twitter_client))
+        assert len(list(timeline_module.get_home_timeline_stream())) == DEFAULT_PAGES
+
+    home_timeline = collector.snapshot()['HomeTimeline']
+
+    assert home_timeline['responses'] == {'200': DEFAULT_PAGES}
+    assert home_timeline['latency']['count'] == DEFAULT_PAGES
+    assert home_timeline['deserialization']['count'] == DEFAULT_PAGES
+    assert home_timeline['bytes_received'] > 0
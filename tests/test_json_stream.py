@@ -0,0 +1,124 @@
+import asyncio
+import json
+import random
+from typing import Any, AsyncGenerator, List
+
+import pytest
+
+from twitter_api.json_stream import JsonArrayStreamDecoder, aiter_json_array_items, iter_json_array_items
+
+ITEMS: List[Any] = [
+    {'entryId': 'tweet-1', 'content': {'text': 'brackets ]}[{ and "quotes" in a string', 'escaped': '\\"}'}},
+    [1, [2, [3]], {'a': []}],
+    'a string item',
+    -2500.0,
+    12345678901234,
+    1e-07,
+    True,
+    None,
+    {'unicode': 'café \U0001F600'},
+    {},
+    [],
+]
+
+
+def split(data: bytes, size: int) -> List[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def build_document(items: List[Any], **kwargs: Any) -> bytes:
+    return json.dumps({'before': {'entries_count': len(items)}, 'entries': items, 'after': [1, 2]}, **kwargs).encode()
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 100_000])
+def test_items_are_decoded_whatever_the_chunks(size: int) -> None:
+    assert list(iter_json_array_items(split(build_document(ITEMS), size), 'entries')) == ITEMS
+
+
+def test_items_are_decoded_whatever_the_cuts() -> None:
+    rng = random.Random(0)
+    document = build_document(ITEMS, ensure_ascii=False)
+
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(document)), 20))
+        chunks = [document[start:end] for start, end in zip([0, *cuts], [*cuts, len(document)])]
+
+        assert list(iter_json_array_items(chunks, 'entries')) == ITEMS
+
+
+def test_items_are_returned_as_soon_as_they_are_complete() -> None:
+    decoder = JsonArrayStreamDecoder('entries')
+
+    assert decoder.feed(b'{"entries": [{"a": 1}, {"b"') == [{'a': 1}]
+    assert decoder.found and not decoder.done
+    assert decoder.feed(b': 2}, 3') == [{'b': 2}]
+    # the number may continue in the next chunk
+    assert decoder.feed(b'.5') == []
+    assert decoder.feed(b']') == [3.5]
+    assert decoder.done
+    assert decoder.feed(b', "other": [1]}') == []
+
+
+def test_key_split_between_chunks() -> None:
+    chunks = [b'{"data": {"ent', b'ries": [1, 2]}}']
+
+    assert list(iter_json_array_items(chunks, 'entries')) == [1, 2]
+
+
+def test_escaped_quote_split_between_chunks() -> None:
+    document = json.dumps({'entries': [{'text': 'a\\"]}b'}, 1]}).encode()
+    position = document.index(b'\\')
+
+    assert list(iter_json_array_items([document[:position + 1], document[position + 1:]], 'entries')) == \
+        [{'text': 'a\\"]}b'}, 1]
+
+
+def test_the_rest_of_the_document_is_not_read() -> None:
+    read: List[bytes] = []
+
+    def chunks():
+        for chunk in [b'{"entries": [1]', b', "after": ', b'invalid']:
+            read.append(chunk)
+            yield chunk
+
+    assert list(iter_json_array_items(chunks(), 'entries')) == [1]
+    assert read == [b'{"entries": [1]']
+
+
+def test_document_without_the_array() -> None:
+    decoder = JsonArrayStreamDecoder('entries')
+
+    assert decoder.feed(b'{"errors": [{"code": 34}]}') == []
+    assert decoder.close() == []
+    assert not decoder.found
+
+
+def test_truncated_array_raises() -> None:
+    decoder = JsonArrayStreamDecoder('entries')
+    decoder.feed(b'{"entries": [{"a": 1}, {"b": [1, 2')
+
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_invalid_item_raises() -> None:
+    with pytest.raises(ValueError):
+        list(iter_json_array_items([b'{"entries": [{"a": 1,}]}'], 'entries'))
+
+
+def test_large_item_in_small_chunks() -> None:
+    item = {'values': ['x' * 100 for _ in range(2000)]}
+    chunks = split(build_document([item, item]), 64)
+
+    assert list(iter_json_array_items(chunks, 'entries')) == [item, item]
+
+
+def test_async_items() -> None:
+    async def chunks() -> AsyncGenerator[bytes, None]:
+        for chunk in split(build_document(ITEMS), 5):
+            yield chunk
+
+    async def collect() -> List[Any]:
+        return [item async for item in aiter_json_array_items(chunks(), 'entries')]
+
+    assert asyncio.run(collect()) == ITEMS
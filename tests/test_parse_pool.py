@@ -0,0 +1,92 @@
+import json
+import time
+from typing import Generator, Iterable, List
+
+import pytest
+
+from twitter_api.parse_pool import ParsePool, ParsePoolOptions
+
+
+def parse_number(body: bytes) -> int:
+    value = json.loads(body)
+
+    # the even pages are parsed slower, so that the pages complete out of fetch order
+    time.sleep(0.05 if value % 2 == 0 else 0)
+
+    return value
+
+
+def parse_invalid(body: bytes) -> int:
+    raise ValueError(f'invalid body {body!r}')
+
+
+def bodies(count: int) -> Generator[bytes, None, None]:
+    for i in range(count):
+        yield json.dumps(i).encode()
+
+
+def failing_bodies() -> Generator[bytes, None, None]:
+    yield b'0'
+    raise ConnectionError('fetch failed')
+
+
+@pytest.fixture(scope='module')
+def parse_pool() -> Generator[ParsePool, None, None]:
+    with ParsePool(ParsePoolOptions(workers=2)) as parse_pool:
+        yield parse_pool
+
+
+def test_submit_requires_a_started_pool() -> None:
+    with pytest.raises(RuntimeError):
+        ParsePool(ParsePoolOptions(workers=1)).submit(parse_number, b'1')
+
+
+def test_submit(parse_pool: ParsePool) -> None:
+    assert parse_pool.submit(parse_number, b'7').result() == 7
+
+
+def test_ordered_ingest_keeps_the_fetch_order_of_each_source(parse_pool: ParsePool) -> None:
+    pages = list(parse_pool.ingest({'a': bodies(10), 'b': bodies(5)}, parse_number))
+
+    for source, count in (('a', 10), ('b', 5)):
+        assert [(page.index, page.data) for page in pages if page.source == source] == [(i, i) for i in range(count)]
+
+
+def test_unordered_ingest_delivers_every_page(parse_pool: ParsePool) -> None:
+    pages = list(parse_pool.ingest({'a': bodies(10), 'b': bodies(5), 'c': []}, parse_number, ordered=False))
+
+    assert sorted((page.source, page.index, page.data) for page in pages) == \
+        [('a', i, i) for i in range(10)] + [('b', i, i) for i in range(5)]
+
+
+def test_parse_errors_are_raised_to_the_consumer(parse_pool: ParsePool) -> None:
+    with pytest.raises(ValueError, match='invalid body'):
+        list(parse_pool.ingest({'a': bodies(3)}, parse_invalid))
+
+
+def test_fetch_errors_are_raised_to_the_consumer(parse_pool: ParsePool) -> None:
+    with pytest.raises(ConnectionError):
+        list(parse_pool.ingest({'a': failing_bodies()}, parse_number))
+
+
+def test_closing_the_ingest_stops_the_fetch() -> None:
+    fetched: List[int] = []
+
+    def endless() -> Iterable[bytes]:
+        i = 0
+
+        while True:
+            fetched.append(i)
+            yield json.dumps(i).encode()
+            i += 1
+
+    with ParsePool(ParsePoolOptions(workers=1, max_pending=2)) as parse_pool:
+        pages = parse_pool.ingest({'a': endless()}, parse_number)
+
+        assert next(pages).data == 0
+        pages.close()
+        count = len(fetched)
+        time.sleep(0.3)
+
+        # the fetch waits for the consumer above max_pending pages, and stops once it is closed
+        assert len(fetched) == count <= 1 + 2 + 1
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from twitter_api.rate_limiter import (
+    RateLimiterOptions, RateLimitQuota, RateLimitRule, TokenBucket, TokenBucketRateLimiter, get_operation_name
+)
+
+
+def build_limiter(requests: int, period: float, **kwargs) -> TokenBucketRateLimiter:
+    return TokenBucketRateLimiter(RateLimiterOptions(
+        rules={'HomeTimeline': RateLimitRule(requests=requests, period=period)}, max_jitter=0, **kwargs))
+
+
+def test_bucket_allows_a_burst_then_spaces_the_calls() -> None:
+    bucket = TokenBucket(capacity=2, refill_rate=10)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # the reservations are queued: every caller waits one refill period longer than the previous one
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_bucket_refills_up_to_its_capacity() -> None:
+    bucket = TokenBucket(capacity=2, refill_rate=100)
+    bucket.reserve(2)
+
+    time.sleep(0.05)
+
+    assert bucket.tokens == 2
+
+
+def test_limiter_applies_the_rule_of_the_operation() -> None:
+    limiter = build_limiter(requests=1, period=1)
+
+    assert limiter.acquire('HomeTimeline') == 0
+    assert limiter.acquire('HomeTimeline') == pytest.approx(1, abs=0.01)
+
+
+def test_limiter_without_default_rule_does_not_limit_other_operations() -> None:
+    limiter = build_limiter(requests=1, period=1, default_rule=None)
+
+    assert [limiter.acquire('Viewer') for _ in range(100)] == [0] * 100
+
+
+def test_limiter_waits_for_the_reset_of_an_exhausted_server_quota() -> None:
+    limiter = build_limiter(requests=100, period=1)
+    limiter.update_quota('HomeTimeline', RateLimitQuota(limit=10, remaining=1, reset=time.time() + 5))
+
+    assert limiter.acquire('HomeTimeline') == 0
+    assert limiter.acquire('HomeTimeline') == pytest.approx(5, abs=0.1)
+
+
+def test_limiter_forgets_the_quota_of_a_closed_window() -> None:
+    limiter = build_limiter(requests=100, period=1)
+    limiter.update_quota('HomeTimeline', RateLimitQuota(remaining=0, reset=time.time() - 1))
+
+    assert limiter.acquire('HomeTimeline') == 0
+    assert 'HomeTimeline' not in limiter.quotas
+
+
+def test_limiter_adds_jitter_only_to_waits() -> None:
+    limiter = TokenBucketRateLimiter(RateLimiterOptions(
+        rules={'HomeTimeline': RateLimitRule(requests=1, period=1)}, min_jitter=2, max_jitter=3))
+
+    assert limiter.acquire('HomeTimeline') == 0
+    assert 3 <= limiter.acquire('HomeTimeline') <= 4
+
+
+def test_quota_from_headers() -> None:
+    quota = RateLimitQuota.from_headers(
+        {'x-rate-limit-limit': '500', 'x-rate-limit-remaining': '499', 'x-rate-limit-reset': '1700000000'})
+
+    assert quota == RateLimitQuota(limit=500, remaining=499, reset=1700000000)
+    assert RateLimitQuota.from_headers({'x-rate-limit-remaining': '1'}) is None
+    assert RateLimitQuota.from_headers({'x-rate-limit-remaining': 'a', 'x-rate-limit-reset': '1'}) is None
+
+
+@pytest.mark.parametrize('url, operation', [
+    ('https://twitter.com/i/api/graphql/query_id/HomeTimeline', 'HomeTimeline'),
+    ('https://api.twitter.com/1.1/onboarding/task.json', 'onboarding/task.json'),
+    ('https://twitter.com/other', '/other'),
+])
+def test_get_operation_name(url: str, operation: str) -> None:
+    assert get_operation_name(url) == operation
+
+
+def test_options_are_validated() -> None:
+    with pytest.raises(ValidationError):
+        RateLimitRule(requests=0, period=1)
+
+    with pytest.raises(ValidationError):
+        RateLimiterOptions(min_jitter=2, max_jitter=1)
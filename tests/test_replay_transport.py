@@ -0,0 +1,135 @@
+import gzip
+import json
+from typing import List, Tuple
+
+import pytest
+
+from benchmarks.run import build_client_options
+from benchmarks.stub_server import StubServer
+from twitter_api.replay_transport import REDACTED_VALUE, ExchangeArchive, RecordedExchange, ReplayEngine, \
+    ReplayTransportOptions, build_exchange, get_variables_hash
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+COUNT = 20
+
+
+def read_archive(path: str) -> List[RecordedExchange]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [RecordedExchange.model_validate_json(line) for line in f if line.strip()]
+
+
+def crawl(options: TwitterClientOptions, directory: str) -> List[List[str]]:
+    with TwitterClient(options) as twitter_client:
+        assert TwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(directory)).login(
+            'user', 'user', 'password', persist_session=False)
+
+        timeline_module = TwitterHomeTimelineAPIModule(twitter_client, TwitterTweetsAPIModule(twitter_client))
+
+        return [[tweet.rest_id for tweet in page.tweets] for page in timeline_module.get_home_timeline_stream(COUNT)]
+
+
+def record(tmp_path, record_credentials: bool = False) -> Tuple[TwitterClientOptions, List[List[str]], str]:
+    archive_path = str(tmp_path / 'archive.jsonl.gz')
+
+    with StubServer() as server:
+        options = build_client_options(server.url)
+        options.transport = ReplayTransportOptions(
+            mode='record', archive_path=archive_path, record_credentials=record_credentials)
+        pages = crawl(options, str(tmp_path / 'record'))
+
+    ExchangeArchive.get(archive_path).close()
+
+    return options, pages, archive_path
+
+
+def test_variables_hash() -> None:
+    url = 'https://x.com/i/api/graphql/id/HomeTimeline'
+
+    # the hash only depends on the variables, not on the features nor on the order of the keys
+    assert get_variables_hash(url, b'{"variables":{"a":1,"b":2},"features":{"f":true}}') == \
+        get_variables_hash(url, '{"features":{},"variables":{"b":2,"a":1}}')
+    assert get_variables_hash(f'{url}?variables=%7B%22a%22%3A1%7D', None) == get_variables_hash(url, b'{"variables":{"a":1}}')
+    assert get_variables_hash(url, b'{"variables":{"a":1}}') != get_variables_hash(url, b'{"variables":{"a":2}}')
+
+
+def test_exchange_redacts_the_credentials() -> None:
+    exchange = build_exchange('POST', 'https://x.com/i/api/graphql/id/Viewer', b'{}', 200, [
+        ('Set-Cookie', 'auth_token=secret; Path=/; Secure'),
+        ('Set-Cookie', 'ct0=csrf'),
+        ('x-csrf-token', 'csrf'),
+        ('Content-Length', '2'),
+        ('content-type', 'application/json'),
+    ], b'{}')
+
+    assert exchange.headers == [
+        ('Set-Cookie', f'auth_token={REDACTED_VALUE}; Path=/; Secure'),
+        ('Set-Cookie', f'ct0={REDACTED_VALUE}'),
+        ('x-csrf-token', REDACTED_VALUE),
+        ('content-type', 'application/json'),
+    ]
+    assert exchange.operation == 'Viewer'
+
+
+def test_binary_bodies_are_recorded() -> None:
+    exchange = build_exchange('GET', 'https://x.com/image', None, 200, {}, b'\xff\x00')
+
+    assert exchange.body_encoding == 'base64'
+    assert exchange.get_body() == b'\xff\x00'
+
+
+def test_recorded_crawl_is_replayed_offline(tmp_path) -> None:
+    options, pages, archive_path = record(tmp_path)
+    exchanges = read_archive(archive_path)
+
+    assert {exchange.operation for exchange in exchanges} >= {'onboarding/task.json', 'HomeTimeline'}
+    # the session cookies are recorded without their values
+    set_cookies = [value for exchange in exchanges for name, value in exchange.headers if name.lower() == 'set-cookie']
+    assert set_cookies and all(value.split(';')[0].endswith(f'={REDACTED_VALUE}') for value in set_cookies)
+
+    # the stub server is stopped, the replayed crawl does not reach the network
+    options.transport = ReplayTransportOptions(mode='replay', archive_path=archive_path)
+
+    assert crawl(options, str(tmp_path / 'replay')) == pages
+
+
+def test_credentials_are_recorded_on_request(tmp_path) -> None:
+    _, _, archive_path = record(tmp_path, record_credentials=True)
+
+    set_cookies = [value for exchange in read_archive(archive_path) for name, value in exchange.headers
+                   if name.lower() == 'set-cookie']
+
+    assert set_cookies and not any(f'={REDACTED_VALUE}' in value for value in set_cookies)
+
+
+def test_replay_simulates_rate_limits(tmp_path) -> None:
+    archive_path = str(tmp_path / 'archive.jsonl.gz')
+    url = 'https://x.com/i/api/graphql/id/HomeTimeline'
+    archive = ExchangeArchive.get(archive_path)
+    archive.append(build_exchange('POST', url, b'{"variables":{"count":1}}', 200, {'x-rate-limit-limit': '500'}, b'{"data":1}'))
+    archive.close()
+
+    engine = ReplayEngine(ReplayTransportOptions(mode='replay', archive_path=archive_path, rate_limit=2))
+    responses = [engine.replay('POST', url, b'{"variables":{"count":1}}') for _ in range(3)]
+
+    assert [status_code for status_code, _, _ in responses] == [200, 200, 429]
+    assert [dict(headers)['x-rate-limit-remaining'] for _, headers, _ in responses] == ['1', '0', '0']
+    assert dict(responses[0][1])['x-rate-limit-limit'] == '2'
+    assert json.loads(responses[2][2])['errors'][0]['code'] == 88
+
+
+@pytest.mark.parametrize('fallback_to_operation, status_code', [(True, 200), (False, 404)])
+def test_unknown_variables_fall_back_to_the_operation(tmp_path, fallback_to_operation: bool, status_code: int) -> None:
+    archive_path = str(tmp_path / 'archive.jsonl.gz')
+    url = 'https://x.com/i/api/graphql/id/HomeTimeline'
+    archive = ExchangeArchive.get(archive_path)
+    archive.append(build_exchange('POST', url, b'{"variables":{"cursor":null}}', 200, {}, b'{"data":1}'))
+    archive.close()
+
+    engine = ReplayEngine(ReplayTransportOptions(
+        mode='replay', archive_path=archive_path, fallback_to_operation=fallback_to_operation))
+
+    assert engine.replay('POST', url, b'{"variables":{"cursor":"page-1"}}')[0] == status_code
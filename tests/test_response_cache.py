@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from twitter_api.response_cache import ResponseCache, ResponseCacheOptions, build_cache_key, get_account_key
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+BODY = b'{"data": {}}'
+
+
+def test_fresh_entry_is_a_hit() -> None:
+    cache = ResponseCache()
+    cache.set('Viewer', 'key', 200, {'content-type': 'application/json', 'x-other': '1'}, BODY)
+
+    entry = cache.get('key')
+
+    assert entry is not None and entry.is_fresh
+    assert entry.json() == {'data': {}}
+    # only the headers needed to serve and revalidate the entry are kept
+    assert entry.headers == {'content-type': 'application/json'}
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_stale_entry_is_returned_as_a_miss() -> None:
+    cache = ResponseCache(ResponseCacheOptions(ttls={'Viewer': 0.05}))
+    cache.set('Viewer', 'key', 200, {'etag': '"v1"', 'last-modified': 'Wed, 11 Oct 2023 20:19:24 GMT'}, BODY)
+
+    time.sleep(0.1)
+    entry = cache.get('key')
+
+    assert entry is not None and not entry.is_fresh
+    assert entry.can_revalidate
+    assert entry.get_revalidation_headers() == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 11 Oct 2023 20:19:24 GMT'}
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    assert cache.refresh('Viewer', 'key', entry).is_fresh
+
+
+def test_least_recently_used_entries_are_evicted() -> None:
+    cache = ResponseCache(ResponseCacheOptions(max_entries=2))
+    cache.set('Viewer', 'a', 200, {}, BODY)
+    cache.set('Viewer', 'b', 200, {}, BODY)
+    cache.get('a')
+    cache.set('Viewer', 'c', 200, {}, BODY)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+
+def test_only_reads_with_a_ttl_are_cacheable() -> None:
+    cache = ResponseCache()
+
+    assert cache.is_cacheable('HomeTimeline')
+    assert not cache.is_cacheable('CreateTweet')
+    assert not cache.is_cacheable('SearchTimeline')
+
+    with pytest.raises(ValidationError):
+        ResponseCacheOptions(ttls={'CreateTweet': 10})
+
+
+def test_disk_tier_survives_a_restart(tmp_path) -> None:
+    options = ResponseCacheOptions(path=str(tmp_path / 'cache' / 'responses.db'))
+
+    with ResponseCache(options) as cache:
+        assert cache.persistent
+        cache.set('Viewer', 'key', 200, {}, BODY)
+
+    with ResponseCache(options) as cache:
+        entry = cache.get('key')
+
+        assert entry is not None and entry.content == BODY
+
+        cache.invalidate('key')
+
+        assert cache.get('key') is None
+
+
+def test_concurrent_identical_requests_share_one_future() -> None:
+    cache = ResponseCache()
+    future, owner = cache.join('key')
+    other, other_owner = cache.join('key')
+
+    assert owner and not other_owner and other is future
+
+    cache.leave('key', future, response='response')
+
+    assert other.result() == 'response'
+    # the next request is sent again
+    assert cache.join('key')[1]
+
+
+def test_counters_are_exact_under_concurrency() -> None:
+    cache = ResponseCache()
+    cache.set('Viewer', 'key', 200, {}, BODY)
+
+    def read() -> None:
+        for _ in range(2000):
+            cache.get('key')
+            cache.get('missing')
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert (cache.hits, cache.misses) == (16000, 16000)
+
+
+def test_cache_keys() -> None:
+    key = build_cache_key('HomeTimeline', 'guest', None, b'{"count": 20}')
+
+    assert key.startswith('HomeTimeline:guest:')
+    assert key == build_cache_key('HomeTimeline', 'guest', None, b'{"count": 20}')
+    assert key != build_cache_key('HomeTimeline', 'guest', None, b'{"count": 40}')
+    assert get_account_key(None) == 'guest'
+    assert 'token' not in get_account_key('token')
+
+
+def test_client_serves_repeated_reads_from_the_cache(client_options: TwitterClientOptions, tmp_path) -> None:
+    cache = ResponseCache()
+
+    with TwitterClient(client_options, response_cache=cache) as client:
+        assert TwitterAuthAPIModule(client, LocalCookiesCacheService(str(tmp_path))).login(
+            'user', 'user', 'password', persist_session=False)
+        timeline_module = TwitterHomeTimelineAPIModule(client, TwitterTweetsAPIModule(client))
+        hits = cache.hits
+
+        first = timeline_module.get_home_timeline()
+        second = timeline_module.get_home_timeline()
+        timeline_module.get_home_timeline(use_cache=False)
+
+    assert first is not None and first == second
+    assert cache.hits == hits + 1
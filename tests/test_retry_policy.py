@@ -0,0 +1,51 @@
+import time
+
+from twitter_api.rate_limiter import RateLimitQuota
+from twitter_api.retry_policy import RetryOptions, RetryPolicy
+
+
+def test_only_idempotent_reads_are_retried() -> None:
+    policy = RetryPolicy()
+
+    assert policy.should_retry('HomeTimeline', 503, 0)
+    assert not policy.should_retry('CreateTweet', 503, 0)
+    assert not policy.should_retry('HomeTimeline', 404, 0)
+
+
+def test_retries_are_bounded() -> None:
+    policy = RetryPolicy(RetryOptions(max_retries=2))
+
+    assert policy.can_retry('Viewer', 1)
+    assert not policy.can_retry('Viewer', 2)
+
+
+def test_backoff_is_exponential_jittered_and_capped() -> None:
+    policy = RetryPolicy(RetryOptions(backoff_factor=1, max_backoff=5))
+
+    for attempt, backoff in [(0, 1), (1, 2), (2, 4), (5, 5)]:
+        delays = [policy.get_delay(attempt) for _ in range(50)]
+
+        assert all(delay is not None and backoff / 2 <= delay <= backoff for delay in delays)
+
+
+def test_rate_limited_request_is_retried_at_the_reset() -> None:
+    policy = RetryPolicy()
+    quota = RateLimitQuota(remaining=0, reset=time.time() + 30)
+
+    delay = policy.get_delay(0, quota)
+
+    assert delay is not None and 29 < delay <= 30
+
+
+def test_quota_with_remaining_calls_uses_the_backoff() -> None:
+    policy = RetryPolicy(RetryOptions(backoff_factor=1))
+
+    delay = policy.get_delay(0, RateLimitQuota(remaining=3, reset=time.time() + 600))
+
+    assert delay is not None and delay <= 1
+
+
+def test_gives_up_when_the_reset_is_too_far() -> None:
+    policy = RetryPolicy(RetryOptions(max_reset_wait=60))
+
+    assert policy.get_delay(0, RateLimitQuota(remaining=0, reset=time.time() + 600)) is None
@@ -0,0 +1,172 @@
+import threading
+import time
+from typing import List
+
+from benchmarks.stub_server import COOKIE_MAX_AGE
+from twitter_api.instrumentation import InstrumentationHooks, RequestEvent
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.session_keeper import SessionKeeper, SessionKeeperOptions
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+DAY = 24 * 3600
+
+
+class FakeSession:
+    """
+    Session whose cookies expire at `expiration`, a refresh extends them by `refresh_extension` seconds
+    and a new login by `relogin_extension` seconds
+    """
+
+    expiration: float | None
+    refreshes: int
+    relogins: int
+    refreshed: threading.Event
+
+    def __init__(
+            self,
+            expiration: float | None,
+            refresh_extension: float = 0,
+            relogin_extension: float = 0,
+            is_authenticated: bool = True,
+            fail: bool = False) -> None:
+        self.expiration = expiration
+        self.refreshes = 0
+        self.relogins = 0
+        self.refreshed = threading.Event()
+        self.__refresh_extension = refresh_extension
+        self.__relogin_extension = relogin_extension
+        self.__is_authenticated = is_authenticated
+        self.__fail = fail
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.__is_authenticated
+
+    @property
+    def user_id(self) -> str | None:
+        return 'user'
+
+    def get_session_expiration(self, cookies_to_check: List[str]) -> float | None:
+        return self.expiration
+
+    def refresh_session(self) -> bool:
+        if self.__fail:
+            raise ConnectionError('refresh failed')
+
+        self.refreshes += 1
+        self.expiration = (self.expiration or 0) + self.__refresh_extension
+        self.refreshed.set()
+
+        return True
+
+    def relogin(self) -> bool:
+        self.relogins += 1
+        self.expiration = time.time() + self.__relogin_extension
+        self.refreshed.set()
+
+        return self.__relogin_extension > 0
+
+
+class RecordingHooks(InstrumentationHooks):
+    operations: List[str]
+
+    def __init__(self) -> None:
+        self.operations = []
+
+    def on_request(self, event: RequestEvent) -> None:
+        self.operations.append(event.operation)
+
+
+def test_sessions_far_from_their_expiration_are_left_alone() -> None:
+    session = FakeSession(time.time() + 30 * DAY)
+    keeper = SessionKeeper(SessionKeeperOptions(refresh_before=DAY))
+    keeper.add(session)
+
+    assert keeper.check() == 0
+    assert (session.refreshes, session.relogins) == (0, 0)
+
+
+def test_expiring_sessions_are_refreshed() -> None:
+    session = FakeSession(time.time() + 60, refresh_extension=30 * DAY)
+    keeper = SessionKeeper(SessionKeeperOptions(refresh_before=DAY))
+    keeper.add(session)
+
+    assert keeper.check() == 1
+    assert (session.refreshes, session.relogins) == (1, 0)
+    assert keeper.check() == 0
+
+
+def test_sessions_still_expiring_after_the_refresh_log_in_again() -> None:
+    session = FakeSession(time.time() + 60, relogin_extension=30 * DAY)
+    failing_login = FakeSession(time.time() + 60)
+    keeper = SessionKeeper(SessionKeeperOptions(refresh_before=DAY))
+    keeper.add(session)
+    keeper.add(failing_login)
+
+    assert keeper.check() == 1
+    assert (session.refreshes, session.relogins) == (1, 1)
+    assert (failing_login.refreshes, failing_login.relogins) == (1, 1)
+
+
+def test_missing_cookies_and_errors() -> None:
+    # the expiration of a session missing one of its cookies is 0
+    missing_cookie = FakeSession(0, relogin_extension=30 * DAY)
+    without_expiration = FakeSession(None)
+    logged_out = FakeSession(0, is_authenticated=False)
+    failing = FakeSession(0, fail=True)
+    keeper = SessionKeeper(SessionKeeperOptions(refresh_before=DAY))
+
+    for session in (failing, missing_cookie, without_expiration, logged_out):
+        keeper.add(session)
+
+    # an error is logged and does not prevent the refresh of the next sessions
+    assert keeper.check() == 1
+    assert missing_cookie.relogins == 1
+    assert without_expiration.refreshes == logged_out.refreshes == 0
+
+
+def test_sessions_are_added_once() -> None:
+    session = FakeSession(None)
+    keeper = SessionKeeper()
+    keeper.add(session)
+    keeper.add(session)
+
+    assert keeper.sessions == [session]
+
+    keeper.remove(session)
+    keeper.remove(session)
+
+    assert keeper.sessions == []
+
+
+def test_added_sessions_are_checked_right_away() -> None:
+    session = FakeSession(time.time() + 60, refresh_extension=30 * DAY)
+
+    with SessionKeeper(SessionKeeperOptions(refresh_before=DAY, check_interval=3600)) as keeper:
+        keeper.add(session)
+
+        assert session.refreshed.wait(5)
+
+    assert session.refreshes == 1
+
+
+def test_keeper_logs_the_account_in_again(client_options: TwitterClientOptions, tmp_path) -> None:
+    hooks = RecordingHooks()
+    # every cookie of the stub expires in a year, within the refresh window
+    keeper = SessionKeeper(SessionKeeperOptions(refresh_before=COOKIE_MAX_AGE + DAY))
+
+    with TwitterClient(client_options, hooks=[hooks]) as twitter_client:
+        auth_module = TwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(str(tmp_path)), keeper)
+
+        assert auth_module.login('user', 'user', 'password', persist_session=False)
+        assert keeper.sessions == [auth_module]
+
+        hooks.operations.clear()
+
+        assert keeper.check() == 1
+
+    # the Viewer query does not renew the auth token, a new login follows
+    assert hooks.operations[0] == 'Viewer'
+    assert 'onboarding/task.json' in hooks.operations
+    assert keeper.sessions == [auth_module]
@@ -0,0 +1,63 @@
+import threading
+from typing import List
+
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel
+from twitter_api.services.modules.store.sqlite_tweets_store import SqliteTweetsStore
+
+
+def test_saved_tweets_are_read_back(tmp_path, timeline_tweets: List[TwitterTweetModel]) -> None:
+    store = SqliteTweetsStore(str(tmp_path / 'tweets.db'))
+
+    assert store.save_tweets(timeline_tweets) == len(timeline_tweets)
+
+    for tweet in timeline_tweets:
+        assert store.get_tweet(tweet.rest_id) == tweet
+        assert store.get_user(tweet.author.rest_id) == tweet.author
+
+
+def test_only_new_tweets_are_counted(tmp_path, timeline_tweets: List[TwitterTweetModel]) -> None:
+    store = SqliteTweetsStore(str(tmp_path / 'tweets.db'))
+    store.save_tweets(timeline_tweets[:5])
+
+    assert store.save_tweets(timeline_tweets) == len(timeline_tweets) - 5
+    assert store.save_tweets([]) == 0
+
+
+def test_known_tweet_ids(tmp_path, timeline_tweets: List[TwitterTweetModel]) -> None:
+    store = SqliteTweetsStore(str(tmp_path / 'tweets.db'))
+    store.save_tweets(timeline_tweets[:3])
+    ids = [tweet.rest_id for tweet in timeline_tweets]
+
+    assert store.get_known_tweet_ids(ids + ['unknown']) == set(ids[:3])
+    assert store.contains_tweet(ids[0])
+    assert not store.contains_tweet(ids[3])
+    assert store.get_tweet('unknown') is None
+
+
+def test_latest_tweets_are_sorted_by_date(tmp_path, timeline_tweets: List[TwitterTweetModel]) -> None:
+    store = SqliteTweetsStore(str(tmp_path / 'tweets.db'))
+    store.save_tweets(timeline_tweets)
+
+    latest = store.get_latest_tweets(limit=5)
+    dates = sorted((tweet.created_at for tweet in timeline_tweets), reverse=True)
+
+    # the recorded tweets share their dates, only the order of the dates is defined
+    assert [tweet.created_at for tweet in latest] == dates[:5]
+    assert all(tweet in timeline_tweets for tweet in latest)
+
+
+def test_store_persists_and_is_shared_by_threads(tmp_path, timeline_tweets: List[TwitterTweetModel]) -> None:
+    path = str(tmp_path / 'store' / 'tweets.db')
+    store = SqliteTweetsStore(path)
+    threads = [threading.Thread(target=store.save_tweets, args=([tweet],)) for tweet in timeline_tweets]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    store.close()
+
+    assert SqliteTweetsStore(path).get_known_tweet_ids(tweet.rest_id for tweet in timeline_tweets) == \
+        {tweet.rest_id for tweet in timeline_tweets}
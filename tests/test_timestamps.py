@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from twitter_api import timestamps
+from twitter_api.timestamps import (
+    TWITTER_DATE_FORMAT, parse_twitter_datetime, parse_twitter_timestamp, parse_twitter_timestamps
+)
+
+
+def random_dates(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    start = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    dates = []
+
+    for _ in range(count):
+        offset = timezone(timedelta(minutes=rng.randrange(-14 * 60, 14 * 60 + 1, 15)))
+        value = start + timedelta(seconds=rng.randrange(0, 130 * 365 * 86400))
+        dates.append(value.astimezone(offset).strftime(TWITTER_DATE_FORMAT))
+
+    return dates
+
+
+INVALID_DATES = [
+    '',
+    'Wed Oct 10 20:19:24 +0000',
+    'Wed Oct 32 20:19:24 +0000 2018',
+    'Wed Feb 29 20:19:24 +0000 2018',
+    'Wed Oct 10 24:19:24 +0000 2018',
+    'Xyz Oct 10 20:19:24 +0000 2018',
+    'Wed Foo 10 20:19:24 +0000 2018',
+    'Wed Oct 10 20:19:24 +0000 2018 ',
+    'Wed Oct 10 20-19-24 +0000 2018',
+]
+
+
+def test_datetimes_match_strptime() -> None:
+    for date in random_dates(2000):
+        expected = datetime.strptime(date, TWITTER_DATE_FORMAT)
+        value = parse_twitter_datetime(date)
+
+        assert value == expected
+        assert value.utcoffset() == expected.utcoffset()
+
+
+def test_timestamps_match_strptime() -> None:
+    for date in random_dates(2000, seed=1):
+        assert parse_twitter_timestamp(date) == int(datetime.strptime(date, TWITTER_DATE_FORMAT).timestamp())
+
+
+def test_leap_days() -> None:
+    assert parse_twitter_datetime('Tue Feb 29 12:00:00 +0000 2000') == datetime(2000, 2, 29, 12, tzinfo=timezone.utc)
+    assert parse_twitter_timestamp('Thu Feb 29 00:00:00 +0000 2024') == 1709164800
+
+
+@pytest.mark.parametrize('date', INVALID_DATES)
+def test_invalid_dates_raise_like_strptime(date: str) -> None:
+    with pytest.raises(ValueError):
+        parse_twitter_datetime(date)
+
+    with pytest.raises(ValueError):
+        parse_twitter_timestamp(date)
+
+    with pytest.raises(ValueError):
+        parse_twitter_timestamps([random_dates(1)[0], date])
+
+
+def test_batch_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(timestamps, 'numpy', None)
+    dates = random_dates(500, seed=2)
+
+    assert list(parse_twitter_timestamps(dates)) == [parse_twitter_timestamp(date) for date in dates]
+
+
+def test_batch_with_numpy() -> None:
+    pytest.importorskip('numpy')
+    dates = random_dates(500, seed=3)
+
+    assert parse_twitter_timestamps(dates).tolist() == [parse_twitter_timestamp(date) for date in dates]
+    assert parse_twitter_timestamps([]).tolist() == []
+
+
+def test_batch_rejects_non_ascii_dates() -> None:
+    with pytest.raises(ValueError):
+        parse_twitter_timestamps(random_dates(3) + ['Wéd Oct 10 20:19:24 +0000 2018'])
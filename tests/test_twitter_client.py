@@ -0,0 +1,172 @@
+from typing import Generator, List, Tuple
+
+import pytest
+import requests
+
+from benchmarks.run import build_client_options
+from benchmarks.stub_server import DEFAULT_PAGES, StubServer, build_home_timeline_page
+from twitter_api.instrumentation import InstrumentationHooks, ResponseEvent, WaitReason
+from twitter_api.rate_limiter import (
+    NoRateLimiter, RateLimiterInterface, RateLimiterOptions, RateLimitQuota, TokenBucketRateLimiter
+)
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+RATE_LIMIT = 2
+RATE_LIMIT_WINDOW = 1.0
+TWEET_ID = '1712000000000000005'
+
+
+class RecordingHooks(InstrumentationHooks):
+    responses: List[ResponseEvent]
+    waits: List[Tuple[str, float, WaitReason]]
+    # quota known by the client when each response event fires
+    quotas: List[RateLimitQuota | None]
+
+    def __init__(self, twitter_client: TwitterClient) -> None:
+        self.responses = []
+        self.waits = []
+        self.quotas = []
+        self.__twitter_client = twitter_client
+
+    def on_response(self, event: ResponseEvent) -> None:
+        self.responses.append(event)
+        self.quotas.append(self.__twitter_client.quotas.get(event.operation))
+
+    def on_wait(self, operation: str, seconds: float, reason: WaitReason) -> None:
+        self.waits.append((operation, seconds, reason))
+
+    def get_status_codes(self, operation: str) -> List[int | None]:
+        return [event.status_code for event in self.responses if event.operation == operation]
+
+
+@pytest.fixture(scope='module')
+def rate_limited_server() -> Generator[StubServer, None, None]:
+    with StubServer(rate_limit=RATE_LIMIT, rate_limit_window=RATE_LIMIT_WINDOW) as server:
+        yield server
+
+
+def login(
+        options: TwitterClientOptions,
+        directory: str,
+        rate_limiter: RateLimiterInterface | None = None) -> Tuple[TwitterClient, RecordingHooks]:
+    twitter_client = TwitterClient(options, rate_limiter=rate_limiter).__enter__()
+    hooks = RecordingHooks(twitter_client)
+    twitter_client.add_hooks(hooks)
+
+    assert TwitterAuthAPIModule(twitter_client, LocalCookiesCacheService(directory)).login(
+        'user', 'user', 'password', persist_session=False)
+
+    return twitter_client, hooks
+
+
+@pytest.fixture
+def twitter_client(rate_limited_server: StubServer, tmp_path) -> Generator[Tuple[TwitterClient, RecordingHooks], None, None]:
+    twitter_client, hooks = login(build_client_options(rate_limited_server.url), str(tmp_path))
+
+    try:
+        yield twitter_client, hooks
+    finally:
+        twitter_client.__exit__(None, None, None)
+
+
+@pytest.fixture
+def unlimited_client(rate_limited_server: StubServer, tmp_path) -> Generator[Tuple[TwitterClient, RecordingHooks], None, None]:
+    # the client does not wait for the quota reported by the server, it is rejected instead
+    twitter_client, hooks = login(build_client_options(rate_limited_server.url), str(tmp_path), NoRateLimiter())
+
+    try:
+        yield twitter_client, hooks
+    finally:
+        twitter_client.__exit__(None, None, None)
+
+
+def test_client_waits_for_the_reset_of_an_exhausted_quota(twitter_client: Tuple[TwitterClient, RecordingHooks]) -> None:
+    client, hooks = twitter_client
+    timeline_module = TwitterHomeTimelineAPIModule(client, TwitterTweetsAPIModule(client))
+
+    for _ in range(RATE_LIMIT + 1):
+        assert timeline_module.get_home_timeline() is not None
+
+    # the quota of the headers is spent, the third call waits for its reset instead of being rejected
+    assert hooks.get_status_codes('HomeTimeline') == [200] * (RATE_LIMIT + 1)
+    assert [(operation, reason) for operation, _, reason in hooks.waits] == [('HomeTimeline', 'rate_limit')]
+    assert 0 < hooks.waits[0][1] <= RATE_LIMIT_WINDOW + RateLimiterOptions().max_jitter
+
+
+def test_rate_limited_read_is_retried_when_the_window_resets(unlimited_client: Tuple[TwitterClient, RecordingHooks]) -> None:
+    client, hooks = unlimited_client
+    timeline_module = TwitterHomeTimelineAPIModule(client, TwitterTweetsAPIModule(client))
+
+    for _ in range(RATE_LIMIT + 1):
+        assert timeline_module.get_home_timeline() is not None
+
+    assert hooks.get_status_codes('HomeTimeline') == [200] * RATE_LIMIT + [429, 200]
+    assert [(operation, reason) for operation, _, reason in hooks.waits] == [('HomeTimeline', 'retry')]
+    # the retry is scheduled at the reset of the window, not after the exponential backoff
+    assert hooks.waits[0][1] <= RATE_LIMIT_WINDOW
+
+
+def test_retried_read_waits_once_for_the_reset(rate_limited_server: StubServer, tmp_path) -> None:
+    jitter = 0.5
+    # only the quota of the headers is enforced, with a known jitter
+    rate_limiter = TokenBucketRateLimiter(RateLimiterOptions(rules={}, default_rule=None, min_jitter=jitter, max_jitter=jitter))
+    client, hooks = login(build_client_options(rate_limited_server.url), str(tmp_path), rate_limiter)
+    timeline_module = TwitterHomeTimelineAPIModule(client, TwitterTweetsAPIModule(client))
+
+    with client:
+        assert timeline_module.get_home_timeline() is not None
+        # the last call of the window is spent by another http session of the account, the client still counts on it
+        requests.get(f'{rate_limited_server.url}/i/api/graphql/query/HomeTimeline', cookies=client.session.cookies)
+        assert timeline_module.get_home_timeline() is not None
+
+    # the retry delay and the limiter both wait for the reset of the window, it is waited once
+    assert hooks.get_status_codes('HomeTimeline') == [200, 429, 200]
+    assert [(operation, reason) for operation, _, reason in hooks.waits] == [('HomeTimeline', 'rate_limit')]
+    assert jitter < hooks.waits[0][1] <= RATE_LIMIT_WINDOW + jitter
+
+
+def test_rate_limited_mutation_is_not_retried(unlimited_client: Tuple[TwitterClient, RecordingHooks]) -> None:
+    client, hooks = unlimited_client
+    tweets_module = TwitterTweetsAPIModule(client)
+
+    results = [tweets_module.try_favorite_tweet(TWEET_ID) for _ in range(RATE_LIMIT + 1)]
+
+    assert [(result.success, result.status_code) for result in results] == [(True, 200)] * RATE_LIMIT + [(False, 429)]
+    assert results[-1].error_code == 88
+    assert hooks.waits == []
+
+
+def test_response_event_sees_the_quota_of_its_response(
+        twitter_client: Tuple[TwitterClient, RecordingHooks], rate_limited_server: StubServer) -> None:
+    client, hooks = twitter_client
+    tweets_module = TwitterTweetsAPIModule(client)
+
+    assert tweets_module.try_favorite_tweet(TWEET_ID).success
+    # the last call of the window is spent by another http session of the account, the client still counts on it
+    requests.post(f'{rate_limited_server.url}/i/api/graphql/query/FavoriteTweet', cookies=client.session.cookies)
+    assert not tweets_module.try_favorite_tweet(TWEET_ID).success
+
+    quotas = [quota for event, quota in zip(hooks.responses, hooks.quotas) if event.operation == 'FavoriteTweet']
+
+    # the hooks of a 429 response, e.g. the pool benching the session, see the reset of the rejected call
+    assert hooks.get_status_codes('FavoriteTweet') == [200, 429]
+    assert [quota.remaining if quota else None for quota in quotas] == [1, 0]
+    assert all(quota is not None and 0 < quota.reset_in <= RATE_LIMIT_WINDOW for quota in quotas)
+
+
+def test_streamed_responses_report_the_bytes_read(client_options: TwitterClientOptions, tmp_path) -> None:
+    client, hooks = login(client_options, str(tmp_path))
+
+    with client:
+        timeline_module = TwitterHomeTimelineAPIModule(client, TwitterTweetsAPIModule(client))
+        tweets = list(timeline_module.get_home_timeline_tweets_incremental(count=20))
+
+    events = [event for event in hooks.responses if event.operation == 'HomeTimeline']
+
+    assert tweets
+    assert [event.bytes_received for event in events] == \
+        [len(build_home_timeline_page(20, page, DEFAULT_PAGES)) for page in range(DEFAULT_PAGES)]
@@ -0,0 +1,188 @@
+import time
+from typing import Dict, Generator, List
+
+import pytest
+import requests
+
+from benchmarks.run import build_client_options
+from benchmarks.stub_server import StubServer
+from twitter_api.instrumentation import ResponseEvent
+from twitter_api.models.twitter_compact_models import CompactUser
+from twitter_api.models.twitter_tweets_models import CreateTweetItem
+from twitter_api.parse_pool import ParsePool, ParsePoolOptions
+from twitter_api.retry_policy import RetryOptions
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
+from twitter_api.services.pooled_twitter_api_service import PooledTwitterAPIService
+from twitter_api.twitter_client import TwitterClientOptions
+from twitter_api.twitter_client_pool import TwitterAccountCredentials, TwitterClientPool, TwitterPoolSession
+
+RATE_LIMIT = 2
+ACCOUNTS = 3
+TWEET_ID = '1712000000000000005'
+
+
+def build_accounts(count: int) -> List[TwitterAccountCredentials]:
+    return [
+        TwitterAccountCredentials(user_id=f'user{i}', alternate_id=f'user{i}', password='password') for i in range(count)
+    ]
+
+
+def exhaust_rate_limit(server: StubServer, session: TwitterPoolSession, operation: str) -> None:
+    """
+    Spend the budget of the account from another http session, as another process sharing the account would:
+    the client of the session does not know its quota until the server rejects it
+    """
+    for _ in range(RATE_LIMIT):
+        requests.post(
+            f'{server.url}/i/api/graphql/query/{operation}', data=b'{}', cookies=session.twitter_client.session.cookies
+        ).raise_for_status()
+
+
+def build_pool_options(url: str) -> TwitterClientOptions:
+    options = build_client_options(url)
+    # rate limited calls fail fast, so that the pool moves the next ones to another session
+    options.retry = RetryOptions(status_codes={500, 502, 503, 504})
+
+    return options
+
+
+@pytest.fixture(scope='module')
+def rate_limited_server() -> Generator[StubServer, None, None]:
+    with StubServer(rate_limit=RATE_LIMIT, rate_limit_window=60) as server:
+        yield server
+
+
+@pytest.fixture
+def pool(rate_limited_server: StubServer, tmp_path) -> Generator[TwitterClientPool, None, None]:
+    accounts = build_accounts(ACCOUNTS)
+
+    with TwitterClientPool(accounts, LocalCookiesCacheService(str(tmp_path)), build_pool_options(rate_limited_server.url)) as pool:
+        assert pool.login() == ACCOUNTS
+        yield pool
+
+
+def test_login_authenticates_every_session(pool: TwitterClientPool) -> None:
+    sessions = pool.sessions
+
+    assert pool.is_authenticated
+    assert all(session.is_healthy() for session in sessions)
+    # every login of the stub gets its own auth token, so the accounts have their own rate limits
+    assert len({session.twitter_client.session.cookies.get('auth_token') for session in sessions}) == ACCOUNTS
+
+
+def test_calls_are_spread_across_sessions(pool: TwitterClientPool) -> None:
+    service = PooledTwitterAPIService(pool)
+
+    assert all(service.favorite_tweet(TWEET_ID) for _ in range(ACCOUNTS * RATE_LIMIT))
+    assert [session.requests_count for session in pool.sessions] == [RATE_LIMIT] * ACCOUNTS
+
+
+def test_rate_limited_session_leaves_the_rotation(pool: TwitterClientPool, rate_limited_server: StubServer) -> None:
+    service = PooledTwitterAPIService(pool)
+    limited, *others = pool.sessions
+    exhaust_rate_limit(rate_limited_server, limited, 'FavoriteTweet')
+
+    results = [service.favorite_tweet(TWEET_ID) for _ in range(4)]
+
+    # the first call of the exhausted session is rejected, the next ones go to the other sessions
+    assert results == [False, True, True, True]
+    assert not limited.is_healthy('FavoriteTweet')
+    assert all(session.is_healthy('FavoriteTweet') for session in others)
+    # the other operations of the session are not affected
+    assert limited.is_healthy('CreateTweet')
+
+
+def test_no_healthy_session_fails_the_remaining_items(pool: TwitterClientPool, rate_limited_server: StubServer) -> None:
+    service = PooledTwitterAPIService(pool)
+
+    for session in pool.sessions:
+        exhaust_rate_limit(rate_limited_server, session, 'FavoriteTweet')
+
+    assert [service.favorite_tweet(TWEET_ID) for _ in range(ACCOUNTS)] == [False] * ACCOUNTS
+
+    with pytest.raises(ValueError, match='No healthy session'):
+        service.favorite_tweet(TWEET_ID)
+
+    assert service.create_tweet('hello') is not None
+
+
+def test_rate_limited_session_returns_when_the_window_resets(tmp_path) -> None:
+    window = 1.0
+
+    with StubServer(rate_limit=RATE_LIMIT, rate_limit_window=window) as server, \
+            TwitterClientPool(build_accounts(1), LocalCookiesCacheService(str(tmp_path)), build_pool_options(server.url)) as pool:
+        assert pool.login() == 1
+        service = PooledTwitterAPIService(pool)
+        session = pool.sessions[0]
+        exhaust_rate_limit(server, session, 'FavoriteTweet')
+
+        assert not service.favorite_tweet(TWEET_ID)
+        assert not session.is_healthy('FavoriteTweet')
+
+        # the session is benched until the reset reported by the server, not for the default cooldown
+        time.sleep(window + 0.2)
+
+        assert session.is_healthy('FavoriteTweet')
+        assert service.favorite_tweet(TWEET_ID)
+
+
+def test_acquire_reserves_the_session_of_an_account(pool: TwitterClientPool) -> None:
+    key = pool.sessions[1].key
+
+    with pool.acquire('HomeTimeline', key) as session:
+        assert session.key == key
+        assert session.in_flight == 1
+
+    assert session.in_flight == 0
+
+    with pytest.raises(ValueError):
+        with pool.acquire('HomeTimeline', 'unknown'):
+            pass
+
+
+def test_rejected_guest_token_keeps_the_session_in_rotation(pool: TwitterClientPool) -> None:
+    session = pool.sessions[0]
+    event = ResponseEvent(
+        operation='HomeTimeline', method='POST', url='', attempt=0, status_code=401, elapsed=0, guest_token_rejected=True)
+
+    # the client retries with a new guest token, the cookies of the account are still valid and must not be deleted
+    session.on_response(event)
+
+    assert session.is_healthy()
+
+    session.on_response(event.model_copy(update={'guest_token_rejected': False}))
+
+    assert not session.is_healthy()
+
+
+def test_bulk_create_runs_on_every_session(stub_server: StubServer, tmp_path) -> None:
+    items = [CreateTweetItem(content=f'tweet {i}') for i in range(4 * ACCOUNTS)]
+
+    # the sessions with the fewest requests in flight are picked first, so the spread depends on the timings:
+    # the server does not rate limit here
+    with TwitterClientPool(build_accounts(ACCOUNTS), LocalCookiesCacheService(str(tmp_path)), build_pool_options(stub_server.url)) as pool:
+        assert pool.login() == ACCOUNTS
+        results = PooledTwitterAPIService(pool).create_tweets(items, concurrency=ACCOUNTS)
+
+        assert [result.success for result in results] == [True] * len(items)
+        assert sum(session.requests_count for session in pool.sessions) == len(items)
+        assert all(session.requests_count > 0 for session in pool.sessions)
+
+
+def test_crawl_reads_the_timeline_of_every_account(pool: TwitterClientPool) -> None:
+    service = PooledTwitterAPIService(pool)
+
+    with ParsePool(ParsePoolOptions(workers=2)) as parse_pool:
+        pages = list(service.crawl_home_timelines(parse_pool, max_pages=RATE_LIMIT))
+
+    for session in pool.sessions:
+        indexes = [page.index for page in pages if page.source == session.key]
+
+        assert indexes == list(range(RATE_LIMIT))
+
+    # the authors of the accounts are shared records
+    authors: Dict[str, CompactUser] = {}
+
+    for page in pages:
+        for tweet in page.data.tweets:
+            assert authors.setdefault(tweet.author.rest_id, tweet.author) is tweet.author
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from typing import AsyncGenerator, Generator, List
+
+import pytest
+
+from twitter_api.utils import async_prefetch_iterator, deep_merge, prefetch_iterator
+
+
+class Producer:
+    """
+    Generator recording how far it was consumed, and whether it was closed
+    """
+
+    produced: int
+    closed: threading.Event
+
+    def __init__(self, count: int, fail_at: int | None = None) -> None:
+        self.produced = 0
+        self.closed = threading.Event()
+        self.__count = count
+        self.__fail_at = fail_at
+
+    def __iter__(self) -> Generator[int, None, None]:
+        try:
+            for i in range(self.__count):
+                if i == self.__fail_at:
+                    raise ValueError(f'item {i}')
+
+                self.produced += 1
+                yield i
+        finally:
+            self.closed.set()
+
+
+def test_deep_merge() -> None:
+    merged = deep_merge({'a': {'b': 1, 'c': [1]}, 'd': 1}, {'a': {'c': [2], 'e': 3}, 'd': 2})
+
+    assert merged == {'a': {'b': 1, 'c': [1, 2], 'e': 3}, 'd': 2}
+
+
+def test_prefetch_keeps_the_order() -> None:
+    assert list(prefetch_iterator(range(100), 4)) == list(range(100))
+
+
+def test_prefetch_is_bounded() -> None:
+    producer = Producer(100)
+    iterator = prefetch_iterator(iter(producer), 3)
+
+    assert next(iterator) == 0
+    # the item delivered released its slot, one more is fetched at most
+    threading.Event().wait(0.3)
+
+    assert producer.produced <= 1 + 3
+    iterator.close()
+
+
+def test_prefetch_raises_the_errors_of_the_iterable() -> None:
+    producer = Producer(10, fail_at=5)
+    items: List[int] = []
+
+    with pytest.raises(ValueError, match='item 5'):
+        for item in prefetch_iterator(iter(producer), 2):
+            items.append(item)
+
+    assert items == [0, 1, 2, 3, 4]
+    assert producer.closed.wait(1)
+
+
+def test_closing_the_prefetch_closes_the_iterable() -> None:
+    producer = Producer(1000)
+    iterator = prefetch_iterator(iter(producer), 2)
+
+    assert next(iterator) == 0
+    iterator.close()
+
+    assert producer.closed.wait(1)
+    assert producer.produced < 1000
+
+
+async def produce(count: int, fail_at: int | None = None, produced: List[int] | None = None) -> AsyncGenerator[int, None]:
+    for i in range(count):
+        if i == fail_at:
+            raise ValueError(f'item {i}')
+
+        if produced is not None:
+            produced.append(i)
+
+        await asyncio.sleep(0)
+        yield i
+
+
+def test_async_prefetch_keeps_the_order() -> None:
+    async def run() -> List[int]:
+        return [item async for item in async_prefetch_iterator(produce(100), 4)]
+
+    assert asyncio.run(run()) == list(range(100))
+
+
+def test_async_prefetch_is_bounded() -> None:
+    produced: List[int] = []
+
+    async def run() -> None:
+        iterator = async_prefetch_iterator(produce(100, produced=produced), 3)
+
+        assert await anext(iterator) == 0
+        await asyncio.sleep(0.05)
+        assert len(produced) <= 1 + 3
+
+        await iterator.aclose()
+
+    asyncio.run(run())
+
+
+def test_async_prefetch_raises_the_errors_of_the_iterable() -> None:
+    async def run() -> List[int]:
+        items = []
+
+        with pytest.raises(ValueError, match='item 3'):
+            async for item in async_prefetch_iterator(produce(10, fail_at=3), 2):
+                items.append(item)
+
+        return items
+
+    assert asyncio.run(run()) == [0, 1, 2]
@@ -0,0 +1,303 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from http import HTTPMethod
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Tuple, Type
+
+import httpx
+from requests.cookies import RequestsCookieJar
+
+from twitter_api.guest_token_pool import GuestTokenPool
+from twitter_api.instrumentation import InstrumentationHooks
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_models import EmptyResponseModel, GuestTokenResponseModel
+from twitter_api.rate_limiter import RateLimiterInterface, get_operation_name
+from twitter_api.replay_transport import build_async_transport
+from twitter_api.response_cache import ResponseCache
+from twitter_api.twitter_client import (
+    MAX_CONNECTIONS, MAX_KEEPALIVE_CONNECTIONS, STREAM_CHUNK_SIZE, HTTPResponse, T, TwitterAPIResponse,
+    TwitterAPIStreamResponse, TwitterBaseClient, TwitterClientOptions
+)
+
+logger = get_logger(__name__)
+
+
+class AsyncTwitterClient(TwitterBaseClient):
+    """
+    Async counterpart of TwitterClient: requests are sent through a single httpx connection pool
+    so that many in-flight requests can share the same event loop and keep-alive connections
+    """
+
+    __client: httpx.AsyncClient
+    __cookies: RequestsCookieJar
+
+    def __init__(
+            self,
+            options: TwitterClientOptions | None = None,
+            rate_limiter: RateLimiterInterface | None = None,
+            hooks: List[InstrumentationHooks] | None = None,
+            guest_token_pool: GuestTokenPool | None = None,
+            response_cache: ResponseCache | None = None) -> None:
+        super().__init__(options, rate_limiter, hooks, guest_token_pool, response_cache)
+        # the same cookie jar type used by requests, so that sessions can be persisted with the cookies cache services
+        self.__cookies = RequestsCookieJar()
+
+    async def __aenter__(self) -> "AsyncTwitterClient":
+        self.__client = self.__build_client()
+        await self.__get_guest_token()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.__client.aclose()
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        return self.__client
+
+    @property
+    def cookies(self) -> RequestsCookieJar:
+        return self.__cookies
+
+    async def request(
+            self,
+            method: HTTPMethod,
+            url: str,
+            model_type: Type[T] = EmptyResponseModel,
+            headers: Dict[str, Any] | None = None,
+            params: Dict[str, Any] | str | None = None,
+            data: Dict[str, Any] | bytes | None = None,
+            use_cache: bool = True) -> 'TwitterAPIResponse[T]':
+        """
+        data is sent as json, a pre-encoded json body can be given as bytes.
+        The reads cached by the response cache of the client are sent to the network only when use_cache is False.
+        """
+        operation = get_operation_name(url)
+        cache_key = self._get_cache_key(operation, params, data) if use_cache else None
+
+        if cache_key is None:
+            response, _ = await self.__send(operation, method, url, headers, params, data)
+        else:
+            response = await self.__send_cached(cache_key, operation, method, url, headers, params, data)
+
+        if 400 <= response.status_code and response.status_code < 500:
+            return self._build_failed_response(response)
+
+        response.raise_for_status()
+
+        model_response = self._deserialize_response_to_model(response, model_type, operation)
+
+        return TwitterAPIResponse[T](
+            is_success=response.is_success,
+            status_code=response.status_code,
+            data=model_response
+        )
+
+    @asynccontextmanager
+    async def stream_request(
+            self,
+            method: HTTPMethod,
+            url: str,
+            headers: Dict[str, Any] | None = None,
+            params: Dict[str, Any] | str | None = None,
+            data: Dict[str, Any] | bytes | None = None) -> AsyncGenerator[TwitterAPIStreamResponse, None]:
+        """
+        Same as request, but the body of a successful response is not downloaded upfront:
+        its chunks are read from `chunks` while the context is open, the connection is released on exit
+        """
+        operation = get_operation_name(url)
+        response, emit_response = await self.__send(operation, method, url, headers, params, data, stream=True)
+        bytes_received = 0
+
+        async def count_chunks(chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+            nonlocal bytes_received
+
+            async for chunk in chunks:
+                bytes_received += len(chunk)
+                yield chunk
+
+        try:
+            if 400 <= response.status_code and response.status_code < 500:
+                failed_response = self._build_failed_response(response)
+
+                yield TwitterAPIStreamResponse(False, response.status_code, errors=failed_response.errors)
+                return
+
+            response.raise_for_status()
+
+            yield TwitterAPIStreamResponse(
+                response.is_success, response.status_code, chunks=count_chunks(response.aiter_bytes(STREAM_CHUNK_SIZE)))
+        finally:
+            await response.aclose()
+
+            if emit_response is not None:
+                emit_response(bytes_received=bytes_received)
+
+    def _get_cookie(self, name: str) -> str | None:
+        return self.__cookies.get(name)
+
+    async def __send_cached(
+            self,
+            key: str,
+            operation: str,
+            method: HTTPMethod,
+            url: str,
+            headers: Dict[str, Any] | None,
+            params: Dict[str, Any] | str | None,
+            data: Dict[str, Any] | bytes | None) -> HTTPResponse:
+        """
+        Return the fresh cached response, otherwise send the request once for all the tasks asking for the same key
+        """
+        cache = self._response_cache
+        # the on-disk tier is read and written out of the event loop
+        entry = await asyncio.to_thread(cache.get, key) if cache.persistent else cache.get(key)
+
+        if entry is not None and entry.is_fresh:
+            return entry
+
+        future, is_owner = cache.join(key)
+
+        if not is_owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            response, _ = await self.__send(
+                operation, method, url, self._get_revalidation_headers(headers, entry), params, data)
+
+            if cache.persistent:
+                response = await asyncio.to_thread(self._store_response, operation, key, entry, response)
+            else:
+                response = self._store_response(operation, key, entry, response)
+        except BaseException as e:
+            cache.leave(key, future, error=e)
+            raise
+
+        cache.leave(key, future, response)
+
+        return response
+
+    async def __send(
+            self,
+            operation: str,
+            method: HTTPMethod,
+            url: str,
+            headers: Dict[str, Any] | None,
+            params: Dict[str, Any] | str | None,
+            data: Dict[str, Any] | bytes | None,
+            stream: bool = False) -> Tuple[httpx.Response, Callable[..., None] | None]:
+        """
+        Send the request, retried on rate limits, server errors and rejected guest tokens.
+        With stream, the body of the returned response is read only on demand, except for error responses:
+        the response event is then emitted by the returned callback, given the bytes read from the body.
+        """
+        json_data, body = (None, data) if isinstance(data, bytes) else (data, None)
+
+        if self._is_guest_token_retired(operation):
+            await self.__get_guest_token()
+
+        headers = headers or self.headers
+        attempt = 0
+        # set by a failed attempt, waited at the top of the next one
+        retry_delay: float | None = None
+        guest_token_refreshed = False
+
+        while True:
+            wait_time, wait_reason = self._get_attempt_wait(operation, retry_delay)
+
+            if wait_time > 0:
+                self._emit_wait(operation, wait_time, wait_reason)
+                await asyncio.sleep(wait_time)
+
+            retry_delay = None
+
+            self._emit_request(operation, method, url, attempt)
+            started_at = time.perf_counter()
+
+            try:
+                request = self.__client.build_request(
+                    method.value,
+                    url,
+                    headers=headers,
+                    params=params,
+                    json=json_data,
+                    content=body)
+                response = await self.__client.send(request, stream=stream)
+
+                # the error bodies are small and needed to decide on a retry
+                if stream and not response.is_success:
+                    await response.aread()
+
+            except httpx.TransportError as e:
+                self._emit_response(operation, method, url, attempt, time.perf_counter() - started_at, error=e)
+                retry_delay = self._get_retry_delay(operation, attempt)
+
+                if retry_delay is None:
+                    raise
+
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - started_at
+            streamed = stream and response.is_success
+            guest_token_rejected = not guest_token_refreshed and self._is_guest_token_error(operation, response)
+            # the hooks read the quota of the response, e.g. to bench a rate limited session
+            quota = None if guest_token_rejected else self._update_quota(operation, response)
+
+            if not streamed:
+                self._emit_response(operation, method, url, attempt, elapsed, response, guest_token_rejected=guest_token_rejected)
+
+            self._log_response(method, data, response, response.url, streamed=streamed)
+
+            if guest_token_rejected:
+                logger.warning("%s was rejected with %s, retrying with a new guest token", operation, response.status_code)
+                await response.aclose()
+                self._invalidate_guest_token()
+                await self.__get_guest_token()
+                headers = {**headers, 'x-guest-token': self._headers['x-guest-token']}
+                guest_token_refreshed = True
+                continue
+
+            retry_delay = self._get_retry_delay(operation, attempt, response.status_code, quota)
+
+            if retry_delay is None:
+                emit_response = partial(self._emit_response, operation, method, url, attempt, elapsed, response)
+
+                return response, emit_response if streamed else None
+
+            await response.aclose()
+            attempt += 1
+
+    def __build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self._options.max_connections if self._options else MAX_CONNECTIONS,
+            max_keepalive_connections=self._options.max_keepalive_connections if self._options else MAX_KEEPALIVE_CONNECTIONS)
+
+        proxies = self._options.proxies if self._options else None
+
+        # proxies use the requests format ({'http': url, 'https': url}), httpx needs a transport per scheme
+        mounts: Dict[str, httpx.AsyncBaseTransport | None] | None = {
+            f'{scheme}://': httpx.AsyncHTTPTransport(proxy=proxy_url, limits=limits)
+            for scheme, proxy_url in proxies.items()
+        } if proxies else None
+
+        transport_options = self._options.transport if self._options else None
+
+        if transport_options is None:
+            return httpx.AsyncClient(cookies=self.__cookies, limits=limits, mounts=mounts)
+
+        # the proxied transports are wrapped as well when recording, nothing is sent when replaying
+        transport = build_async_transport(transport_options, httpx.AsyncHTTPTransport(limits=limits))
+        mounts = {
+            pattern: build_async_transport(transport_options, mounted) for pattern, mounted in mounts.items()
+        } if mounts and transport_options.mode == 'record' else None
+
+        return httpx.AsyncClient(cookies=self.__cookies, limits=limits, mounts=mounts, transport=transport)
+
+    async def __get_guest_token(self) -> None:
+        if self._guest_token_pool is not None:
+            # a pre-activated token is returned immediately, the thread only matters when the pool is empty
+            self._set_guest_token_value(await asyncio.to_thread(self._guest_token_pool.acquire))
+            return
+
+        self._prepare_guest_token_request()
+        self._set_guest_token(await self.request(HTTPMethod.POST, self.guest_token_url, model_type=GuestTokenResponseModel))
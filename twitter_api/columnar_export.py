@@ -0,0 +1,268 @@
+"""
+Columnar export of tweets streams: the fields of the tweets are accumulated in typed column buffers and flushed
+as fixed-size record batches, kept in memory or written to an Arrow or Parquet file.
+numpy and pyarrow are optional, installed with the `columnar` extra (`poetry install --extras columnar`):
+without numpy the columns are stdlib arrays, pyarrow is required only to build Arrow batches and to write files.
+"""
+
+import os
+from array import array
+from typing import Any, Dict, Iterable, List, Literal
+
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_compact_models import CompactTweet
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE: int = 64 * 1024
+
+ExportFormat = Literal['arrow', 'parquet']
+
+COUNT_COLUMNS: List[str] = [
+    'view_count', 'bookmark_count', 'favorite_count', 'quote_count', 'reply_count', 'retweet_count'
+]
+FLAG_COLUMNS: List[str] = ['is_retweet', 'favorited', 'bookmarked', 'retweeted']
+# columns holding codes of a dictionary shared by every batch of an exporter
+DICTIONARY_COLUMNS: List[str] = ['lang', 'author_rest_id']
+
+# numpy types of the stdlib array type codes used by the column buffers
+NUMPY_DTYPES: Dict[str, str] = {'q': 'int64', 'i': 'int32', 'b': 'int8'}
+
+
+class TweetRecordBatch:
+    """
+    A batch of tweets in columns: `created_at` is a unix timestamp in seconds, the counts come with a null mask,
+    the dictionary columns hold codes of `dictionaries[name]`
+    """
+
+    num_rows: int
+    columns: Dict[str, Any]
+    null_masks: Dict[str, Any]
+    dictionaries: Dict[str, List[str]]
+
+    def __init__(
+            self,
+            num_rows: int,
+            columns: Dict[str, Any],
+            null_masks: Dict[str, Any],
+            dictionaries: Dict[str, List[str]]) -> None:
+        self.num_rows = num_rows
+        self.columns = columns
+        self.null_masks = null_masks
+        self.dictionaries = dictionaries
+
+    def decode(self, name: str) -> List[str]:
+        dictionary = self.dictionaries[name]
+
+        return [dictionary[code] for code in self.columns[name]]
+
+    def to_arrow(self) -> 'pyarrow.RecordBatch':
+        if pyarrow is None:
+            raise ImportError('pyarrow is required to build Arrow record batches, install the columnar extra')
+
+        arrays: Dict[str, Any] = {
+            'rest_id': pyarrow.array(self.columns['rest_id'], type=pyarrow.string()),
+            'created_at': pyarrow.array(self.columns['created_at'], type=pyarrow.int64()).cast(
+                pyarrow.timestamp('s', tz='UTC')),
+        }
+
+        for name in DICTIONARY_COLUMNS:
+            arrays[name] = pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array(self.columns[name], type=pyarrow.int32()),
+                pyarrow.array(self.dictionaries[name], type=pyarrow.string()))
+
+        for name in COUNT_COLUMNS:
+            arrays[name] = pyarrow.array(
+                self.columns[name], type=pyarrow.int64(), mask=_to_bool_array(self.null_masks[name]))
+
+        for name in FLAG_COLUMNS:
+            arrays[name] = pyarrow.array(_to_bool_array(self.columns[name]), type=pyarrow.bool_())
+
+        if 'content' in self.columns:
+            arrays['content'] = pyarrow.array(self.columns['content'], type=pyarrow.string())
+
+        return pyarrow.RecordBatch.from_arrays(list(arrays.values()), names=list(arrays))
+
+    def to_pandas(self) -> Any:
+        # dictionary columns become categoricals, without a copy of the dictionary per row
+        return self.to_arrow().to_pandas()
+
+
+class TweetColumnarExporter:
+    """
+    Accumulate tweets (pydantic or compact) in column buffers, a batch is flushed every `batch_size` tweets.
+    With a path, batches are written to an Arrow IPC stream or a Parquet file (format inferred from the extension),
+    otherwise they are kept in `batches`.
+    """
+
+    __batch_size: int
+    __include_content: bool
+    __path: str | None
+    __format: ExportFormat
+    __writer: Any = None
+    __rows: int
+    __columns: Dict[str, Any]
+    __null_masks: Dict[str, bytearray]
+    __dictionaries: Dict[str, Dict[str, int]]
+    batches: List[TweetRecordBatch]
+
+    def __init__(
+            self,
+            path: str | None = None,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            include_content: bool = True,
+            export_format: ExportFormat | None = None) -> None:
+        if path is not None and pyarrow is None:
+            raise ImportError('pyarrow is required to write columnar files, install the columnar extra')
+
+        self.__path = path
+        self.__batch_size = batch_size
+        self.__include_content = include_content
+        self.__format = export_format or ('parquet' if path is not None and path.endswith('.parquet') else 'arrow')
+        self.__dictionaries = {name: {} for name in DICTIONARY_COLUMNS}
+        self.batches = []
+        self.__reset_buffers()
+
+    def __enter__(self) -> 'TweetColumnarExporter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add(self, tweet: TwitterTweetModel | CompactTweet) -> None:
+        columns = self.__columns
+
+        columns['rest_id'].append(tweet.rest_id)
+        columns['created_at'].append(
+            tweet.created_at if isinstance(tweet, CompactTweet) else int(tweet.created_at.timestamp()))
+        columns['lang'].append(self.__encode('lang', tweet.lang))
+        columns['author_rest_id'].append(self.__encode('author_rest_id', tweet.author.rest_id))
+
+        for name in COUNT_COLUMNS:
+            value = getattr(tweet, name)
+            columns[name].append(value if value is not None else 0)
+            self.__null_masks[name].append(value is None)
+
+        for name in FLAG_COLUMNS:
+            columns[name].append(getattr(tweet, name))
+
+        if self.__include_content:
+            columns['content'].append(tweet.content)
+
+        self.__rows += 1
+
+        if self.__rows >= self.__batch_size:
+            self.flush()
+
+    def extend(self, tweets: Iterable[TwitterTweetModel | CompactTweet]) -> None:
+        for tweet in tweets:
+            self.add(tweet)
+
+    def flush(self) -> TweetRecordBatch | None:
+        """
+        Turn the buffered tweets into a batch, written to the file when the exporter has a path
+        """
+        if self.__rows == 0:
+            return None
+
+        columns: Dict[str, Any] = {
+            name: _to_numpy(values) for name, values in self.__columns.items()
+        }
+        batch = TweetRecordBatch(
+            num_rows=self.__rows,
+            columns=columns,
+            null_masks={name: _to_numpy(mask, 'bool') for name, mask in self.__null_masks.items()},
+            dictionaries={name: list(dictionary) for name, dictionary in self.__dictionaries.items()}
+        )
+
+        self.__reset_buffers()
+
+        if self.__path is None:
+            self.batches.append(batch)
+        else:
+            self.__write(batch, self.__path)
+
+        return batch
+
+    def close(self) -> None:
+        self.flush()
+
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+
+    def __encode(self, name: str, value: str) -> int:
+        dictionary = self.__dictionaries[name]
+        code = dictionary.get(value)
+
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+
+        return code
+
+    def __reset_buffers(self) -> None:
+        self.__rows = 0
+        self.__columns = {
+            'rest_id': [],
+            'created_at': array('q'),
+            **{name: array('i') for name in DICTIONARY_COLUMNS},
+            **{name: array('q') for name in COUNT_COLUMNS},
+            **{name: array('b') for name in FLAG_COLUMNS},
+        }
+        self.__null_masks = {name: bytearray() for name in COUNT_COLUMNS}
+
+        if self.__include_content:
+            self.__columns['content'] = []
+
+    def __write(self, batch: TweetRecordBatch, path: str) -> None:
+        record_batch = batch.to_arrow()
+
+        if self.__writer is None:
+            directory = os.path.dirname(path)
+
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+            if self.__format == 'parquet':
+                self.__writer = pyarrow.parquet.ParquetWriter(path, record_batch.schema)
+            else:
+                # unlike the file format, the stream format allows the dictionaries to grow from a batch to the next one
+                self.__writer = pyarrow.ipc.new_stream(path, record_batch.schema)
+
+        if self.__format == 'parquet':
+            self.__writer.write_table(pyarrow.Table.from_batches([record_batch]))
+        else:
+            self.__writer.write_batch(record_batch)
+
+        logger.debug('Wrote a batch of %d tweets to %s', batch.num_rows, path)
+
+
+def _to_numpy(values: Any, dtype: str | None = None) -> Any:
+    # the stdlib arrays and the masks are viewed without copy, the string columns stay lists
+    if numpy is None or isinstance(values, list):
+        return values
+
+    if isinstance(values, bytearray):
+        return numpy.frombuffer(values, dtype=dtype or 'uint8')
+
+    return numpy.frombuffer(values, dtype=NUMPY_DTYPES[values.typecode])
+
+
+def _to_bool_array(values: Any) -> Any:
+    if numpy is not None:
+        return numpy.asarray(values, dtype=bool)
+
+    return [bool(value) for value in values]
@@ -1,43 +1,182 @@
+from typing import List
+
 from dependency_injector import containers, providers
 
+from twitter_api.async_twitter_client import AsyncTwitterClient
+from twitter_api.graphql_operations import DEFAULT_GRAPHQL_OPERATION_REGISTRY, GraphQLOperationRegistry
+from twitter_api.guest_token_pool import GuestTokenPool, GuestTokenPoolOptions
+from twitter_api.instrumentation import InstrumentationHooks
+from twitter_api.parse_pool import ParsePool, ParsePoolOptions
+from twitter_api.response_cache import ResponseCache
+from twitter_api.services.async_twitter_api_service import AsyncTwitterAPIService
+from twitter_api.services.modules.auth.session.cookies_cache_service_interface import (
+    CookiesCacheServiceInterface
+)
+from twitter_api.services.modules.auth.async_twitter_auth_api_module import AsyncTwitterAuthAPIModule
 from twitter_api.services.modules.auth.session.local_cookies_cache_service import LocalCookiesCacheService
 from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.store.tweets_store_interface import TweetsStoreInterface
+from twitter_api.services.modules.timeline.async_twitter_home_timeline_api_module import (
+    AsyncTwitterHomeTimelineAPIModule
+)
 from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.tweets.async_twitter_tweets_api_module import AsyncTwitterTweetsAPIModule
 from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.services.pooled_twitter_api_service import PooledTwitterAPIService
 from twitter_api.services.twitter_api_service import TwitterAPIService
+from twitter_api.session_keeper import SessionKeeper, SessionKeeperOptions
 from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+from twitter_api.twitter_client_pool import TwitterAccountCredentials, TwitterClientPool
+
+
+def init_guest_token_pool(options: TwitterClientOptions, pool_options: GuestTokenPoolOptions | None):
+    if pool_options is None:
+        yield None
+        return
+
+    # the activator client is never entered, it only sends standalone guest/activate.json requests
+    with GuestTokenPool(TwitterClient(options).activate_guest_token, pool_options) as guest_token_pool:
+        yield guest_token_pool
+
+
+def init_parse_pool(options: ParsePoolOptions | None):
+    if options is None:
+        yield None
+        return
+
+    with ParsePool(options) as parse_pool:
+        yield parse_pool
+
+
+def init_session_keeper(options: SessionKeeperOptions | None):
+    if options is None:
+        yield None
+        return
+
+    with SessionKeeper(options) as session_keeper:
+        yield session_keeper
 
 
-def init_twitter_client(min_wait_time: int, max_wait_time: int):
+def init_twitter_client(
+        options: TwitterClientOptions,
+        hooks: List[InstrumentationHooks] | None = None,
+        guest_token_pool: GuestTokenPool | None = None,
+        response_cache: ResponseCache | None = None):
     with TwitterClient(
-        TwitterClientOptions(
-            min_wait_time=min_wait_time,
-            max_wait_time=max_wait_time,
-        )
-    ) as twitter_client:
+            options, hooks=hooks, guest_token_pool=guest_token_pool, response_cache=response_cache) as twitter_client:
+        yield twitter_client
+
+
+def init_twitter_client_pool(
+        accounts: List[TwitterAccountCredentials],
+        cookies_cache_service: CookiesCacheServiceInterface,
+        options: TwitterClientOptions,
+        tweets_store: TweetsStoreInterface | None = None,
+        hooks: List[InstrumentationHooks] | None = None,
+        guest_token_pool: GuestTokenPool | None = None,
+        session_keeper: SessionKeeper | None = None,
+        graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY,
+        response_cache: ResponseCache | None = None):
+    # without accounts there is nothing to start, the pooled service is not usable
+    if not accounts:
+        yield None
+        return
+
+    with TwitterClientPool(
+            accounts,
+            cookies_cache_service,
+            options,
+            tweets_store=tweets_store,
+            hooks=hooks,
+            guest_token_pool=guest_token_pool,
+            session_keeper=session_keeper,
+            graphql_operations=graphql_operations,
+            response_cache=response_cache) as twitter_client_pool:
+        yield twitter_client_pool
+
+
+def build_pooled_twitter_api_service(twitter_client_pool: TwitterClientPool | None) -> PooledTwitterAPIService:
+    if twitter_client_pool is None:
+        raise ValueError("The pooled service needs accounts, override twitter_accounts with their credentials")
+
+    return PooledTwitterAPIService(twitter_client_pool)
+
+
+async def init_async_twitter_client(
+        options: TwitterClientOptions,
+        hooks: List[InstrumentationHooks] | None = None,
+        guest_token_pool: GuestTokenPool | None = None,
+        response_cache: ResponseCache | None = None):
+    async with AsyncTwitterClient(
+            options, hooks=hooks, guest_token_pool=guest_token_pool, response_cache=response_cache) as twitter_client:
         yield twitter_client
 
 
 class TwitterContainer(containers.DeclarativeContainer):
-    twitter_client = providers.Resource(init_twitter_client, min_wait_time=1, max_wait_time=2)
+    twitter_client_options = providers.Singleton(TwitterClientOptions)
+
+    # override with a list of InstrumentationHooks, e.g. [MetricsCollector()], to observe every request
+    instrumentation_hooks: providers.Object[List[InstrumentationHooks]] = providers.Object([])
+
+    # override with GraphQLOperationRegistry(path) to load query ids and features from a hot reloaded file
+    graphql_operations = providers.Object(DEFAULT_GRAPHQL_OPERATION_REGISTRY)
+
+    # override with providers.Object(GuestTokenPoolOptions()) to share pre-activated guest tokens between the clients,
+    # refreshed in background; otherwise every client activates its own guest token when it starts
+    guest_token_pool_options: providers.Object[GuestTokenPoolOptions | None] = providers.Object(None)
+
+    guest_token_pool = providers.Resource(
+        init_guest_token_pool,
+        options=twitter_client_options,
+        pool_options=guest_token_pool_options
+    )
+
+    # override with a ResponseCache to serve repeated reads (home timeline pages, Viewer) without a request
+    response_cache: providers.Object[ResponseCache | None] = providers.Object(None)
+
+    twitter_client = providers.Resource(
+        init_twitter_client,
+        options=twitter_client_options,
+        hooks=instrumentation_hooks,
+        guest_token_pool=guest_token_pool,
+        response_cache=response_cache
+    )
 
     cookie_cache_service = providers.Singleton(LocalCookiesCacheService)
 
+    # override with a TweetsStoreInterface implementation, e.g. SqliteTweetsStore, to persist the streamed tweets
+    tweets_store: providers.Object[TweetsStoreInterface | None] = providers.Object(None)
+
+    # override with providers.Object(SessionKeeperOptions()) to refresh the cookies of the authenticated sessions
+    # in background before they expire
+    session_keeper_options: providers.Object[SessionKeeperOptions | None] = providers.Object(None)
+
+    session_keeper = providers.Resource(
+        init_session_keeper,
+        options=session_keeper_options
+    )
+
     twitter_auth_api_module = providers.Singleton(
         TwitterAuthAPIModule,
         twitter_client=twitter_client,
-        cookies_cache_service=cookie_cache_service
+        cookies_cache_service=cookie_cache_service,
+        session_keeper=session_keeper,
+        graphql_operations=graphql_operations
     )
 
     twitter_tweets_api_module = providers.Singleton(
         TwitterTweetsAPIModule,
-        twitter_client=twitter_client
+        twitter_client=twitter_client,
+        graphql_operations=graphql_operations
     )
 
     twitter_home_timeline_api_module = providers.Singleton(
         TwitterHomeTimelineAPIModule,
         twitter_client=twitter_client,
-        twitter_tweets_api_module=twitter_tweets_api_module
+        twitter_tweets_api_module=twitter_tweets_api_module,
+        timeline_parser=twitter_client_options.provided.timeline_parser,
+        tweets_store=tweets_store,
+        graphql_operations=graphql_operations
     )
 
     twitter_api_service = providers.Singleton(
@@ -46,3 +185,96 @@ class TwitterContainer(containers.DeclarativeContainer):
         twitter_tweets_api_module=twitter_tweets_api_module,
         twitter_home_timeline_api_module=twitter_home_timeline_api_module
     )
+
+    # override with the list of TwitterAccountCredentials to spread the calls across many accounts,
+    # the client pool and the pooled service are only started with accounts
+    twitter_accounts: providers.Object[List[TwitterAccountCredentials]] = providers.Object([])
+
+    twitter_client_pool = providers.Resource(
+        init_twitter_client_pool,
+        accounts=twitter_accounts,
+        cookies_cache_service=cookie_cache_service,
+        options=twitter_client_options,
+        tweets_store=tweets_store,
+        hooks=instrumentation_hooks,
+        guest_token_pool=guest_token_pool,
+        session_keeper=session_keeper,
+        graphql_operations=graphql_operations,
+        response_cache=response_cache
+    )
+
+    # override with providers.Object(ParsePoolOptions()) to start the worker processes parsing the pages
+    # of get_home_timeline_parsed_stream and crawl_home_timelines
+    parse_pool_options: providers.Object[ParsePoolOptions | None] = providers.Object(None)
+
+    parse_pool = providers.Resource(
+        init_parse_pool,
+        options=parse_pool_options
+    )
+
+    pooled_twitter_api_service = providers.Singleton(
+        build_pooled_twitter_api_service,
+        twitter_client_pool=twitter_client_pool
+    )
+
+
+# async resources live in their own container: init_resources() must be awaited when any resource is async
+class AsyncTwitterContainer(containers.DeclarativeContainer):
+    twitter_client_options = providers.Singleton(TwitterClientOptions)
+
+    instrumentation_hooks: providers.Object[List[InstrumentationHooks]] = providers.Object([])
+
+    graphql_operations = providers.Object(DEFAULT_GRAPHQL_OPERATION_REGISTRY)
+
+    # override with providers.Object(GuestTokenPoolOptions()) to share pre-activated guest tokens between the clients,
+    # refreshed in background; otherwise every client activates its own guest token when it starts
+    guest_token_pool_options: providers.Object[GuestTokenPoolOptions | None] = providers.Object(None)
+
+    guest_token_pool = providers.Resource(
+        init_guest_token_pool,
+        options=twitter_client_options,
+        pool_options=guest_token_pool_options
+    )
+
+    response_cache: providers.Object[ResponseCache | None] = providers.Object(None)
+
+    twitter_client = providers.Resource(
+        init_async_twitter_client,
+        options=twitter_client_options,
+        hooks=instrumentation_hooks,
+        guest_token_pool=guest_token_pool,
+        response_cache=response_cache
+    )
+
+    cookie_cache_service = providers.Singleton(LocalCookiesCacheService)
+
+    tweets_store: providers.Object[TweetsStoreInterface | None] = providers.Object(None)
+
+    twitter_auth_api_module = providers.Singleton(
+        AsyncTwitterAuthAPIModule,
+        twitter_client=twitter_client,
+        cookies_cache_service=cookie_cache_service,
+        graphql_operations=graphql_operations
+    )
+
+    twitter_tweets_api_module = providers.Singleton(
+        AsyncTwitterTweetsAPIModule,
+        twitter_client=twitter_client,
+        graphql_operations=graphql_operations
+    )
+
+    twitter_home_timeline_api_module = providers.Singleton(
+        AsyncTwitterHomeTimelineAPIModule,
+        twitter_client=twitter_client,
+        twitter_tweets_api_module=twitter_tweets_api_module,
+        timeline_parser=twitter_client_options.provided.timeline_parser,
+        tweets_store=tweets_store,
+        graphql_operations=graphql_operations
+    )
+
+    twitter_api_service = providers.Singleton(
+        AsyncTwitterAPIService,
+        twitter_auth_api_module=twitter_auth_api_module,
+        twitter_tweets_api_module=twitter_tweets_api_module,
+        twitter_home_timeline_api_module=twitter_home_timeline_api_module
+    )
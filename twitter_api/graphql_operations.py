@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+from http import HTTPMethod
+from typing import Any, Dict, Tuple
+
+from pydantic import BaseModel, PrivateAttr
+
+from twitter_api.graphql_payload import GraphQLPayload
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_home_timeline_models import TwitterHomeTimelineRequestModel
+from twitter_api.models.twitter_tweets_models import Features, FieldToggles
+
+logger = get_logger(__name__)
+
+HOME_TIMELINE_OPERATION: str = 'HomeTimeline'
+CREATE_TWEET_OPERATION: str = 'CreateTweet'
+FAVORITE_TWEET_OPERATION: str = 'FavoriteTweet'
+VIEWER_OPERATION: str = 'Viewer'
+
+# version of the operations file format supported by this release
+GRAPHQL_OPERATIONS_FILE_VERSION: int = 1
+
+# seconds between two checks of the operations file for changes
+DEFAULT_RELOAD_INTERVAL: float = 5
+
+# modification time in nanoseconds and size of the operations file
+FileVersion = Tuple[int, int]
+
+
+class GraphQLOperation(BaseModel):
+    """
+    Definition of a GraphQL operation of the web client, the static parts of its requests are encoded on first use
+    """
+    name: str
+    query_id: str
+    method: HTTPMethod = HTTPMethod.POST
+    features: Dict[str, Any] | None = None
+    field_toggles: Dict[str, Any] | None = None
+
+    _payload: GraphQLPayload | None = PrivateAttr(default=None)
+
+    @property
+    def payload(self) -> GraphQLPayload:
+        if self._payload is None:
+            self._payload = GraphQLPayload(self.query_id, self.features, self.field_toggles)
+
+        return self._payload
+
+    def build_url(self, gql_url: str) -> str:
+        return f'{gql_url}/{self.query_id}/{self.name}'
+
+    def build_body(self, variables: Dict[str, Any]) -> bytes:
+        return self.payload.build_body(variables)
+
+    def build_params(self, variables: Dict[str, Any]) -> str:
+        return self.payload.build_params(variables)
+
+
+class GraphQLOperationsFileModel(BaseModel):
+    """
+    Content of an operations file, operations are keyed by name and the name may be omitted in the definitions
+    """
+    version: int
+    operations: Dict[str, Dict[str, Any]]
+
+
+DEFAULT_GRAPHQL_OPERATIONS: Dict[str, GraphQLOperation] = {
+    operation.name: operation for operation in [
+        GraphQLOperation(
+            name=HOME_TIMELINE_OPERATION,
+            query_id='W4Tpu1uueTGK53paUgxF0Q',
+            features=TwitterHomeTimelineRequestModel.FeaturesModel().model_dump(),
+            field_toggles=TwitterHomeTimelineRequestModel.FieldTogglesModel().model_dump()
+        ),
+        GraphQLOperation(
+            name=CREATE_TWEET_OPERATION,
+            query_id='SoVnbfCycZ7fERGCwpZkYA',
+            features=Features().model_dump(),
+            field_toggles=FieldToggles().model_dump()
+        ),
+        GraphQLOperation(
+            name=FAVORITE_TWEET_OPERATION,
+            query_id='lI07N6Otwv1PhnEgXILM7A'
+        ),
+        GraphQLOperation(
+            name=VIEWER_OPERATION,
+            query_id='5wNTkTJmk8GZlJmd2rL7eQ',
+            method=HTTPMethod.GET,
+            features={
+                "responsive_web_graphql_exclude_directive_enabled": True,
+                "verified_phone_label_enabled": False,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+                "responsive_web_graphql_timeline_navigation_enabled": True
+            },
+            field_toggles={
+                "withAuxiliaryUserLabels": False
+            }
+        )
+    ]
+}
+
+
+class GraphQLOperationRegistry:
+    """
+    Query ids, feature flags and field toggles of the GraphQL operations, every api module looks its operations up here.
+    The definitions of an operations file override the defaults, the file is checked for changes at most every
+    `reload_interval` seconds, so a rotation of the query ids only requires to edit the file.
+    An invalid file is ignored and the previous definitions are kept.
+    """
+
+    __path: str | None
+    __reload_interval: float
+    __operations: Dict[str, GraphQLOperation]
+    __file_version: FileVersion | None = None
+    __checked_at: float = 0
+    __lock: threading.Lock
+
+    def __init__(self, path: str | None = None, reload_interval: float = DEFAULT_RELOAD_INTERVAL) -> None:
+        self.__path = path
+        self.__reload_interval = reload_interval
+        self.__operations = dict(DEFAULT_GRAPHQL_OPERATIONS)
+        self.__lock = threading.Lock()
+
+        if path is not None:
+            self.reload()
+
+    @property
+    def path(self) -> str | None:
+        return self.__path
+
+    @property
+    def operations(self) -> Dict[str, GraphQLOperation]:
+        self.__reload_if_due()
+
+        return dict(self.__operations)
+
+    def get(self, name: str) -> GraphQLOperation:
+        self.__reload_if_due()
+
+        return self.__operations[name]
+
+    def reload(self) -> bool:
+        """
+        Load the operations file if it changed since the last load, returns whether the definitions changed
+        """
+        if self.__path is None:
+            return False
+
+        with self.__lock:
+            self.__checked_at = time.monotonic()
+
+            try:
+                stat = os.stat(self.__path)
+            except FileNotFoundError:
+                logger.warning('GraphQL operations file %s not found, keeping the current operations', self.__path)
+                return False
+
+            file_version = (stat.st_mtime_ns, stat.st_size)
+
+            if file_version == self.__file_version:
+                return False
+
+            operations = self.__load_operations(self.__path)
+            self.__file_version = file_version
+
+            if operations is None:
+                return False
+
+            self.__operations = {**DEFAULT_GRAPHQL_OPERATIONS, **operations}
+
+        logger.info('Loaded %d GraphQL operations from %s', len(operations), self.__path)
+
+        return True
+
+    def save(self, path: str) -> None:
+        """
+        Write the current definitions in an operations file, a starting point to edit when query ids are rotated
+        """
+        content = GraphQLOperationsFileModel(
+            version=GRAPHQL_OPERATIONS_FILE_VERSION,
+            operations={
+                name: operation.model_dump(mode='json', exclude={'name'}) for name, operation in self.operations.items()
+            }
+        )
+
+        with open(path, 'w') as f:
+            json.dump(content.model_dump(), f, indent=2)
+
+    def __reload_if_due(self) -> None:
+        if self.__path is not None and time.monotonic() - self.__checked_at >= self.__reload_interval:
+            self.reload()
+
+    @staticmethod
+    def __load_operations(path: str) -> Dict[str, GraphQLOperation] | None:
+        try:
+            with open(path, 'rb') as f:
+                content = GraphQLOperationsFileModel.model_validate(json.load(f))
+
+            if content.version > GRAPHQL_OPERATIONS_FILE_VERSION:
+                logger.error('GraphQL operations file %s has an unsupported version %d', path, content.version)
+                return None
+
+            return {
+                name: GraphQLOperation.model_validate({**definition, 'name': name})
+                for name, definition in content.operations.items()
+            }
+        except (OSError, ValueError) as e:
+            logger.error('Invalid GraphQL operations file %s, keeping the current operations: %s', path, e)
+            return None
+
+
+# shared by the api modules created without a registry, GRAPHQL_OPERATIONS_FILE sets its operations file
+DEFAULT_GRAPHQL_OPERATION_REGISTRY = GraphQLOperationRegistry(os.getenv('GRAPHQL_OPERATIONS_FILE'))
@@ -0,0 +1,73 @@
+import json
+from typing import Any, Dict
+from urllib.parse import urlencode
+
+# compact separators, the encoded bodies are never read by humans
+JSON_SEPARATORS = (',', ':')
+
+
+def encode_json(value: Any) -> str:
+    return json.dumps(value, separators=JSON_SEPARATORS)
+
+
+class GraphQLPayload:
+    """
+    Request of a GraphQL operation whose static parts (features, field toggles and query id) are encoded once,
+    only the variables are encoded for each request
+    """
+
+    __query_id: str
+    __features: Dict[str, Any] | None
+    __field_toggles: Dict[str, Any] | None
+    __body_suffix: bytes
+    __params_suffix: str
+
+    def __init__(
+            self,
+            query_id: str,
+            features: Dict[str, Any] | None = None,
+            field_toggles: Dict[str, Any] | None = None) -> None:
+        self.__query_id = query_id
+        self.__features = features
+        self.__field_toggles = field_toggles
+
+        static_parts: Dict[str, Any] = {}
+
+        if features is not None:
+            static_parts['features'] = features
+
+        if field_toggles is not None:
+            static_parts['fieldToggles'] = field_toggles
+
+        static_parts['queryId'] = query_id
+
+        # the static members of the body object, appended after the variables
+        self.__body_suffix = f',{encode_json(static_parts)[1:]}'.encode()
+        self.__params_suffix = urlencode(
+            {key: encode_json(value) for key, value in static_parts.items() if key != 'queryId'})
+
+    @property
+    def query_id(self) -> str:
+        return self.__query_id
+
+    @property
+    def features(self) -> Dict[str, Any] | None:
+        return self.__features
+
+    @property
+    def field_toggles(self) -> Dict[str, Any] | None:
+        return self.__field_toggles
+
+    def build_body(self, variables: Dict[str, Any]) -> bytes:
+        """
+        JSON body of a POST request, ready to be sent
+        """
+        return b'{"variables":' + encode_json(variables).encode() + self.__body_suffix
+
+    def build_params(self, variables: Dict[str, Any]) -> str:
+        """
+        Query string of a GET request, the variables, features and field toggles are json encoded
+        """
+        variables_param = urlencode({'variables': encode_json(variables)})
+
+        return f'{variables_param}&{self.__params_suffix}' if self.__params_suffix else variables_param
@@ -0,0 +1,181 @@
+import threading
+import time
+from typing import Callable, Dict, List
+
+from pydantic import BaseModel
+
+from twitter_api.logger import get_logger
+
+logger = get_logger(__name__)
+
+GuestTokenActivator = Callable[[], str]
+
+
+class GuestTokenPoolOptions(BaseModel):
+    # pre-activated tokens kept ready
+    size: int = 2
+    # guest tokens seem to expire after about 3 hours, they are retired earlier
+    max_age: float = 2 * 60 * 60
+    # retire a token after this many requests were sent with it, None for no limit
+    max_uses: int | None = None
+    # seconds between two checks of the background refresh
+    refresh_interval: float = 60
+    # seconds to wait before activating again after a failure
+    retry_interval: float = 30
+
+
+class GuestToken(BaseModel):
+    value: str
+    activated_at: float
+    # requests sent with the token, counted by GuestTokenPool.is_valid
+    uses: int = 0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.activated_at
+
+    def is_valid(self, options: GuestTokenPoolOptions) -> bool:
+        return self.age < options.max_age and (options.max_uses is None or self.uses < options.max_uses)
+
+
+class GuestTokenPool:
+    """
+    Pool of pre-activated guest tokens shared between clients. A background thread keeps `size` valid tokens,
+    so that clients get a token without waiting for guest/activate.json at startup or after a token was rejected.
+    """
+
+    __activate: GuestTokenActivator
+    __options: GuestTokenPoolOptions
+    __tokens: Dict[str, GuestToken]
+    __lock: threading.Condition
+    __activating: bool = False
+    __refill: threading.Event
+    __stop: threading.Event
+    __thread: threading.Thread | None = None
+
+    def __init__(self, activate: GuestTokenActivator, options: GuestTokenPoolOptions | None = None) -> None:
+        self.__activate = activate
+        self.__options = options or GuestTokenPoolOptions()
+        self.__tokens = {}
+        self.__lock = threading.Condition()
+        self.__refill = threading.Event()
+        self.__stop = threading.Event()
+
+    def __enter__(self) -> 'GuestTokenPool':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    @property
+    def tokens(self) -> List[GuestToken]:
+        with self.__lock:
+            return [token.model_copy() for token in self.__tokens.values()]
+
+    def start(self) -> None:
+        if self.__thread is not None:
+            return
+
+        self.__stop.clear()
+        # the first fill starts right away, early acquire() calls wait for it
+        self.__activating = self.__options.size > 0
+        self.__thread = threading.Thread(target=self.__run, name='guest-token-pool', daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        if self.__thread is None:
+            return
+
+        self.__stop.set()
+        self.__refill.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def acquire(self) -> str:
+        """
+        Get the least used valid token, a token is activated synchronously only when the pool is empty
+        """
+        with self.__lock:
+            self.__retire_tokens()
+
+            if not self.__tokens and self.__activating:
+                # a token is being activated in background, it is faster than starting another activation
+                self.__lock.wait_for(lambda: self.__tokens or not self.__activating)
+
+            token = min(self.__tokens.values(), key=lambda candidate: candidate.uses, default=None)
+            needs_refill = len(self.__tokens) < self.__options.size
+
+        if token is None:
+            logger.info('Guest token pool is empty, activating a token')
+
+            token = self.__add_token(self.__activate())
+
+        if self.__thread is not None and needs_refill:
+            self.__refill.set()
+
+        return token.value
+
+    def is_valid(self, value: str) -> bool:
+        """
+        Whether a request can be sent with the token, every call counts as a use of a valid token
+        """
+        with self.__lock:
+            token = self.__tokens.get(value)
+
+            if token is None or not token.is_valid(self.__options):
+                return False
+
+            token.uses += 1
+
+            return True
+
+    def invalidate(self, value: str) -> None:
+        """
+        Remove a token rejected by the server, a new one is activated in background
+        """
+        with self.__lock:
+            self.__tokens.pop(value, None)
+
+        self.__refill.set()
+
+    def __add_token(self, value: str) -> GuestToken:
+        token = GuestToken(value=value, activated_at=time.time())
+
+        with self.__lock:
+            self.__tokens[value] = token
+            self.__lock.notify_all()
+
+        return token
+
+    def __retire_tokens(self) -> None:
+        for value in [value for value, token in self.__tokens.items() if not token.is_valid(self.__options)]:
+            logger.debug('Retiring guest token activated %.0f seconds ago', self.__tokens[value].age)
+            del self.__tokens[value]
+
+    def __run(self) -> None:
+        interval = 0.0
+
+        while not self.__stop.is_set():
+            self.__refill.wait(interval)
+            self.__refill.clear()
+            interval = self.__options.refresh_interval
+
+            with self.__lock:
+                self.__retire_tokens()
+                missing = self.__options.size - len(self.__tokens)
+                self.__activating = missing > 0
+
+            try:
+                for _ in range(missing):
+                    if self.__stop.is_set():
+                        return
+
+                    self.__add_token(self.__activate())
+            except Exception as e:
+                logger.warning('Failed to activate a guest token: %r', e)
+                interval = self.__options.retry_interval
+            finally:
+                with self.__lock:
+                    self.__activating = False
+                    self.__lock.notify_all()
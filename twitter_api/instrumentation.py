@@ -0,0 +1,206 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Literal, Tuple
+
+from pydantic import BaseModel
+
+from twitter_api.logger import get_logger
+
+logger = get_logger(__name__)
+
+WaitReason = Literal['rate_limit', 'retry']
+
+# upper bounds in seconds, an implicit +Inf bucket follows the last one
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestEvent(BaseModel):
+    """
+    A request about to be sent, attempt is 0 for the first try and is increased by every retry
+    """
+    operation: str
+    method: str
+    url: str
+    attempt: int
+
+
+class ResponseEvent(BaseModel):
+    """
+    The outcome of a single attempt, status_code is None when the request failed with a connection error
+    """
+    operation: str
+    method: str
+    url: str
+    attempt: int
+    status_code: int | None
+    elapsed: float
+    bytes_received: int = 0
+    error: str | None = None
+    # the guest token was rejected, the request is sent again with a new one: the session is still authorized
+    guest_token_rejected: bool = False
+
+
+class InstrumentationHooks:
+    """
+    Base class of the instrumentation hooks invoked by the twitter clients, every hook is a no-op
+    so that implementations override only what they need.
+    Hooks run in the thread (or event loop) of the request, keep them fast.
+    """
+
+    def on_request(self, event: RequestEvent) -> None:
+        pass
+
+    def on_response(self, event: ResponseEvent) -> None:
+        pass
+
+    def on_wait(self, operation: str, seconds: float, reason: WaitReason) -> None:
+        pass
+
+    def on_deserialize(self, operation: str, seconds: float) -> None:
+        pass
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, in the prometheus format
+    """
+
+    buckets: Tuple[float, ...]
+    counts: List[int]
+    sum: float = 0
+    count: int = 0
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets: Dict[str, int] = {}
+
+        for upper_bound, count in zip([*map(str, self.buckets), '+Inf'], self.counts):
+            cumulative += count
+            buckets[upper_bound] = cumulative
+
+        return {'buckets': buckets, 'sum': self.sum, 'count': self.count}
+
+
+class MetricsCollector(InstrumentationHooks):
+    """
+    Built-in hooks collecting per operation metrics: latency and deserialization histograms, bytes received,
+    time spent waiting for the rate limiter or before a retry and responses by status code.
+    Export them with snapshot() or to_prometheus(). Thread safe, a collector can be shared between clients.
+    """
+
+    __buckets: Tuple[float, ...]
+    __latency: Dict[str, Histogram]
+    __deserialization: Dict[str, Histogram]
+    __bytes_received: Dict[str, int]
+    __wait_time: Dict[Tuple[str, WaitReason], float]
+    __responses: Dict[Tuple[str, str], int]
+    __lock: threading.Lock
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.__buckets = buckets
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__latency = {}
+            self.__deserialization = {}
+            self.__bytes_received = {}
+            self.__wait_time = {}
+            self.__responses = {}
+
+    def on_response(self, event: ResponseEvent) -> None:
+        status = str(event.status_code) if event.status_code is not None else 'error'
+
+        with self.__lock:
+            self.__histogram(self.__latency, event.operation).observe(event.elapsed)
+            self.__bytes_received[event.operation] = self.__bytes_received.get(event.operation, 0) + event.bytes_received
+            self.__responses[(event.operation, status)] = self.__responses.get((event.operation, status), 0) + 1
+
+    def on_wait(self, operation: str, seconds: float, reason: WaitReason) -> None:
+        with self.__lock:
+            self.__wait_time[(operation, reason)] = self.__wait_time.get((operation, reason), 0) + seconds
+
+    def on_deserialize(self, operation: str, seconds: float) -> None:
+        with self.__lock:
+            self.__histogram(self.__deserialization, operation).observe(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Metrics grouped by operation
+        """
+        with self.__lock:
+            operations = set(self.__latency) | set(self.__deserialization) | {operation for operation, _ in self.__wait_time}
+            snapshot: Dict[str, Dict[str, Any]] = {}
+
+            for operation in sorted(operations):
+                latency = self.__latency.get(operation)
+                deserialization = self.__deserialization.get(operation)
+
+                snapshot[operation] = {
+                    'latency': latency.snapshot() if latency else None,
+                    'deserialization': deserialization.snapshot() if deserialization else None,
+                    'bytes_received': self.__bytes_received.get(operation, 0),
+                    'wait_time': {reason: seconds for (name, reason), seconds in self.__wait_time.items() if name == operation},
+                    'responses': {status: count for (name, status), count in self.__responses.items() if name == operation},
+                }
+
+            return snapshot
+
+    def to_prometheus(self, prefix: str = 'twitter_api') -> str:
+        """
+        Metrics in the prometheus text exposition format
+        """
+        lines: List[str] = []
+        snapshot = self.snapshot()
+
+        for metric, help_text in (('request_duration_seconds', 'Latency of the requests'),
+                                  ('deserialization_duration_seconds', 'Time spent deserializing the responses')):
+            key = 'latency' if metric == 'request_duration_seconds' else 'deserialization'
+            lines += [f'# HELP {prefix}_{metric} {help_text}', f'# TYPE {prefix}_{metric} histogram']
+
+            for operation, metrics in snapshot.items():
+                histogram = metrics[key]
+
+                if histogram is None:
+                    continue
+
+                for upper_bound, count in histogram['buckets'].items():
+                    lines.append(f'{prefix}_{metric}_bucket{{operation="{operation}",le="{upper_bound}"}} {count}')
+
+                lines.append(f'{prefix}_{metric}_sum{{operation="{operation}"}} {histogram["sum"]}')
+                lines.append(f'{prefix}_{metric}_count{{operation="{operation}"}} {histogram["count"]}')
+
+        lines += [f'# HELP {prefix}_received_bytes_total Bytes of the response bodies',
+                  f'# TYPE {prefix}_received_bytes_total counter']
+        lines += [f'{prefix}_received_bytes_total{{operation="{operation}"}} {metrics["bytes_received"]}'
+                  for operation, metrics in snapshot.items()]
+
+        lines += [f'# HELP {prefix}_wait_seconds_total Time spent sleeping before sending the requests',
+                  f'# TYPE {prefix}_wait_seconds_total counter']
+        lines += [f'{prefix}_wait_seconds_total{{operation="{operation}",reason="{reason}"}} {seconds}'
+                  for operation, metrics in snapshot.items() for reason, seconds in metrics['wait_time'].items()]
+
+        lines += [f'# HELP {prefix}_responses_total Responses by status code, error for connection errors',
+                  f'# TYPE {prefix}_responses_total counter']
+        lines += [f'{prefix}_responses_total{{operation="{operation}",status="{status}"}} {count}'
+                  for operation, metrics in snapshot.items() for status, count in metrics['responses'].items()]
+
+        return '\n'.join(lines) + '\n'
+
+    def __histogram(self, histograms: Dict[str, Histogram], operation: str) -> Histogram:
+        histogram = histograms.get(operation)
+
+        if histogram is None:
+            histogram = histograms[operation] = Histogram(self.__buckets)
+
+        return histogram
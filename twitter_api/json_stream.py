@@ -0,0 +1,225 @@
+"""
+Incremental decoding of the items of a json array from a response body read chunk by chunk: only the current item
+and the unread part of the last chunk are held in memory, and each item is available as soon as its last byte
+is received. The array is the first one found under the given key, e.g. the entries of a timeline, which come
+before any user content in the timeline responses.
+The end of an object or array item is found by scanning its brackets and strings once, the scan resumes where
+the previous chunk stopped: an item is decoded a single time, whatever the number of chunks it spans.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncGenerator, AsyncIterable, Generator, Iterable, List
+
+# whitespace allowed between json tokens
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# bytes kept from a chunk without the array key, in case the key is split between two chunks
+_KEY_LOOKBEHIND: int = 256
+# characters changing the nesting of an item, and ending or escaping inside a string
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class JsonArrayStreamDecoder:
+    """
+    Feed the chunks of a json document, feed() returns the items of the array completed by the chunk.
+    close() raises ValueError when the document ended in the middle of the array.
+    """
+
+    __key_pattern: re.Pattern
+    __decoder: json.JSONDecoder
+    __text_decoder: codecs.IncrementalDecoder
+    __buffer: str
+    __found: bool
+    __done: bool
+    # scan state of the incomplete item at the start of the buffer: position reached, depth and string state
+    __scan_position: int = 0
+    __scan_depth: int = 0
+    __scan_in_string: bool = False
+
+    def __init__(self, key: str) -> None:
+        self.__key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.__decoder = json.JSONDecoder()
+        self.__text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.__buffer = ''
+        self.__found = False
+        self.__done = False
+
+    @property
+    def found(self) -> bool:
+        """
+        Whether the array was found in the document, a response without it is e.g. an error payload
+        """
+        return self.__found
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the end of the array was reached, the rest of the document does not need to be read
+        """
+        return self.__done
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        if self.__done:
+            return []
+
+        self.__buffer += self.__text_decoder.decode(chunk)
+
+        return self.__decode_items(final=False)
+
+    def close(self) -> List[Any]:
+        if self.__done:
+            return []
+
+        self.__buffer += self.__text_decoder.decode(b'', final=True)
+        items = self.__decode_items(final=True)
+
+        if self.__found and not self.__done:
+            raise ValueError('Truncated json document: the end of the array was not received')
+
+        return items
+
+    def __decode_items(self, final: bool) -> List[Any]:
+        buffer = self.__buffer
+
+        if not self.__found:
+            match = self.__key_pattern.search(buffer)
+
+            if match is None:
+                self.__buffer = buffer[-_KEY_LOOKBEHIND:]
+                return []
+
+            self.__found = True
+            buffer = buffer[match.end():]
+
+        items: List[Any] = []
+        position = _WHITESPACE.match(buffer, 0).end()
+        buffer_length = len(buffer)
+
+        while position < buffer_length:
+            if buffer[position] == ']':
+                self.__done = True
+                position += 1
+                break
+
+            if buffer[position] == ',':
+                position = _WHITESPACE.match(buffer, position + 1).end()
+
+                if position == buffer_length:
+                    break
+
+            if buffer[position] in '{[' and not final:
+                if self.__scan_item(buffer, position) is None:
+                    break
+
+                # the item is complete, an invalid one raises
+                item, end = self.__decoder.raw_decode(buffer, position)
+            else:
+                try:
+                    item, end = self.__decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # the item is not complete yet, unless the document ended
+                    if final:
+                        raise
+                    break
+
+            # a number ending the buffer may continue in the next chunk, e.g. its fraction or its exponent
+            if not final and not isinstance(item, (dict, list, str)) \
+                    and (end == buffer_length or buffer[end] in '.eE'):
+                break
+
+            items.append(item)
+            position = _WHITESPACE.match(buffer, end).end()
+
+        self.__buffer = buffer[position:]
+
+        return items
+
+    def __scan_item(self, buffer: str, start: int) -> int | None:
+        """
+        End of the object or array starting at `start`, None when it is not complete yet.
+        The scan state is kept for the next chunk, `start` stays the start of the item until it completes.
+        """
+        position = start + self.__scan_position
+        depth = self.__scan_depth
+        in_string = self.__scan_in_string
+        end: int | None = None
+
+        while True:
+            if in_string:
+                match = _STRING_SPECIAL.search(buffer, position)
+
+                if match is None:
+                    position = len(buffer)
+                    break
+
+                if match.group() == '\\':
+                    if match.end() == len(buffer):
+                        # the escaped character is in the next chunk
+                        position = match.start()
+                        break
+
+                    position = match.end() + 1
+                    continue
+
+                in_string = False
+                position = match.end()
+                continue
+
+            match = _STRUCTURAL.search(buffer, position)
+
+            if match is None:
+                position = len(buffer)
+                break
+
+            character = match.group()
+            position = match.end()
+
+            if character == '"':
+                in_string = True
+            elif character in '{[':
+                depth += 1
+            else:
+                depth -= 1
+
+                if depth == 0:
+                    end = position
+                    break
+
+        if end is not None:
+            self.__scan_position, self.__scan_depth, self.__scan_in_string = 0, 0, False
+        else:
+            self.__scan_position, self.__scan_depth, self.__scan_in_string = position - start, depth, in_string
+
+        return end
+
+
+def iter_json_array_items(chunks: Iterable[bytes], key: str) -> Generator[Any, None, None]:
+    """
+    Yield the items of the first array under `key` while the chunks are read, the remaining chunks are not read
+    once the array is complete
+    """
+    decoder = JsonArrayStreamDecoder(key)
+
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+
+        if decoder.done:
+            return
+
+    yield from decoder.close()
+
+
+async def aiter_json_array_items(chunks: AsyncIterable[bytes], key: str) -> AsyncGenerator[Any, None]:
+    decoder = JsonArrayStreamDecoder(key)
+
+    async for chunk in chunks:
+        for item in decoder.feed(chunk):
+            yield item
+
+        if decoder.done:
+            return
+
+    for item in decoder.close():
+        yield item
@@ -1,19 +1,128 @@
+import json
 import logging
 import os
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, Literal, Set
 
+LogFormat = Literal['text', 'json']
 
-def get_logger(name: str):
-    log_level = os.environ.get('LOG_LEVEL', logging.INFO)
+ROOT_LOGGER_NAME = 'twitter_api'
 
+DEFAULT_TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_BODY_EXCERPT_SIZE = 512
+
+# attributes of every LogRecord, anything else was passed with `extra` and is a structured field
+_RECORD_ATTRIBUTES: Set[str] = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_lock = threading.Lock()
+_configured_loggers: Set[str] = set()
+_body_excerpt_size: int = DEFAULT_BODY_EXCERPT_SIZE
+_body_sample_rate: float = 1.0
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One json object per line, the fields passed with `extra` are added to the object
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(
+        level: int | str | None = None,
+        log_format: LogFormat | None = None,
+        stream: IO[str] | None = None,
+        body_excerpt_size: int | None = None,
+        body_sample_rate: float | None = None) -> logging.Logger:
+    """
+    Configure the handler of the package loggers, calling it again replaces the previous configuration.
+    Defaults come from the LOG_LEVEL, LOG_FORMAT ('text' or 'json'), LOG_BODY_EXCERPT_SIZE
+    and LOG_BODY_SAMPLE_RATE environment variables.
+    Response bodies are logged at debug level only, as an excerpt of at most `body_excerpt_size` bytes
+    for a `body_sample_rate` fraction of the responses.
+    """
+    global _body_excerpt_size, _body_sample_rate
+
+    with _lock:
+        _body_excerpt_size = body_excerpt_size if body_excerpt_size is not None else \
+            int(os.environ.get('LOG_BODY_EXCERPT_SIZE', DEFAULT_BODY_EXCERPT_SIZE))
+        _body_sample_rate = body_sample_rate if body_sample_rate is not None else \
+            float(os.environ.get('LOG_BODY_SAMPLE_RATE', 1.0))
+
+        _configured_loggers.discard(ROOT_LOGGER_NAME)
+
+        return _configure_logger(ROOT_LOGGER_NAME, level, log_format, stream)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a logger, the loggers of the package share the handler of the `twitter_api` logger,
+    the others get their own handler the first time they are requested
+    """
+    with _lock:
+        root_name = ROOT_LOGGER_NAME if name == ROOT_LOGGER_NAME or name.startswith(f'{ROOT_LOGGER_NAME}.') else name
+
+        if root_name not in _configured_loggers:
+            _configure_logger(root_name)
+
+    return logging.getLogger(name)
+
+
+def should_log_body() -> bool:
+    return _body_sample_rate >= 1 or random.random() < _body_sample_rate
+
+
+def body_excerpt(content: bytes | None) -> str | None:
+    """
+    Decode only the head of the body, the full text of large responses is never built for logging
+    """
+    if not content:
+        return None
+
+    excerpt = content[:_body_excerpt_size].decode('utf-8', errors='replace')
+
+    return excerpt if len(content) <= _body_excerpt_size else f'{excerpt}... ({len(content)} bytes)'
+
+
+def _configure_logger(
+        name: str,
+        level: int | str | None = None,
+        log_format: LogFormat | None = None,
+        stream: IO[str] | None = None) -> logging.Logger:
     logger = logging.getLogger(name)
-    logger.setLevel(log_level)
+    logger.setLevel(level or os.environ.get('LOG_LEVEL', logging.INFO))
+
+    for handler in list(logger.handlers):
+        if getattr(handler, '_twitter_api_handler', False):
+            logger.removeHandler(handler)
 
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    setattr(handler, '_twitter_api_handler', True)
 
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
+    if (log_format or os.environ.get('LOG_FORMAT', 'text')) == 'json':
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(DEFAULT_TEXT_FORMAT))
 
-    logger.addHandler(console_handler)
+    logger.addHandler(handler)
+    _configured_loggers.add(name)
 
     return logger
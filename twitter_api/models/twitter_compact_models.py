@@ -0,0 +1,218 @@
+"""
+Compact tweets: slotted records for pipelines holding many tweets in memory. Authors are interned, one record per
+rest_id, and created_at is stored as a unix timestamp. to_model() converts a record back to the pydantic model.
+"""
+
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncGenerator, AsyncIterable, Dict, Generator, Iterable, List
+
+from twitter_api.models.twitter_home_timeline_models import TwitterHomeTimelineResponseModel
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel, TwitterUserModel
+
+
+@dataclass(slots=True)
+class CompactUser:
+    id: str
+    rest_id: str
+    full_name: str
+    username: str
+    description: str | None
+    profile_image_url: str | None
+    profile_banner_url: str | None
+    verified: bool
+    is_blue_verified: bool
+    favourites_count: int | None
+    followers_count: int | None
+    friends_count: int | None
+
+    @classmethod
+    def from_model(cls, user: TwitterUserModel) -> 'CompactUser':
+        return cls(
+            id=user.id,
+            rest_id=user.rest_id,
+            full_name=user.full_name,
+            username=user.username,
+            description=user.description,
+            profile_image_url=user.profile_image_url,
+            profile_banner_url=user.profile_banner_url,
+            verified=user.verified,
+            is_blue_verified=user.is_blue_verified,
+            favourites_count=user.favourites_count,
+            followers_count=user.followers_count,
+            friends_count=user.friends_count
+        )
+
+    def to_model(self) -> TwitterUserModel:
+        return TwitterUserModel.model_construct(
+            id=self.id,
+            rest_id=self.rest_id,
+            full_name=self.full_name,
+            username=self.username,
+            description=self.description,
+            profile_image_url=self.profile_image_url,
+            profile_banner_url=self.profile_banner_url,
+            verified=self.verified,
+            is_blue_verified=self.is_blue_verified,
+            favourites_count=self.favourites_count,
+            followers_count=self.followers_count,
+            friends_count=self.friends_count
+        )
+
+
+@dataclass(slots=True)
+class CompactTweet:
+    id: str
+    rest_id: str
+    is_retweet: bool
+    view_count: int | None
+    bookmark_count: int | None
+    favorite_count: int | None
+    quote_count: int | None
+    reply_count: int | None
+    retweet_count: int | None
+    favorited: bool
+    bookmarked: bool
+    retweeted: bool
+    content: str
+    lang: str
+    # unix timestamp in seconds, twitter dates have no sub-second part
+    created_at: int
+    author: CompactUser
+
+    @property
+    def created_at_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at, timezone.utc)
+
+    @property
+    def uri(self) -> str:
+        return f"https://twitter.com/{self.author.username}/status/{self.rest_id}"
+
+    def to_model(self) -> TwitterTweetModel:
+        return TwitterTweetModel.model_construct(
+            id=self.id,
+            rest_id=self.rest_id,
+            is_retweet=self.is_retweet,
+            view_count=self.view_count,
+            bookmark_count=self.bookmark_count,
+            favorite_count=self.favorite_count,
+            quote_count=self.quote_count,
+            reply_count=self.reply_count,
+            retweet_count=self.retweet_count,
+            favorited=self.favorited,
+            bookmarked=self.bookmarked,
+            retweeted=self.retweeted,
+            content=self.content,
+            lang=self.lang,
+            created_at=self.created_at_datetime,
+            author=self.author.to_model()
+        )
+
+
+@dataclass(slots=True)
+class CompactTimelinePage:
+    tweets: List[CompactTweet]
+    previous_cursor: str | None
+    next_cursor: str | None
+
+
+class CompactTweetFactory:
+    """
+    Build compact tweets sharing one author record per rest_id, the author record is updated in place
+    with the latest values seen (e.g. followers count)
+    """
+
+    __users: Dict[str, CompactUser]
+    __lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.__users = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def users(self) -> List[CompactUser]:
+        with self.__lock:
+            return list(self.__users.values())
+
+    def get_user(self, user: TwitterUserModel) -> CompactUser:
+        with self.__lock:
+            compact_user = self.__users.get(user.rest_id)
+
+            if compact_user is None:
+                compact_user = self.__users[user.rest_id] = CompactUser.from_model(user)
+            else:
+                self.__update_user(compact_user, user)
+
+            return compact_user
+
+    def intern(self, tweet: CompactTweet) -> CompactTweet:
+        """
+        Share the author record of a tweet built by another factory, e.g. in a worker process of a ParsePool
+        """
+        with self.__lock:
+            compact_user = self.__users.get(tweet.author.rest_id)
+
+            if compact_user is None:
+                self.__users[tweet.author.rest_id] = tweet.author
+            else:
+                self.__update_user(compact_user, tweet.author)
+                tweet.author = compact_user
+
+        tweet.lang = sys.intern(tweet.lang)
+
+        return tweet
+
+    def from_model(self, tweet: TwitterTweetModel) -> CompactTweet:
+        return CompactTweet(
+            id=tweet.id,
+            rest_id=tweet.rest_id,
+            is_retweet=tweet.is_retweet,
+            view_count=tweet.view_count,
+            bookmark_count=tweet.bookmark_count,
+            favorite_count=tweet.favorite_count,
+            quote_count=tweet.quote_count,
+            reply_count=tweet.reply_count,
+            retweet_count=tweet.retweet_count,
+            favorited=tweet.favorited,
+            bookmarked=tweet.bookmarked,
+            retweeted=tweet.retweeted,
+            content=tweet.content,
+            # a handful of distinct languages, every record points to the same string
+            lang=sys.intern(tweet.lang),
+            created_at=int(tweet.created_at.timestamp()),
+            author=self.get_user(tweet.author)
+        )
+
+    def from_timeline(self, timeline: TwitterHomeTimelineResponseModel) -> CompactTimelinePage:
+        return CompactTimelinePage(
+            tweets=[self.from_model(tweet) for tweet in timeline.tweets],
+            previous_cursor=timeline.pagination.previous_cursor,
+            next_cursor=timeline.pagination.next_cursor
+        )
+
+    def compact_stream(self, tweets: Iterable[TwitterTweetModel]) -> Generator[CompactTweet, None, None]:
+        """
+        Convert a tweets stream, e.g. get_home_timeline_tweets_stream(), the pydantic models of a page
+        are released as soon as the page is converted
+        """
+        for tweet in tweets:
+            yield self.from_model(tweet)
+
+    async def async_compact_stream(self, tweets: AsyncIterable[TwitterTweetModel]) -> AsyncGenerator[CompactTweet, None]:
+        async for tweet in tweets:
+            yield self.from_model(tweet)
+
+    @staticmethod
+    def __update_user(compact_user: CompactUser, user: TwitterUserModel | CompactUser) -> None:
+        compact_user.full_name = user.full_name
+        compact_user.username = user.username
+        compact_user.description = user.description
+        compact_user.profile_image_url = user.profile_image_url
+        compact_user.profile_banner_url = user.profile_banner_url
+        compact_user.verified = user.verified
+        compact_user.is_blue_verified = user.is_blue_verified
+        compact_user.favourites_count = user.favourites_count
+        compact_user.followers_count = user.followers_count
+        compact_user.friends_count = user.friends_count
@@ -1,12 +1,18 @@
-from typing import List
+from typing import Any, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, RootModel
 
 
 class EmptyResponseModel(BaseModel):
     pass
 
 
+class RawResponseModel(RootModel[Any]):
+    """
+    Decoded json body without any validation, used by the fast path parsers
+    """
+
+
 class GuestTokenResponseModel(BaseModel):
     guest_token: str
 
@@ -170,7 +170,7 @@ class FavoriteTweetVariables(BaseModel):
 
 class FavoriteTweetRequest(BaseModel):
     variables: FavoriteTweetVariables
-    queryId: str = "lI07N6Otwv1PhnEgXILM7A"
+    queryId: str
 
 
 # it may happen that the tweet is already liked, so the response will be different (we don't handle this case for now)
@@ -180,3 +180,20 @@ class FavoriteTweetDataResponse(BaseModel):
 
 class FavoriteTweetResponse(BaseModel):
     data: FavoriteTweetDataResponse | None = None
+
+
+class CreateTweetItem(BaseModel):
+    content: str
+    in_reply_to_tweet_id: str | None = None
+
+
+class TwitterTweetActionResultModel(BaseModel):
+    """
+    Outcome of a single item of a bulk operation
+    """
+    success: bool
+    # the favorited tweet id or the id of the created tweet
+    rest_id: str | None = None
+    status_code: int | None = None
+    error_code: int | None = None
+    error_message: str | None = None
@@ -0,0 +1,164 @@
+"""
+Process pool for the CPU bound stage of the ingestion: the fetch stage hands the raw response bodies to worker
+processes, which decode and convert them, so that a crawl of many accounts uses every core of the host instead
+of one core under the GIL. Each source (e.g. the home timeline of an account) is fetched by its own thread,
+the pages parsed are delivered in fetch order or as soon as they are ready.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, Generic, Iterable, Literal, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+from twitter_api.logger import get_logger
+
+logger = get_logger(__name__)
+
+V = TypeVar("V")
+
+DEFAULT_FETCH_CONCURRENCY: int = 8
+
+# marks the end of a source, with the number of its pages
+_SOURCE_DONE = object()
+
+
+class ParsePoolOptions(BaseModel):
+    # worker processes, None uses every core
+    workers: int | None = None
+    # sources fetched at the same time, each by its own thread
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY
+    # deliver the pages in the order they were fetched, otherwise as soon as they are parsed
+    ordered: bool = True
+    # pages fetched and not delivered yet, the fetch stage waits above it; None is twice the workers
+    max_pending: int | None = None
+    # fork is unsafe once the clients run background threads (guest tokens, session keeper)
+    start_method: Literal['spawn', 'forkserver', 'fork'] = 'spawn'
+
+
+@dataclass(slots=True)
+class ParsedPage(Generic[V]):
+    # the key of the source of the page, e.g. the user id of the account
+    source: str
+    # position of the page in its source
+    index: int
+    data: V
+
+
+class ParsePool:
+    """
+    Parse raw bodies in worker processes. The parse function and its results are sent between processes,
+    so they must be picklable: a module level function or a functools.partial of one.
+    """
+
+    __options: ParsePoolOptions
+    __workers: int
+    __executor: ProcessPoolExecutor | None = None
+
+    def __init__(self, options: ParsePoolOptions | None = None) -> None:
+        self.__options = options or ParsePoolOptions()
+        self.__workers = self.__options.workers or os.cpu_count() or 1
+
+    def __enter__(self) -> 'ParsePool':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def workers(self) -> int:
+        return self.__workers
+
+    def start(self) -> None:
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.__workers, mp_context=multiprocessing.get_context(self.__options.start_method))
+
+    def close(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
+
+    def submit(self, parse: Callable[[bytes], V], body: bytes) -> 'Future[V]':
+        if self.__executor is None:
+            raise RuntimeError('The parse pool is not started')
+
+        return self.__executor.submit(parse, body)
+
+    def ingest(
+            self,
+            sources: Dict[str, Iterable[bytes]],
+            parse: Callable[[bytes], V],
+            ordered: bool | None = None) -> Generator[ParsedPage[V], None, None]:
+        """
+        Fetch the bodies of every source, each in a thread, and parse them in the worker processes.
+        Errors of the fetch and of the parse are raised to the consumer, closing the generator stops the fetch.
+        """
+        ordered = self.__options.ordered if ordered is None else ordered
+        max_pending = self.__options.max_pending or 2 * self.__workers
+        # futures in fetch order, or in completion order when unordered
+        results: queue.Queue[Tuple[str, Any, Any]] = queue.Queue()
+        pending = threading.Semaphore(max_pending)
+        stopped = threading.Event()
+
+        def fetch(source: str, bodies: Iterable[bytes]) -> None:
+            count = 0
+
+            try:
+                for body in bodies:
+                    # the consumer releases a slot for every page delivered
+                    while not pending.acquire(timeout=0.1):
+                        if stopped.is_set():
+                            return
+
+                    if stopped.is_set():
+                        return
+
+                    future = self.submit(parse, body)
+                    item = (source, count, future)
+                    count += 1
+
+                    if ordered:
+                        results.put(item)
+                    else:
+                        future.add_done_callback(lambda _, item=item: results.put(item))
+            except Exception as e:
+                results.put((source, None, e))
+            finally:
+                results.put((source, count, _SOURCE_DONE))
+
+        fetch_executor = ThreadPoolExecutor(
+            max_workers=min(self.__options.fetch_concurrency, len(sources)) or 1, thread_name_prefix='parse-pool-fetch')
+
+        for source, bodies in sources.items():
+            fetch_executor.submit(fetch, source, bodies)
+
+        sources_left = len(sources)
+        pages_left = 0
+
+        try:
+            while sources_left > 0 or pages_left > 0:
+                source, index, value = results.get()
+
+                if value is _SOURCE_DONE:
+                    sources_left -= 1
+                    pages_left += index
+                    continue
+
+                if isinstance(value, Exception):
+                    logger.error('Fetch of %s failed: %r', source, value)
+                    raise value
+
+                pages_left -= 1
+                data = value.result()
+                pending.release()
+
+                yield ParsedPage(source, index, data)
+        finally:
+            stopped.set()
+            fetch_executor.shutdown(wait=False, cancel_futures=True)
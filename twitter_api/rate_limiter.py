@@ -0,0 +1,252 @@
+import random
+import threading
+import time
+from typing import Dict, Mapping
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, FieldValidationInfo, field_validator
+
+from twitter_api.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RateLimitRule(BaseModel):
+    """
+    Allow a burst of `requests` calls, refilled at a constant rate over `period` seconds
+    """
+    requests: int
+    period: float
+
+    @field_validator('requests', 'period')
+    @classmethod
+    def validate_positive(cls, v: float, info: FieldValidationInfo) -> float:
+        if v <= 0:
+            raise ValueError(f"{info.field_name} must be greater than 0")
+
+        return v
+
+
+# limits observed on the web client, per account and per 15 minutes window unless stated otherwise
+DEFAULT_RATE_LIMIT_RULES: Dict[str, RateLimitRule] = {
+    'HomeTimeline': RateLimitRule(requests=500, period=15 * 60),
+    'Viewer': RateLimitRule(requests=500, period=15 * 60),
+    'CreateTweet': RateLimitRule(requests=300, period=3 * 60 * 60),
+    'FavoriteTweet': RateLimitRule(requests=500, period=15 * 60),
+    'onboarding/task.json': RateLimitRule(requests=50, period=15 * 60),
+    'guest/activate.json': RateLimitRule(requests=50, period=15 * 60),
+}
+
+DEFAULT_RATE_LIMIT_RULE: RateLimitRule = RateLimitRule(requests=50, period=15 * 60)
+
+
+class RateLimitQuota(BaseModel):
+    """
+    Quota of an operation as reported by the x-rate-limit-* response headers, reset is an epoch timestamp
+    """
+    limit: int | None = None
+    remaining: int
+    reset: float
+
+    @property
+    def reset_in(self) -> float:
+        return max(0, self.reset - time.time())
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> 'RateLimitQuota | None':
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+
+        if remaining is None or reset is None:
+            return None
+
+        try:
+            limit = headers.get('x-rate-limit-limit')
+
+            return cls(limit=int(limit) if limit is not None else None, remaining=int(remaining), reset=float(reset))
+        except ValueError:
+            logger.warning('Invalid rate limit headers: remaining=%s, reset=%s', remaining, reset)
+            return None
+
+
+class RateLimiterOptions(BaseModel):
+    rules: Dict[str, RateLimitRule] = DEFAULT_RATE_LIMIT_RULES
+    # used for the operations without a rule, None disables rate limiting for them
+    default_rule: RateLimitRule | None = DEFAULT_RATE_LIMIT_RULE
+    # random seconds added to a wait, only when the budget is exhausted, to avoid a recognizable request pattern
+    min_jitter: float = 0
+    max_jitter: float = 1
+
+    @field_validator('min_jitter', 'max_jitter')
+    @classmethod
+    def validate_jitter(cls, v: float, info: FieldValidationInfo) -> float:
+        if v < 0 or v > 20:
+            raise ValueError(f"{info.field_name} must be between 0 and 20 seconds")
+
+        if info.field_name == 'max_jitter' and 'min_jitter' in info.data and v < info.data['min_jitter']:
+            raise ValueError("min_jitter must be less than or equal to max_jitter")
+
+        return v
+
+
+def get_operation_name(url: str) -> str:
+    """
+    Get the operation name used as rate limit key, e.g.:
+    https://twitter.com/i/api/graphql/<query_id>/HomeTimeline -> HomeTimeline
+    https://api.twitter.com/1.1/onboarding/task.json -> onboarding/task.json
+    """
+    path = urlsplit(url).path
+
+    if '/graphql/' in path:
+        return path.rsplit('/', 1)[-1]
+
+    if '/1.1/' in path:
+        return path.split('/1.1/', 1)[-1]
+
+    return path
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket, tokens are reserved in advance so that concurrent callers
+    get increasing delays instead of all waking up at the same time
+    """
+
+    __capacity: float
+    __refill_rate: float
+    __tokens: float
+    __updated_at: float
+    __lock: threading.Lock
+
+    def __init__(self, capacity: float, refill_rate: float) -> None:
+        self.__capacity = capacity
+        self.__refill_rate = refill_rate
+        self.__tokens = capacity
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        with self.__lock:
+            self.__refill()
+            return self.__tokens
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket, returns the seconds to wait before they are actually available
+        """
+        with self.__lock:
+            self.__refill()
+            self.__tokens -= tokens
+
+            if self.__tokens >= 0:
+                return 0
+
+            return -self.__tokens / self.__refill_rate
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated_at) * self.__refill_rate)
+        self.__updated_at = now
+
+
+class RateLimiterInterface:
+    """
+    This interface is used to define the methods that a rate limiter must implement.
+    The client asks for the delay and performs the wait itself, so the same limiter works for sync and async clients.
+    """
+
+    def acquire(self, operation: str) -> float:
+        """
+        Reserve a request slot for the operation, returns the seconds to wait before sending the request
+        """
+        raise NotImplementedError
+
+    def update_quota(self, operation: str, quota: RateLimitQuota) -> None:
+        """
+        Synchronize the limiter with the quota reported by the server
+        """
+        raise NotImplementedError
+
+    @property
+    def quotas(self) -> Dict[str, RateLimitQuota]:
+        raise NotImplementedError
+
+
+class NoRateLimiter(RateLimiterInterface):
+    def acquire(self, operation: str) -> float:
+        return 0
+
+    def update_quota(self, operation: str, quota: RateLimitQuota) -> None:
+        pass
+
+    @property
+    def quotas(self) -> Dict[str, RateLimitQuota]:
+        return {}
+
+
+class TokenBucketRateLimiter(RateLimiterInterface):
+    __options: RateLimiterOptions
+    __buckets: Dict[str, TokenBucket]
+    __quotas: Dict[str, RateLimitQuota]
+    __lock: threading.Lock
+
+    def __init__(self, options: RateLimiterOptions | None = None) -> None:
+        self.__options = options or RateLimiterOptions()
+        self.__buckets = {}
+        self.__quotas = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def quotas(self) -> Dict[str, RateLimitQuota]:
+        with self.__lock:
+            return {operation: quota.model_copy() for operation, quota in self.__quotas.items()}
+
+    def update_quota(self, operation: str, quota: RateLimitQuota) -> None:
+        with self.__lock:
+            self.__quotas[operation] = quota
+
+    def acquire(self, operation: str) -> float:
+        bucket = self.__get_bucket(operation)
+
+        # when the server window is closed, the next call is scheduled exactly when it resets
+        window_wait_time = self.__reserve_quota(operation)
+
+        wait_time = max(bucket.reserve() if bucket is not None else 0, window_wait_time)
+
+        if wait_time <= 0:
+            return 0
+
+        wait_time += random.uniform(self.__options.min_jitter, self.__options.max_jitter)
+
+        logger.info('Rate limit budget exhausted for %s, waiting %.2f seconds', operation, wait_time)
+
+        return wait_time
+
+    def __reserve_quota(self, operation: str) -> float:
+        with self.__lock:
+            quota = self.__quotas.get(operation)
+
+            if quota is None:
+                return 0
+
+            if quota.reset_in <= 0:
+                # the window is over, the quota is unknown until the next response
+                del self.__quotas[operation]
+                return 0
+
+            quota.remaining -= 1
+
+            return quota.reset_in if quota.remaining < 0 else 0
+
+    def __get_bucket(self, operation: str) -> TokenBucket | None:
+        with self.__lock:
+            if operation not in self.__buckets:
+                rule = self.__options.rules.get(operation, self.__options.default_rule)
+
+                if rule is None:
+                    return None
+
+                self.__buckets[operation] = TokenBucket(rule.requests, rule.requests / rule.period)
+
+            return self.__buckets[operation]
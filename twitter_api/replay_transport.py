@@ -0,0 +1,498 @@
+"""
+Record/replay transport: in record mode the exchanges of the clients are appended to a gzip compressed archive of
+json lines, in replay mode they are served from the archive without reaching the network, with an optional
+simulated latency and simulated rate limits. The transport is plugged under the http libraries, a requests adapter
+for TwitterClient and an httpx transport for AsyncTwitterClient, so the clients run their usual code.
+
+Exchanges are matched on method, operation and a hash of the GraphQL variables (the whole body and query for the
+other endpoints), the recordings of the same request are served in turn.
+The values of the cookies and of the credential headers are redacted from the archive unless record_credentials
+is set: a replayed login still sets every session cookie, with placeholder values.
+"""
+
+import asyncio
+import atexit
+import base64
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Literal, Mapping, Tuple, cast
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+import requests
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+from twitter_api.logger import get_logger
+from twitter_api.rate_limiter import get_operation_name
+
+logger = get_logger(__name__)
+
+TransportMode = Literal['record', 'replay']
+
+# headers describing the recorded bytes on the wire, the archive holds the decoded body
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+RATE_LIMIT_HEADERS = {'x-rate-limit-limit', 'x-rate-limit-remaining', 'x-rate-limit-reset'}
+# headers holding credentials, their values are replaced by REDACTED_VALUE when recording
+CREDENTIAL_HEADERS = {'authorization', 'proxy-authorization', 'cookie', 'x-csrf-token', 'x-guest-token'}
+REDACTED_VALUE: str = 'redacted'
+
+# "Rate limit exceeded"
+RATE_LIMIT_ERROR_CODE: int = 88
+# "Sorry, that page does not exist", returned for the requests missing from the archive
+NOT_FOUND_ERROR_CODE: int = 34
+
+
+class ReplayTransportOptions(BaseModel):
+    mode: TransportMode
+    archive_path: str
+    # replay only: seconds added to every response, plus a random part up to latency_jitter
+    latency: float = 0
+    latency_jitter: float = 0
+    # replay only: requests allowed per operation and window, announced with the x-rate-limit-* headers and
+    # answered with 429 once exhausted; None replays the recorded headers without rate limiting
+    rate_limit: int | None = None
+    rate_limit_window: float = 15 * 60
+    # replay only: serve a recording of the same operation when the variables were never recorded,
+    # e.g. the next pages of a timeline crawl
+    fallback_to_operation: bool = True
+    # record only: keep the cookies (auth_token, ct0...) and credential headers in clear text,
+    # the archive then holds a live session and must be kept private
+    record_credentials: bool = False
+
+
+class RecordedExchange(BaseModel):
+    method: str
+    url: str
+    operation: str
+    variables_hash: str
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: str
+    # 'base64' for the bodies which are not utf-8 text
+    body_encoding: Literal['utf-8', 'base64'] = 'utf-8'
+    recorded_at: float
+
+    def get_body(self) -> bytes:
+        return base64.b64decode(self.body) if self.body_encoding == 'base64' else self.body.encode()
+
+
+def get_variables_hash(url: str, body: bytes | str | None) -> str:
+    """
+    Hash of the GraphQL variables of the request, or of the whole body and query of the other requests
+    """
+    if isinstance(body, str):
+        body = body.encode()
+
+    query = dict(parse_qsl(urlsplit(url).query))
+
+    try:
+        payload = json.loads(body) if body else None
+    except ValueError:
+        payload = None
+
+    if isinstance(payload, dict) and 'variables' in payload:
+        key: Any = payload['variables']
+    elif 'variables' in query:
+        key = json.loads(query['variables'])
+    else:
+        key = {'query': query, 'body': payload if payload is not None else (body or b'').decode(errors='replace')}
+
+    return hashlib.sha256(json.dumps(key, sort_keys=True, separators=(',', ':')).encode()).hexdigest()[:16]
+
+
+def redact_headers(headers: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Replace the values of the cookies set by the response and of the credential headers,
+    the cookie names and attributes are kept
+    """
+    redacted: List[Tuple[str, str]] = []
+
+    for name, value in headers:
+        lowered = name.lower()
+
+        if lowered == 'set-cookie':
+            cookie, separator, attributes = value.partition(';')
+            value = f'{cookie.split("=", 1)[0]}={REDACTED_VALUE}{separator}{attributes}'
+        elif lowered in CREDENTIAL_HEADERS:
+            value = REDACTED_VALUE
+
+        redacted.append((name, value))
+
+    return redacted
+
+
+def get_request_parts(request: requests.PreparedRequest) -> Tuple[str, str, bytes | None]:
+    """
+    Method, url and body of a prepared request
+    """
+    if request.method is None or request.url is None:
+        raise ValueError('The request is not prepared')
+
+    body = request.body
+
+    if isinstance(body, str):
+        body = body.encode()
+    elif body is not None and not isinstance(body, bytes):
+        raise ValueError('Streamed request bodies can not be recorded nor replayed')
+
+    return request.method, request.url, body
+
+
+class ExchangeArchive:
+    """
+    Exchanges of an archive file, shared by every client of the process through get().
+    The archive is appended while recording and indexed once when replaying.
+    """
+
+    __archives: Dict[str, 'ExchangeArchive'] = {}
+    __archives_lock = threading.Lock()
+
+    __path: str
+    __lock: threading.Lock
+    __writer: Any = None
+    __index: Dict[Tuple[str, str, str], List[RecordedExchange]] | None = None
+    __operation_index: Dict[Tuple[str, str], List[RecordedExchange]]
+    __positions: Dict[Any, int]
+
+    def __init__(self, path: str) -> None:
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__operation_index = {}
+        self.__positions = {}
+
+    @classmethod
+    def get(cls, path: str) -> 'ExchangeArchive':
+        path = os.path.abspath(path)
+
+        with cls.__archives_lock:
+            archive = cls.__archives.get(path)
+
+            if archive is None:
+                archive = cls.__archives[path] = ExchangeArchive(path)
+
+            return archive
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def append(self, exchange: RecordedExchange) -> None:
+        line = exchange.model_dump_json() + '\n'
+
+        with self.__lock:
+            if self.__writer is None:
+                directory = os.path.dirname(self.__path)
+
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory)
+
+                # every recording session adds a gzip member, readers see a single stream
+                self.__writer = gzip.open(self.__path, 'at', encoding='utf-8')
+                atexit.register(self.close)
+
+            self.__writer.write(line)
+            self.__writer.flush()
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__writer is not None:
+                self.__writer.close()
+                self.__writer = None
+
+    def find(self, method: str, operation: str, variables_hash: str, fallback_to_operation: bool) -> RecordedExchange | None:
+        """
+        Next recording of the request, the recordings of a request are served in turn
+        """
+        with self.__lock:
+            index = self.__index if self.__index is not None else self.__load()
+            key: Any = (method, operation, variables_hash)
+            exchanges = index.get(key)
+
+            if exchanges is None and fallback_to_operation:
+                key = (method, operation)
+                exchanges = self.__operation_index.get(key)
+
+            if not exchanges:
+                return None
+
+            position = self.__positions.get(key, 0)
+            self.__positions[key] = position + 1
+
+            return exchanges[position % len(exchanges)]
+
+    def __load(self) -> Dict[Tuple[str, str, str], List[RecordedExchange]]:
+        index: Dict[Tuple[str, str, str], List[RecordedExchange]] = {}
+        self.__index = index
+
+        if not os.path.exists(self.__path):
+            logger.warning('Replay archive %s not found, every request will fail', self.__path)
+            return index
+
+        with gzip.open(self.__path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                exchange = RecordedExchange.model_validate_json(line)
+
+                index.setdefault((exchange.method, exchange.operation, exchange.variables_hash), []).append(exchange)
+                self.__operation_index.setdefault((exchange.method, exchange.operation), []).append(exchange)
+
+        logger.info('Loaded %d recorded requests from %s', sum(len(v) for v in index.values()), self.__path)
+
+        return index
+
+
+class ReplayEngine:
+    """
+    Shared by the sync and async replay transports: the lookup in the archive, the simulated rate limits
+    and the latency to apply
+    """
+
+    __options: ReplayTransportOptions
+    __archive: ExchangeArchive
+    __windows: Dict[str, Tuple[float, int]]
+    __lock: threading.Lock
+
+    def __init__(self, options: ReplayTransportOptions) -> None:
+        self.__options = options
+        self.__archive = ExchangeArchive.get(options.archive_path)
+        self.__windows = {}
+        self.__lock = threading.Lock()
+
+    def get_latency(self) -> float:
+        return self.__options.latency + random.uniform(0, self.__options.latency_jitter)
+
+    def replay(self, method: str, url: str, body: bytes | None) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        operation = get_operation_name(url)
+        rate_limit_headers, exhausted = self.__consume_rate_limit(operation)
+
+        if exhausted:
+            return 429, rate_limit_headers, self.__error(RATE_LIMIT_ERROR_CODE, 'Rate limit exceeded')
+
+        exchange = self.__archive.find(
+            method, operation, get_variables_hash(url, body), self.__options.fallback_to_operation)
+
+        if exchange is None:
+            logger.warning('No recorded response for %s %s', method, url)
+
+            return 404, rate_limit_headers, self.__error(NOT_FOUND_ERROR_CODE, 'Sorry, that page does not exist.')
+
+        if self.__options.rate_limit is None:
+            return exchange.status_code, exchange.headers, exchange.get_body()
+
+        headers = [(name, value) for name, value in exchange.headers if name.lower() not in RATE_LIMIT_HEADERS]
+
+        return exchange.status_code, headers + rate_limit_headers, exchange.get_body()
+
+    def __consume_rate_limit(self, operation: str) -> Tuple[List[Tuple[str, str]], bool]:
+        """
+        The simulated x-rate-limit-* headers of the request and whether the window is exhausted
+        """
+        limit = self.__options.rate_limit
+
+        if limit is None:
+            return [], False
+
+        now = time.time()
+
+        with self.__lock:
+            started_at, count = self.__windows.get(operation, (now, 0))
+
+            if now - started_at >= self.__options.rate_limit_window:
+                started_at, count = now, 0
+
+            count += 1
+            self.__windows[operation] = (started_at, count)
+
+        return [
+            ('x-rate-limit-limit', str(limit)),
+            ('x-rate-limit-remaining', str(max(limit - count, 0))),
+            ('x-rate-limit-reset', str(int(started_at + self.__options.rate_limit_window))),
+        ], count > limit
+
+    @staticmethod
+    def __error(code: int, message: str) -> bytes:
+        return json.dumps({'errors': [{'code': code, 'message': message}]}).encode()
+
+
+def build_exchange(
+        method: str,
+        url: str,
+        request_body: bytes | str | None,
+        status_code: int,
+        headers: Mapping[str, str] | List[Tuple[str, str]],
+        body: bytes,
+        record_credentials: bool = False) -> RecordedExchange:
+    body_encoding: Literal['utf-8', 'base64'] = 'utf-8'
+
+    try:
+        text = body.decode()
+    except UnicodeDecodeError:
+        text, body_encoding = base64.b64encode(body).decode(), 'base64'
+
+    items = list(headers.items() if isinstance(headers, Mapping) else headers)
+
+    if not record_credentials:
+        items = redact_headers(items)
+
+    return RecordedExchange(
+        method=method,
+        url=url,
+        operation=get_operation_name(url),
+        variables_hash=get_variables_hash(url, request_body),
+        status_code=status_code,
+        headers=[(name, value) for name, value in items if name.lower() not in SKIPPED_HEADERS],
+        body=text,
+        body_encoding=body_encoding,
+        recorded_at=time.time()
+    )
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    requests adapter sending the requests to the network and appending the exchanges to the archive
+    """
+
+    __archive: ExchangeArchive
+    __record_credentials: bool
+
+    def __init__(self, options: ReplayTransportOptions) -> None:
+        super().__init__()
+        self.__archive = ExchangeArchive.get(options.archive_path)
+        self.__record_credentials = options.record_credentials
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        response = super().send(request, *args, **kwargs)
+        # the cookies are recorded with the other headers, one Set-Cookie header each
+        headers = list(response.raw.headers.items()) if response.raw is not None else list(response.headers.items())
+
+        method, url, body = get_request_parts(request)
+
+        self.__archive.append(build_exchange(
+            method, url, body, response.status_code, headers, response.content, self.__record_credentials))
+
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    requests adapter answering from the archive, nothing is sent to the network
+    """
+
+    __engine: ReplayEngine
+
+    def __init__(self, options: ReplayTransportOptions) -> None:
+        super().__init__()
+        self.__engine = ReplayEngine(options)
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        latency = self.__engine.get_latency()
+
+        if latency > 0:
+            time.sleep(latency)
+
+        status_code, headers, content = self.__engine.replay(*get_request_parts(request))
+
+        # requests reads the cookies from the headers of the underlying http.client response
+        raw_headers = ''.join(f'{name}: {value}\r\n' for name, value in headers).encode('latin-1') + b'\r\n'
+        raw_response = HTTPResponse(
+            body=io.BytesIO(content),
+            headers=HTTPHeaderDict(headers),
+            status=status_code,
+            reason=http.client.responses.get(status_code, ''),
+            preload_content=False,
+            decode_content=False,
+            original_response=cast(
+                http.client.HTTPResponse, _RecordedHTTPResponse(http.client.parse_headers(io.BytesIO(raw_headers)))))
+
+        return self.build_response(request, raw_response)
+
+
+class _RecordedHTTPResponse:
+    """
+    The part of http.client.HTTPResponse read by requests and urllib3
+    """
+
+    def __init__(self, msg: http.client.HTTPMessage) -> None:
+        self.msg = msg
+
+    def isclosed(self) -> bool:
+        return True
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport forwarding the requests to `transport` and appending the exchanges to the archive
+    """
+
+    __transport: httpx.AsyncBaseTransport
+    __archive: ExchangeArchive
+    __record_credentials: bool
+
+    def __init__(self, options: ReplayTransportOptions, transport: httpx.AsyncBaseTransport) -> None:
+        self.__transport = transport
+        self.__archive = ExchangeArchive.get(options.archive_path)
+        self.__record_credentials = options.record_credentials
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.__transport.handle_async_request(request)
+        # the transport returns the raw body, decoded by the client once the response is returned
+        encoded_body = await response.aread()
+        decoded_response = httpx.Response(response.status_code, headers=response.headers, content=encoded_body)
+
+        self.__archive.append(build_exchange(
+            request.method, str(request.url), await request.aread(), response.status_code,
+            response.headers.multi_items(), decoded_response.content, self.__record_credentials))
+
+        return httpx.Response(
+            response.status_code, headers=response.headers, content=encoded_body, extensions=response.extensions)
+
+    async def aclose(self) -> None:
+        await self.__transport.aclose()
+
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport answering from the archive, nothing is sent to the network
+    """
+
+    __engine: ReplayEngine
+
+    def __init__(self, options: ReplayTransportOptions) -> None:
+        self.__engine = ReplayEngine(options)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        latency = self.__engine.get_latency()
+
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        status_code, headers, content = self.__engine.replay(request.method, str(request.url), await request.aread())
+
+        return httpx.Response(status_code, headers=headers, content=content)
+
+
+def build_adapter(options: ReplayTransportOptions) -> HTTPAdapter:
+    return RecordingAdapter(options) if options.mode == 'record' else ReplayAdapter(options)
+
+
+def build_async_transport(
+        options: ReplayTransportOptions, transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncBaseTransport:
+    """
+    `transport` is the network transport wrapped in record mode, the default one of httpx when None
+    """
+    if options.mode == 'replay':
+        return AsyncReplayTransport(options)
+
+    return AsyncRecordingTransport(options, transport or httpx.AsyncHTTPTransport())
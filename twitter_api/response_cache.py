@@ -0,0 +1,340 @@
+"""
+Cache of the responses of idempotent reads, e.g. a home timeline page or the Viewer query, shared by the clients.
+Entries are keyed by operation, variables and account, they live in a size bounded LRU with a TTL per operation
+and optionally in a sqlite database surviving restarts. Stale entries with an ETag or a Last-Modified header
+are revalidated with a conditional request.
+Concurrent identical requests are coalesced by the clients: a single one reaches the network and the others wait
+for its response.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Mapping, Tuple
+from urllib.parse import urlencode
+
+from pydantic import BaseModel, field_validator
+
+from twitter_api.graphql_operations import CREATE_TWEET_OPERATION, FAVORITE_TWEET_OPERATION, HOME_TIMELINE_OPERATION, \
+    VIEWER_OPERATION
+from twitter_api.logger import get_logger
+from twitter_api.replay_transport import get_variables_hash
+
+logger = get_logger(__name__)
+
+# never cached, whatever the TTLs of the options
+MUTATION_OPERATIONS = {
+    CREATE_TWEET_OPERATION, 'DeleteTweet', FAVORITE_TWEET_OPERATION, 'UnfavoriteTweet', 'CreateRetweet', 'DeleteRetweet',
+    'CreateBookmark', 'DeleteBookmark', 'onboarding/task.json', 'guest/activate.json'
+}
+
+# response headers kept with the body, the validators are sent back to revalidate a stale entry
+CACHED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+# milliseconds a connection waits for the lock held by another process before failing
+BUSY_TIMEOUT: int = 5000
+# the expired rows of the database are deleted every this many writes
+PRUNE_INTERVAL: int = 100
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at);
+'''
+
+UPSERT_RESPONSE = '''
+INSERT INTO responses (key, status_code, headers, body, stored_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    status_code = excluded.status_code,
+    headers = excluded.headers,
+    body = excluded.body,
+    stored_at = excluded.stored_at,
+    expires_at = excluded.expires_at
+'''
+
+
+class ResponseCacheOptions(BaseModel):
+    # seconds a response stays fresh, per operation; the operations without a TTL are never cached
+    ttls: Dict[str, float] = {HOME_TIMELINE_OPERATION: 30, VIEWER_OPERATION: 300}
+    # responses kept in memory, the least recently used ones are evicted first
+    max_entries: int = 1024
+    # sqlite database of the on-disk tier, None keeps the cache in memory only
+    path: str | None = None
+    # rows kept in the database, the oldest ones are deleted first
+    max_disk_entries: int = 100_000
+
+    @field_validator('ttls')
+    @classmethod
+    def validate_ttls(cls, v: Dict[str, float]) -> Dict[str, float]:
+        mutations = MUTATION_OPERATIONS.intersection(v)
+
+        if mutations:
+            raise ValueError(f"mutations can not be cached: {', '.join(sorted(mutations))}")
+
+        return v
+
+
+class CachedResponse:
+    """
+    A cached response, with the subset of the response interface read by the clients
+    """
+
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    stored_at: float
+    expires_at: float
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes, stored_at: float, expires_at: float) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def is_success(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def can_revalidate(self) -> bool:
+        return 'etag' in self.headers or 'last-modified' in self.headers
+
+    def json(self, **kwargs: Any) -> Any:
+        return json.loads(self.content, **kwargs)
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def get_revalidation_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+
+        if 'etag' in self.headers:
+            headers['If-None-Match'] = self.headers['etag']
+
+        if 'last-modified' in self.headers:
+            headers['If-Modified-Since'] = self.headers['last-modified']
+
+        return headers
+
+
+def build_cache_key(operation: str, account: str, params: Mapping[str, Any] | str | None, data: Any) -> str:
+    query = params if isinstance(params, str) or params is None else urlencode(params)
+    body = data if isinstance(data, bytes) or data is None else json.dumps(data)
+    variables_hash = get_variables_hash(f'?{query}' if query else '', body)
+
+    return f'{operation}:{account}:{variables_hash}'
+
+
+def get_account_key(auth_token: str | None) -> str:
+    # the session token itself is never written in the keys nor on disk
+    return hashlib.sha256(auth_token.encode()).hexdigest()[:16] if auth_token else 'guest'
+
+
+class ResponseCache:
+    """
+    Thread safe LRU of responses with an optional sqlite tier, shared by many clients and accounts
+    """
+
+    __options: ResponseCacheOptions
+    __entries: 'OrderedDict[str, CachedResponse]'
+    __in_flight: Dict[str, Future]
+    __lock: threading.Lock
+    __connection: sqlite3.Connection | None = None
+    __writes: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, options: ResponseCacheOptions | None = None) -> None:
+        self.__options = options or ResponseCacheOptions()
+        self.__entries = OrderedDict()
+        self.__in_flight = {}
+        self.__lock = threading.Lock()
+
+        if self.__options.path is not None:
+            self.__open(self.__options.path)
+
+    def __enter__(self) -> 'ResponseCache':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def persistent(self) -> bool:
+        return self.__connection is not None
+
+    def is_cacheable(self, operation: str) -> bool:
+        return operation not in MUTATION_OPERATIONS and operation in self.__options.ttls
+
+    def get(self, key: str) -> CachedResponse | None:
+        """
+        The entry of the key, possibly stale: a stale entry is only worth a conditional request
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is not None:
+                self.__entries.move_to_end(key)
+
+        if entry is None and self.__connection is not None:
+            entry = self.__select(key)
+
+            if entry is not None:
+                self.__put(key, entry)
+
+        with self.__lock:
+            if entry is not None and entry.is_fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return entry
+
+    def set(self, operation: str, key: str, status_code: int, headers: Mapping[str, str], content: bytes) -> CachedResponse:
+        now = time.time()
+        entry = CachedResponse(
+            status_code=status_code,
+            headers={name: headers[name] for name in CACHED_HEADERS if name in headers},
+            content=content,
+            stored_at=now,
+            expires_at=now + self.__options.ttls[operation])
+
+        self.__put(key, entry)
+
+        if self.__connection is not None:
+            self.__upsert(key, entry)
+
+        return entry
+
+    def refresh(self, operation: str, key: str, entry: CachedResponse) -> CachedResponse:
+        """
+        Extend the life of a stale entry, revalidated by a 304 response
+        """
+        return self.set(operation, key, entry.status_code, entry.headers, entry.content)
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """
+        Future of the request in flight for the key, and whether the caller owns it: the owner sends the request
+        and passes its response to leave(), the other callers wait for the result of the future
+        """
+        with self.__lock:
+            future = self.__in_flight.get(key)
+
+            if future is not None:
+                return future, False
+
+            future = self.__in_flight[key] = Future()
+
+            return future, True
+
+    def leave(self, key: str, future: Future, response: Any = None, error: BaseException | None = None) -> None:
+        with self.__lock:
+            self.__in_flight.pop(key, None)
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(response)
+
+    def invalidate(self, key: str | None = None) -> None:
+        """
+        Remove an entry, or every entry without a key
+        """
+        with self.__lock:
+            if key is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(key, None)
+
+            if self.__connection is not None:
+                with self.__connection:
+                    if key is None:
+                        self.__connection.execute('DELETE FROM responses')
+                    else:
+                        self.__connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def __put(self, key: str, entry: CachedResponse) -> None:
+        with self.__lock:
+            self.__entries[key] = entry
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.__options.max_entries:
+                self.__entries.popitem(last=False)
+
+    def __open(self, path: str) -> None:
+        directory = os.path.dirname(path)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.__connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT / 1000, check_same_thread=False)
+
+        with self.__lock, self.__connection:
+            self.__connection.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT}')
+
+            if path != ':memory:':
+                self.__connection.execute('PRAGMA journal_mode = WAL')
+
+            self.__connection.executescript(SCHEMA)
+
+    def __select(self, key: str) -> CachedResponse | None:
+        with self.__lock:
+            row: Tuple[Any, ...] | None = self.__connection.execute(
+                'SELECT status_code, headers, body, stored_at, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        status_code, headers, body, stored_at, expires_at = row
+
+        return CachedResponse(status_code, json.loads(headers), body, stored_at, expires_at)
+
+    def __upsert(self, key: str, entry: CachedResponse) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute(UPSERT_RESPONSE, (
+                key, entry.status_code, json.dumps(entry.headers), entry.content, entry.stored_at, entry.expires_at))
+
+            self.__writes += 1
+
+            if self.__writes % PRUNE_INTERVAL == 0:
+                self.__prune()
+
+    def __prune(self) -> None:
+        # the stale rows without validators can not be revalidated
+        self.__connection.execute(
+            "DELETE FROM responses WHERE expires_at < ? AND headers NOT LIKE '%\"etag\"%' "
+            "AND headers NOT LIKE '%\"last-modified\"%'", (time.time(),))
+        self.__connection.execute(
+            'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+            (self.__options.max_disk_entries,))
@@ -0,0 +1,54 @@
+import random
+from typing import Set
+
+from pydantic import BaseModel
+
+from twitter_api.logger import get_logger
+from twitter_api.rate_limiter import RateLimitQuota
+
+logger = get_logger(__name__)
+
+
+class RetryOptions(BaseModel):
+    max_retries: int = 3
+    # exponential backoff: backoff_factor * 2 ** attempt seconds, capped to max_backoff
+    backoff_factor: float = 1
+    max_backoff: float = 60
+    # a rate limited request is retried when the window resets, unless it resets later than this
+    max_reset_wait: float = 15 * 60
+    status_codes: Set[int] = {429, 500, 502, 503, 504}
+    # only idempotent reads are retried, mutations like CreateTweet could be applied twice
+    operations: Set[str] = {'HomeTimeline', 'Viewer'}
+
+
+class RetryPolicy:
+    __options: RetryOptions
+
+    def __init__(self, options: RetryOptions | None = None) -> None:
+        self.__options = options or RetryOptions()
+
+    @property
+    def options(self) -> RetryOptions:
+        return self.__options
+
+    def can_retry(self, operation: str, attempt: int) -> bool:
+        return operation in self.__options.operations and attempt < self.__options.max_retries
+
+    def should_retry(self, operation: str, status_code: int, attempt: int) -> bool:
+        return status_code in self.__options.status_codes and self.can_retry(operation, attempt)
+
+    def get_delay(self, attempt: int, quota: RateLimitQuota | None = None) -> float | None:
+        """
+        Get the seconds to wait before the next attempt, None if the request should not be retried
+        """
+        if quota is not None and quota.remaining <= 0 and quota.reset_in > 0:
+            if quota.reset_in > self.__options.max_reset_wait:
+                logger.warning('Rate limit window resets in %.0f seconds, giving up', quota.reset_in)
+                return None
+
+            return quota.reset_in
+
+        backoff = min(self.__options.max_backoff, self.__options.backoff_factor * 2 ** attempt)
+
+        # jittered, so that concurrent clients do not retry in lockstep
+        return random.uniform(backoff / 2, backoff)
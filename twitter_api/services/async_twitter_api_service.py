@@ -0,0 +1,95 @@
+from functools import wraps
+from typing import AsyncGenerator, List
+
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_home_timeline_models import (
+    TwitterHomeTimelineResponseModel, TwitterTweetModel
+)
+from twitter_api.models.twitter_tweets_models import CreateTweetItem, TwitterTweetActionResultModel
+from twitter_api.services.modules.auth.async_twitter_auth_api_module import AsyncTwitterAuthAPIModule
+from twitter_api.services.modules.timeline.async_twitter_home_timeline_api_module import (
+    AsyncTwitterHomeTimelineAPIModule
+)
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import SortType
+from twitter_api.services.modules.tweets.async_twitter_tweets_api_module import AsyncTwitterTweetsAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import DEFAULT_BULK_CONCURRENCY
+
+logger = get_logger(__name__)
+
+
+def authenticated(func):
+    @wraps(func)
+    def wrapper(self: 'AsyncTwitterAPIService', *args, **kwargs):
+        if self.is_authenticated:
+            return func(self, *args, **kwargs)
+        else:
+            raise ValueError("Not authenticated. Please log in before using this method.")
+
+    return wrapper
+
+
+class AsyncTwitterAPIService:
+    __twitter_auth_api_module: AsyncTwitterAuthAPIModule
+    __twitter_tweets_api_module: AsyncTwitterTweetsAPIModule
+    __twitter_home_timeline_api_module: AsyncTwitterHomeTimelineAPIModule
+
+    def __init__(
+            self,
+            twitter_auth_api_module: AsyncTwitterAuthAPIModule,
+            twitter_tweets_api_module: AsyncTwitterTweetsAPIModule,
+            twitter_home_timeline_api_module: AsyncTwitterHomeTimelineAPIModule):
+        self.__twitter_home_timeline_api_module = twitter_home_timeline_api_module
+        self.__twitter_tweets_api_module = twitter_tweets_api_module
+        self.__twitter_auth_api_module = twitter_auth_api_module
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.__twitter_auth_api_module.is_authenticated
+
+    async def login(
+            self, user_id: str, alternate_id: str, password: str, persist_session: bool = True, auto_auth: bool = True) -> bool:
+        return await self.__twitter_auth_api_module.login(user_id, alternate_id, password, persist_session, auto_auth)
+
+    @authenticated
+    def get_home_timeline_tweets_stream(
+            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            prefetch: int = 0, stop_at_known_tweet: bool = False) -> AsyncGenerator[TwitterTweetModel, None]:
+        return self.__twitter_home_timeline_api_module.get_home_timeline_tweets_stream(count, cursor, sort, prefetch, stop_at_known_tweet)
+
+    @authenticated
+    def get_home_timeline_tweets_incremental(
+            self, count: int = 20, cursor: str | None = None) -> AsyncGenerator[TwitterTweetModel, None]:
+        return self.__twitter_home_timeline_api_module.get_home_timeline_tweets_incremental(count, cursor)
+
+    @authenticated
+    def get_home_timeline_stream(
+            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            prefetch: int = 0, stop_at_known_tweet: bool = False) -> AsyncGenerator[TwitterHomeTimelineResponseModel, None]:
+        return self.__twitter_home_timeline_api_module.get_home_timeline_stream(count, cursor, sort, prefetch, stop_at_known_tweet)
+
+    @authenticated
+    async def get_home_timeline(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            use_cache: bool = True) -> TwitterHomeTimelineResponseModel | None:
+        return await self.__twitter_home_timeline_api_module.get_home_timeline(count, cursor, sort, use_cache)
+
+    @authenticated
+    async def create_tweet(self, content: str, in_reply_to_tweet_id: str | None = None) -> str | None:
+        return await self.__twitter_tweets_api_module.create_tweet(content, in_reply_to_tweet_id)
+
+    @authenticated
+    async def favorite_tweet(self, tweet_id: str) -> bool:
+        return await self.__twitter_tweets_api_module.favorite_tweet(tweet_id)
+
+    @authenticated
+    async def create_tweets(
+            self, items: List[CreateTweetItem], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        return await self.__twitter_tweets_api_module.create_tweets(items, concurrency)
+
+    @authenticated
+    async def favorite_tweets(
+            self, tweet_ids: List[str], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        return await self.__twitter_tweets_api_module.favorite_tweets(tweet_ids, concurrency)
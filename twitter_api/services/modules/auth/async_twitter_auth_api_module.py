@@ -0,0 +1,111 @@
+from twitter_api.async_twitter_client import AsyncTwitterClient
+from twitter_api.graphql_operations import (
+    DEFAULT_GRAPHQL_OPERATION_REGISTRY, VIEWER_OPERATION, GraphQLOperationRegistry
+)
+from twitter_api.logger import get_logger
+from twitter_api.services.modules.auth.session.cookies_cache_service_interface import (
+    CookiesCacheServiceInterface
+)
+from twitter_api.services.modules.auth.session.local_cookies_cache_service import (
+    LocalCookiesCacheService
+)
+from twitter_api.services.modules.auth.twitter_auth_api_module import (
+    SESSION_COOKIES, TwitterAuthAPIModule
+)
+from twitter_api.services.modules.auth.twitter_auth_context import (
+    TW_AUTH_FLOWS_TO_STATES, AsyncTwitterAuthenticationContext, TwitterAuthFlows
+)
+
+logger = get_logger(__name__)
+
+
+class AsyncTwitterAuthAPIModule:
+    __twitter_client: AsyncTwitterClient
+    __cookies_cache_service: CookiesCacheServiceInterface
+    __graphql_operations: GraphQLOperationRegistry
+    __is_authenticated: bool = False
+
+    def __init__(
+            self,
+            twitter_client: AsyncTwitterClient,
+            cookies_cache_service: CookiesCacheServiceInterface = LocalCookiesCacheService(),
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY):
+        self.__twitter_client = twitter_client
+        self.__cookies_cache_service = cookies_cache_service
+        self.__graphql_operations = graphql_operations
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.__is_authenticated
+
+    async def login(
+            self, user_id: str, alternate_id: str, password: str, persist_session: bool = True, auto_auth: bool = True) -> bool:
+        """
+        Login to twitter account, persist session by default using cookies cache service with local strategy
+        """
+        if (
+            persist_session and
+            self.__cookies_cache_service.load_if_valid(self.__twitter_client, user_id, cookies_to_check=SESSION_COOKIES)
+        ):
+            logger.info('Loaded cookies from cache')
+
+            self.__is_authenticated = True
+
+            return self.__is_authenticated
+
+        if not auto_auth:
+            logger.warning('Auto auth disabled, exiting...')
+            return False
+
+        auth_context = AsyncTwitterAuthenticationContext(self.__twitter_client, user_id, alternate_id, password)
+
+        while True:
+            flow_token, subtask_id = await auth_context.handle()
+
+            if subtask_id == TwitterAuthFlows.LOGIN_SUCCESS_SUBTASK.value:
+                logger.info('Successfully authenticated')
+
+                if not await self.get_viewer(use_cache=False):
+                    logger.warning('Could not get viewer: crsf token with a short expiration time will be used')
+
+                if persist_session:
+                    self.__cookies_cache_service.save_cookies(self.__twitter_client, user_id)
+
+                self.__is_authenticated = True
+
+                return self.__is_authenticated
+
+            if subtask_id == TwitterAuthFlows.LOGIN_FAILURE_SUBTASK.value:
+                logger.info('Authentication failed')
+
+                return False
+
+            elif subtask_id is None:
+                logger.warning('Next flow is not defined')
+                return False
+
+            next_flow = TW_AUTH_FLOWS_TO_STATES.get(subtask_id)
+
+            if next_flow is None:
+                logger.warning('Flow not handled: %s', subtask_id)
+                return False
+
+            auth_context.flow_token = flow_token
+            auth_context.subtask_id = subtask_id
+
+            auth_context.set_flow(next_flow)
+
+    async def get_viewer(self, use_cache: bool = True) -> bool:
+        """
+        This method is only used to request a new csrf token with a longer expiration time (1 year).
+        A cached response sets no cookie: the session renewals always bypass the cache.
+        """
+        operation = self.__graphql_operations.get(VIEWER_OPERATION)
+
+        response = await self.__twitter_client.request(
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            params=TwitterAuthAPIModule.build_viewer_params(operation),
+            use_cache=use_cache)
+
+        return response.is_success
@@ -0,0 +1,61 @@
+import os
+import threading
+from collections import OrderedDict
+from http.cookiejar import CookieJar
+from typing import Tuple
+
+DEFAULT_COOKIE_JAR_CACHE_SIZE: int = 1024
+
+# modification time in nanoseconds and size of the file the jar was read from
+FileVersion = Tuple[int, int]
+
+
+class CookieJarCache:
+    """
+    In-memory LRU of the cookie jars read from the cache files, an entry is used only while the file
+    keeps the same modification time and size, so that a jar written by another process is read again
+    """
+
+    __max_size: int
+    __jars: 'OrderedDict[str, Tuple[FileVersion, CookieJar]]'
+    __lock: threading.Lock
+
+    def __init__(self, max_size: int = DEFAULT_COOKIE_JAR_CACHE_SIZE) -> None:
+        self.__max_size = max_size
+        self.__jars = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def get_file_version(path: str) -> FileVersion | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: str, version: FileVersion) -> CookieJar | None:
+        with self.__lock:
+            entry = self.__jars.get(key)
+
+            if entry is None or entry[0] != version:
+                return None
+
+            self.__jars.move_to_end(key)
+
+            return entry[1]
+
+    def put(self, key: str, version: FileVersion, cookies: CookieJar) -> None:
+        if self.__max_size <= 0:
+            return
+
+        with self.__lock:
+            self.__jars[key] = (version, cookies)
+            self.__jars.move_to_end(key)
+
+            while len(self.__jars) > self.__max_size:
+                self.__jars.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self.__lock:
+            self.__jars.pop(key, None)
@@ -1,6 +1,27 @@
 
-from typing import List
+import time
+from http.cookiejar import Cookie
+from typing import Any, Dict, Iterable, List, Mapping, Protocol
+
 import requests
+from requests.cookies import RequestsCookieJar
+
+from twitter_api.logger import get_logger
+
+logger = get_logger(__name__)
+
+# cookies that must be present and not expired to restore a persisted session
+SESSION_COOKIES: List[str] = ['auth_token', 'ct0', 'guest_id', 'kdt', 'twid']
+
+
+class CookiesSession(Protocol):
+    """
+    Anything exposing a requests cookie jar: a requests.Session or an AsyncTwitterClient
+    """
+
+    @property
+    def cookies(self) -> RequestsCookieJar:
+        ...
 
 
 class CookiesCacheServiceInterface:
@@ -10,10 +31,10 @@ class CookiesCacheServiceInterface:
     and store the cookies in a database, in a remote server, etc.
     """
 
-    def save_cookies(self, session: requests.Session, key: str) -> None:
+    def save_cookies(self, session: CookiesSession, key: str) -> None:
         raise NotImplementedError
 
-    def load_cookies(self, session: requests.Session, key: str) -> None:
+    def load_cookies(self, session: CookiesSession, key: str) -> None:
         raise NotImplementedError
 
     def cookies_exists(self, key: str) -> bool:
@@ -22,8 +43,69 @@ class CookiesCacheServiceInterface:
     def delete_cookies(self, key: str) -> None:
         raise NotImplementedError
 
-    def refresh_cookies(self, session: requests.Session, key: str):
+    def refresh_cookies(self, session: CookiesSession, key: str):
         raise NotImplementedError
 
     def are_cookies_valid(self, key: str, cookies_to_check: List[str] | None = None) -> bool:
         raise NotImplementedError
+
+    def load_if_valid(self, session: CookiesSession, key: str, cookies_to_check: List[str] | None = None) -> bool:
+        """
+        Load the cookies in the session only if they exist and are not expired, returns whether they were loaded.
+        Implementations should override it to read the stored cookies once.
+        """
+        if not self.cookies_exists(key) or not self.are_cookies_valid(key, cookies_to_check):
+            return False
+
+        self.load_cookies(session, key)
+
+        return True
+
+    def load_many(
+            self, sessions: Mapping[str, CookiesSession], cookies_to_check: List[str] | None = None) -> Dict[str, bool]:
+        """
+        load_if_valid for many sessions, returns whether each session was loaded
+        """
+        return {key: self.load_if_valid(session, key, cookies_to_check) for key, session in sessions.items()}
+
+    def save_many(self, sessions: Mapping[str, CookiesSession]) -> None:
+        for key, session in sessions.items():
+            self.save_cookies(session, key)
+
+
+def are_cookies_not_expired(cookies: Iterable[Cookie], cookies_to_check: List[str] | None = None) -> bool:
+    now = time.time()
+
+    for cookie in cookies:
+        if cookies_to_check and cookie.name not in cookies_to_check:
+            continue
+
+        if cookie.expires and cookie.expires <= now:
+            logger.warning("Cookie expired")
+            return False
+
+    return True
+
+
+def cookie_to_dict(cookie: Cookie) -> Dict[str, Any]:
+    """
+    Serializable form of a cookie, the keys are the arguments of requests.cookies.create_cookie
+    """
+    return {
+        'version': cookie.version,
+        'name': cookie.name,
+        'value': cookie.value,
+        'port': cookie.port,
+        'domain': cookie.domain,
+        'path': cookie.path,
+        'secure': cookie.secure,
+        'expires': cookie.expires,
+        'discard': cookie.discard,
+        'comment': cookie.comment,
+        'comment_url': cookie.comment_url,
+        'rfc2109': cookie.rfc2109,
+    }
+
+
+def cookie_from_dict(cookie_dict: Dict[str, Any]) -> Cookie:
+    return requests.cookies.create_cookie(**cookie_dict)  # type: ignore
@@ -0,0 +1,68 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Generator
+
+from twitter_api.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:
+    # windows, os.replace alone keeps the writes atomic
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# version written in the header of the cookies files, files written without header are version 0
+COOKIES_FILE_VERSION: int = 1
+
+# a single lock file per directory, shared by the cookies files of every key, so that no file is left per key
+LOCK_FILE_NAME: str = '.cookies.lock'
+
+
+def is_supported_version(version: int, path: str) -> bool:
+    if version > COOKIES_FILE_VERSION:
+        logger.warning('Ignoring cookies file %s written with a newer format version %d', path, version)
+        return False
+
+    return True
+
+
+@contextmanager
+def locked(path: str) -> Generator[None, None, None]:
+    """
+    Advisory lock shared by every process writing a cookies file in the directory of `path`
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(os.path.join(os.path.dirname(path), LOCK_FILE_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Write to a temporary file of the same directory then rename it, readers see the previous or the new file,
+    never a partial one
+    """
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{name}.', dir=directory or '.')
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        raise
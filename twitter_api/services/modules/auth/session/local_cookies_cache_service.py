@@ -1,14 +1,16 @@
 import os
 import pickle
-from datetime import datetime
+from contextlib import suppress
 from http.cookiejar import CookieJar
 from typing import List
 
-import requests
-
 from twitter_api.logger import get_logger
+from twitter_api.services.modules.auth.session.cookie_jar_cache import DEFAULT_COOKIE_JAR_CACHE_SIZE, CookieJarCache
 from twitter_api.services.modules.auth.session.cookies_cache_service_interface import (
-    CookiesCacheServiceInterface
+    CookiesCacheServiceInterface, CookiesSession, are_cookies_not_expired
+)
+from twitter_api.services.modules.auth.session.cookies_file import (
+    COOKIES_FILE_VERSION, is_supported_version, locked, write_atomic
 )
 
 logger = get_logger(__name__)
@@ -17,8 +19,9 @@ logger = get_logger(__name__)
 class LocalCookiesCacheService(CookiesCacheServiceInterface):
     __base_dir = '.sessions'
     __file_format = '.pkr'
+    __cache: CookieJarCache
 
-    def __init__(self, base_dir: str | None = None):
+    def __init__(self, base_dir: str | None = None, cache_size: int = DEFAULT_COOKIE_JAR_CACHE_SIZE):
         # use the default base dir if no base dir is provided
         if base_dir:
             self.__base_dir = base_dir
@@ -26,42 +29,86 @@ class LocalCookiesCacheService(CookiesCacheServiceInterface):
         if not os.path.exists(self.__base_dir):
             os.makedirs(self.__base_dir)
 
+        self.__cache = CookieJarCache(cache_size)
+
     def build_path(self, key: str) -> str:
         return f'{self.__base_dir}/{key}{self.__file_format}'
 
-    def save_cookies(self, session: requests.Session, key: str) -> None:
-        with open(self.build_path(key), 'wb') as f:
-            pickle.dump(session.cookies, f)
+    def save_cookies(self, session: CookiesSession, key: str) -> None:
+        self.__cache.discard(key)
+        path = self.build_path(key)
+        data = pickle.dumps({'version': COOKIES_FILE_VERSION, 'cookies': session.cookies})
+
+        with locked(path):
+            write_atomic(path, data)
+
+    def load_cookies(self, session: CookiesSession, key: str) -> None:
+        cookies = self.__read_cookies(key)
+
+        if cookies is None:
+            raise FileNotFoundError(self.build_path(key))
+
+        session.cookies.update(cookies)
+
+    def load_if_valid(self, session: CookiesSession, key: str, cookies_to_check: List[str] | None = None) -> bool:
+        cookies = self.__read_cookies(key)
+
+        if cookies is None or not are_cookies_not_expired(cookies, cookies_to_check):
+            return False
 
-    def load_cookies(self, session: requests.Session, key: str) -> None:
-        with open(self.build_path(key), 'rb') as f:
-            session.cookies.update(pickle.load(f))
+        session.cookies.update(cookies)
+
+        return True
 
     def cookies_exists(self, key: str) -> bool:
         return os.path.exists(self.build_path(key))
 
     def delete_cookies(self, key: str) -> None:
-        os.remove(self.build_path(key))
+        self.__cache.discard(key)
+        path = self.build_path(key)
 
-    def refresh_cookies(self, session: requests.Session, key: str):
-        if self.cookies_exists(key):
-            self.delete_cookies(key)
+        # another worker may have deleted the file since it was found, e.g. after the same rejected session
+        with locked(path), suppress(FileNotFoundError):
+            os.remove(path)
 
+    def refresh_cookies(self, session: CookiesSession, key: str):
+        # the file is replaced atomically, deleting it first would let other workers see no session
         self.save_cookies(session, key)
 
     def are_cookies_valid(self, key: str, cookies_to_check: List[str] | None = None) -> bool:
-        try:
-            with open(self.build_path(key), 'rb') as f:
-                cookies: CookieJar = pickle.load(f)
-        except (FileNotFoundError, EOFError):
-            return False
+        cookies = self.__read_cookies(key)
 
-        for cookie in cookies:
-            if cookies_to_check and cookie.name not in cookies_to_check:
-                continue
+        return cookies is not None and are_cookies_not_expired(cookies, cookies_to_check)
 
-            if cookie.expires and cookie.expires <= datetime.utcnow().timestamp():
-                logger.warning("Cookie expired")
-                return False
+    def __read_cookies(self, key: str) -> CookieJar | None:
+        """
+        Read the jar once per version of the file, None if the file does not exist or is truncated
+        """
+        path = self.build_path(key)
+        version = CookieJarCache.get_file_version(path)
 
-        return True
+        if version is None:
+            return None
+
+        cookies = self.__cache.get(key, version)
+
+        if cookies is not None:
+            return cookies
+
+        try:
+            with open(path, 'rb') as f:
+                content = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # version 0 files are the pickled jar without header
+        if isinstance(content, CookieJar):
+            cookies = content
+        elif is_supported_version(content['version'], path):
+            cookies = content['cookies']
+        else:
+            return None
+
+        self.__cache.put(key, version, cookies)
+
+        return cookies
@@ -1,14 +1,16 @@
 import json
 import os
-from datetime import datetime
+from contextlib import suppress
 from http.cookiejar import CookieJar
 from typing import List
 
-import requests
-
 from twitter_api.logger import get_logger
+from twitter_api.services.modules.auth.session.cookie_jar_cache import DEFAULT_COOKIE_JAR_CACHE_SIZE, CookieJarCache
 from twitter_api.services.modules.auth.session.cookies_cache_service_interface import (
-    CookiesCacheServiceInterface
+    CookiesCacheServiceInterface, CookiesSession, are_cookies_not_expired, cookie_from_dict, cookie_to_dict
+)
+from twitter_api.services.modules.auth.session.cookies_file import (
+    COOKIES_FILE_VERSION, is_supported_version, locked, write_atomic
 )
 
 logger = get_logger(__name__)
@@ -17,8 +19,9 @@ logger = get_logger(__name__)
 class LocalCookiesCacheService(CookiesCacheServiceInterface):
     __base_dir = '.sessions'
     __file_format = '.json'
+    __cache: CookieJarCache
 
-    def __init__(self, base_dir: str | None = None):
+    def __init__(self, base_dir: str | None = None, cache_size: int = DEFAULT_COOKIE_JAR_CACHE_SIZE):
         # use the default base dir if no base dir is provided
         if base_dir:
             self.__base_dir = base_dir
@@ -26,67 +29,91 @@ class LocalCookiesCacheService(CookiesCacheServiceInterface):
         if not os.path.exists(self.__base_dir):
             os.makedirs(self.__base_dir)
 
+        self.__cache = CookieJarCache(cache_size)
+
     def build_path(self, key: str) -> str:
         return f'{self.__base_dir}/{key}{self.__file_format}'
 
-    def save_cookies(self, session: requests.Session, key: str) -> None:
-        cookies = []
-
-        for cookie in session.cookies:
-            cookie_dict = {
-                'version': cookie.version,
-                'name': cookie.name,
-                'value': cookie.value,
-                'port': cookie.port,
-                'domain': cookie.domain,
-                'path': cookie.path,
-                'secure': cookie.secure,
-                'expires': cookie.expires,
-                'discard': cookie.discard,
-                'comment': cookie.comment,
-                'comment_url': cookie.comment_url,
-                'rfc2109': cookie.rfc2109,
-            }
-
-            cookies.append(cookie_dict)
-
-        with open(self.build_path(key), 'w') as f:
-            json.dump(cookies, f)
-
-    def load_cookies(self, session: requests.Session, key: str) -> None:
-        with open(self.build_path(key), 'rb') as f:
-            for cookie in json.load(f):
-                session.cookies.set_cookie(
-                    requests.cookies.create_cookie(**cookie)  # type: ignore
-                )
+    def save_cookies(self, session: CookiesSession, key: str) -> None:
+        self.__cache.discard(key)
+        path = self.build_path(key)
+        cookies = [cookie_to_dict(cookie) for cookie in session.cookies]
+        data = json.dumps({'version': COOKIES_FILE_VERSION, 'cookies': cookies}).encode()
 
-    def are_cookies_valid(self, key: str, cookies_to_check: List[str] | None = None) -> bool:
-        try:
-            cookies = CookieJar()
-            with open(self.build_path(key), 'rb') as f:
-                for cookie in json.load(f):
-                    cookies.set_cookie(requests.cookies.create_cookie(**cookie))  # type: ignore
+        with locked(path):
+            write_atomic(path, data)
+
+    def load_cookies(self, session: CookiesSession, key: str) -> None:
+        cookies = self.__read_cookies(key)
 
-            for cookie in cookies:
-                if cookies_to_check and cookie.name not in cookies_to_check:
-                    continue
+        if cookies is None:
+            raise FileNotFoundError(self.build_path(key))
 
-                if cookie.expires and cookie.expires <= datetime.utcnow().timestamp():
-                    logger.warning("Cookie expired")
-                    return False
+        session.cookies.update(cookies)
 
-            return True
-        except (FileNotFoundError, EOFError):
+    def load_if_valid(self, session: CookiesSession, key: str, cookies_to_check: List[str] | None = None) -> bool:
+        cookies = self.__read_cookies(key)
+
+        if cookies is None or not are_cookies_not_expired(cookies, cookies_to_check):
             return False
 
-    def refresh_cookies(self, session: requests.Session, key: str):
-        if self.cookies_exists(key):
-            self.delete_cookies(key)
+        session.cookies.update(cookies)
+
+        return True
+
+    def are_cookies_valid(self, key: str, cookies_to_check: List[str] | None = None) -> bool:
+        cookies = self.__read_cookies(key)
+
+        return cookies is not None and are_cookies_not_expired(cookies, cookies_to_check)
 
+    def refresh_cookies(self, session: CookiesSession, key: str):
+        # the file is replaced atomically, deleting it first would let other workers see no session
         self.save_cookies(session, key)
 
     def cookies_exists(self, key: str) -> bool:
         return os.path.exists(self.build_path(key))
 
     def delete_cookies(self, key: str) -> None:
-        os.remove(self.build_path(key))
+        self.__cache.discard(key)
+        path = self.build_path(key)
+
+        # another worker may have deleted the file since it was found, e.g. after the same rejected session
+        with locked(path), suppress(FileNotFoundError):
+            os.remove(path)
+
+    def __read_cookies(self, key: str) -> CookieJar | None:
+        """
+        Read the jar once per version of the file, None if the file does not exist or is not a complete document
+        """
+        path = self.build_path(key)
+        version = CookieJarCache.get_file_version(path)
+
+        if version is None:
+            return None
+
+        cookies = self.__cache.get(key, version)
+
+        if cookies is not None:
+            return cookies
+
+        try:
+            with open(path, 'rb') as f:
+                content = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # version 0 files are the list of cookies without header
+        if isinstance(content, dict):
+            if not is_supported_version(content['version'], path):
+                return None
+
+            content = content['cookies']
+
+        cookies = CookieJar()
+
+        for cookie in content:
+            cookies.set_cookie(cookie_from_dict(cookie))
+
+        self.__cache.put(key, version, cookies)
+
+        return cookies
@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from http.cookiejar import Cookie, CookieJar
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from twitter_api.logger import get_logger
+from twitter_api.services.modules.auth.session.cookies_cache_service_interface import (
+    SESSION_COOKIES, CookiesCacheServiceInterface, CookiesSession, are_cookies_not_expired, cookie_from_dict,
+    cookie_to_dict
+)
+
+logger = get_logger(__name__)
+
+# stay well below the sqlite limit of host parameters of a single statement
+MAX_QUERY_PARAMETERS: int = 500
+# milliseconds a connection waits for the lock held by another process before failing
+BUSY_TIMEOUT: int = 5000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cookies (
+    key TEXT PRIMARY KEY,
+    cookies TEXT NOT NULL,
+    expires_at REAL,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS cookies_expires_at ON cookies (expires_at);
+'''
+
+UPSERT_COOKIES = '''
+INSERT INTO cookies (key, cookies, expires_at, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    cookies = excluded.cookies,
+    expires_at = excluded.expires_at,
+    updated_at = excluded.updated_at
+'''
+
+
+class SqliteCookiesCacheService(CookiesCacheServiceInterface):
+    """
+    Cookies of every account in a single sqlite database, one row per key with the earliest expiration
+    of its session cookies indexed. The database is in WAL mode, so many workers can share it.
+    """
+
+    __path = '.sessions/cookies.db'
+    __session_cookies: List[str]
+    __connection: sqlite3.Connection
+    __lock: threading.Lock
+
+    def __init__(self, path: str | None = None, session_cookies: List[str] | None = None):
+        """
+        session_cookies: the cookies whose expiration is indexed, the ones checked when a session is restored;
+        the other cookies, e.g. short lived tracking cookies, do not make a session expire
+        """
+        # use the default path if no path is provided
+        if path:
+            self.__path = path
+
+        self.__session_cookies = session_cookies if session_cookies is not None else SESSION_COOKIES
+
+        directory = os.path.dirname(self.__path)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(self.__path, timeout=BUSY_TIMEOUT / 1000, check_same_thread=False)
+
+        with self.__lock, self.__connection:
+            self.__connection.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT}')
+
+            if self.__path != ':memory:':
+                self.__connection.execute('PRAGMA journal_mode = WAL')
+
+            self.__connection.executescript(SCHEMA)
+
+    def save_cookies(self, session: CookiesSession, key: str) -> None:
+        self.save_many({key: session})
+
+    def save_many(self, sessions: Mapping[str, CookiesSession]) -> None:
+        """
+        Save the cookies of many sessions in a single transaction
+        """
+        now = time.time()
+        rows = [(key, *self.__serialize(session.cookies), now) for key, session in sessions.items()]
+
+        with self.__lock, self.__connection:
+            self.__connection.executemany(UPSERT_COOKIES, rows)
+
+    def load_cookies(self, session: CookiesSession, key: str) -> None:
+        cookies = self.__select_cookies([key]).get(key)
+
+        if cookies is None:
+            raise KeyError(key)
+
+        session.cookies.update(cookies)
+
+    def load_if_valid(self, session: CookiesSession, key: str, cookies_to_check: List[str] | None = None) -> bool:
+        return self.load_many({key: session}, cookies_to_check)[key]
+
+    def load_many(
+            self, sessions: Mapping[str, CookiesSession], cookies_to_check: List[str] | None = None) -> Dict[str, bool]:
+        """
+        Load the valid cookies of many sessions with a single query, returns whether each session was loaded
+        """
+        cookies_by_key = self.__select_cookies(list(sessions))
+        loaded: Dict[str, bool] = {}
+
+        for key, session in sessions.items():
+            cookies = cookies_by_key.get(key)
+            loaded[key] = cookies is not None and are_cookies_not_expired(cookies, cookies_to_check)
+
+            if loaded[key]:
+                session.cookies.update(cookies)
+
+        return loaded
+
+    def cookies_exists(self, key: str) -> bool:
+        with self.__lock:
+            return self.__connection.execute('SELECT 1 FROM cookies WHERE key = ?', (key,)).fetchone() is not None
+
+    def delete_cookies(self, key: str) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute('DELETE FROM cookies WHERE key = ?', (key,))
+
+    def refresh_cookies(self, session: CookiesSession, key: str):
+        # the upsert replaces the row atomically
+        self.save_cookies(session, key)
+
+    def are_cookies_valid(self, key: str, cookies_to_check: List[str] | None = None) -> bool:
+        cookies = self.__select_cookies([key]).get(key)
+
+        return cookies is not None and are_cookies_not_expired(cookies, cookies_to_check)
+
+    def get_expiring_keys(self, within: float = 0) -> List[str]:
+        """
+        Keys with at least a session cookie expired or expiring in the next `within` seconds, with a single indexed query
+        """
+        deadline = time.time() + within
+
+        with self.__lock:
+            cursor = self.__connection.execute(
+                'SELECT key FROM cookies WHERE expires_at <= ? ORDER BY expires_at', (deadline,))
+
+            return [row[0] for row in cursor]
+
+    def get_keys(self) -> List[str]:
+        with self.__lock:
+            return [row[0] for row in self.__connection.execute('SELECT key FROM cookies ORDER BY key')]
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def __select_cookies(self, keys: List[str]) -> Dict[str, CookieJar]:
+        rows = []
+
+        with self.__lock:
+            for start in range(0, len(keys), MAX_QUERY_PARAMETERS):
+                chunk = keys[start:start + MAX_QUERY_PARAMETERS]
+                placeholders = ', '.join('?' * len(chunk))
+
+                rows += self.__connection.execute(
+                    f'SELECT key, cookies FROM cookies WHERE key IN ({placeholders})', chunk).fetchall()
+
+        return {key: self.__deserialize(cookies) for key, cookies in rows}
+
+    def __serialize(self, cookies: Iterable[Cookie]) -> Tuple[str, float | None]:
+        cookie_dicts = [cookie_to_dict(cookie) for cookie in cookies]
+        expirations = [
+            cookie['expires'] for cookie in cookie_dicts
+            if cookie['expires'] and (not self.__session_cookies or cookie['name'] in self.__session_cookies)
+        ]
+
+        return json.dumps(cookie_dicts), min(expirations) if expirations else None
+
+    @staticmethod
+    def __deserialize(data: str) -> CookieJar:
+        cookies = CookieJar()
+
+        for cookie_dict in json.loads(data):
+            cookies.set_cookie(cookie_from_dict(cookie_dict))
+
+        return cookies
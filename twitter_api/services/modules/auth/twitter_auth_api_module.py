@@ -1,9 +1,11 @@
-import json
-from http import HTTPMethod
+from typing import Any, Dict, List, Tuple
 
+from twitter_api.graphql_operations import (
+    DEFAULT_GRAPHQL_OPERATION_REGISTRY, VIEWER_OPERATION, GraphQLOperation, GraphQLOperationRegistry
+)
 from twitter_api.logger import get_logger
 from twitter_api.services.modules.auth.session.cookies_cache_service_interface import (
-    CookiesCacheServiceInterface
+    SESSION_COOKIES, CookiesCacheServiceInterface
 )
 from twitter_api.services.modules.auth.session.local_cookies_cache_service import (
     LocalCookiesCacheService
@@ -11,50 +13,110 @@ from twitter_api.services.modules.auth.session.local_cookies_cache_service impor
 from twitter_api.services.modules.auth.twitter_auth_context import (
     TW_AUTH_FLOWS_TO_STATES, TwitterAuthenticationContext, TwitterAuthFlows
 )
+from twitter_api.session_keeper import SessionKeeper
 from twitter_api.twitter_client import TwitterClient
 
 logger = get_logger(__name__)
 
+VIEWER_VARIABLES: Dict[str, Any] = {
+    "withCommunitiesMemberships": True,
+    "withSubscribedTab": True,
+    "withCommunitiesCreation": True
+}
+
 
 class TwitterAuthAPIModule:
     __twitter_client: TwitterClient
     __cookies_cache_service: CookiesCacheServiceInterface
+    __session_keeper: SessionKeeper | None
+    __graphql_operations: GraphQLOperationRegistry
     __is_authenticated: bool = False
+    __credentials: Tuple[str, str, str] | None = None
+    __persist_session: bool = True
 
     def __init__(
             self,
             twitter_client: TwitterClient,
-            cookies_cache_service: CookiesCacheServiceInterface = LocalCookiesCacheService()):
+            cookies_cache_service: CookiesCacheServiceInterface = LocalCookiesCacheService(),
+            session_keeper: SessionKeeper | None = None,
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY):
         self.__twitter_client = twitter_client
         self.__cookies_cache_service = cookies_cache_service
+        self.__session_keeper = session_keeper
+        self.__graphql_operations = graphql_operations
 
     @property
     def is_authenticated(self) -> bool:
         return self.__is_authenticated
 
+    @property
+    def user_id(self) -> str | None:
+        return self.__credentials[0] if self.__credentials else None
+
     def login(self, user_id: str, alternate_id: str, password: str, persist_session: bool = True, auto_auth: bool = True) -> bool:
         """
         Login to twitter account, persist session by default using cookies cache service with local strategy
         """
+        self.__credentials = (user_id, alternate_id, password)
+        self.__persist_session = persist_session
+
         if (
             persist_session and
-            self.__cookies_cache_service.cookies_exists(user_id) and
-            self.__cookies_cache_service.are_cookies_valid(user_id, cookies_to_check=[
-                'auth_token', 'ct0', 'guest_id', 'kdt', 'twid'
-            ])
+            self.__cookies_cache_service.load_if_valid(self.__twitter_client.session, user_id, cookies_to_check=SESSION_COOKIES)
         ):
-            self.__cookies_cache_service.load_cookies(self.__twitter_client.session, user_id)
-
-            logger.info('Loading cookies from cache...')
+            logger.info('Loaded cookies from cache')
 
-            self.__is_authenticated = True
-
-            return self.__is_authenticated
+            return self.__set_authenticated()
 
         if not auto_auth:
             logger.warning('Auto auth disabled, exiting...')
             return False
 
+        return self.__authenticate()
+
+    def relogin(self) -> bool:
+        """
+        Run the authentication flow again with the credentials of the last login, the session
+        stays usable with its current cookies meanwhile
+        """
+        if self.__credentials is None:
+            raise ValueError("Not logged in. Please log in before logging in again.")
+
+        return self.__authenticate()
+
+    def refresh_session(self) -> bool:
+        """
+        Renew the csrf token with the Viewer query and persist the refreshed cookies
+        """
+        if not self.get_viewer(use_cache=False):
+            return False
+
+        if self.__persist_session and self.user_id is not None:
+            self.__cookies_cache_service.refresh_cookies(self.__twitter_client.session, self.user_id)
+
+        return True
+
+    def get_session_expiration(self, cookies_to_check: List[str]) -> float | None:
+        """
+        Earliest expiration timestamp of the cookies to check, 0 when one of them is missing
+        """
+        cookies = {cookie.name: cookie for cookie in self.__twitter_client.session.cookies if cookie.name in cookies_to_check}
+
+        if len(cookies) < len(set(cookies_to_check)):
+            return 0
+
+        return min((cookie.expires for cookie in cookies.values() if cookie.expires), default=None)
+
+    def __set_authenticated(self) -> bool:
+        self.__is_authenticated = True
+
+        if self.__session_keeper is not None:
+            self.__session_keeper.add(self)
+
+        return self.__is_authenticated
+
+    def __authenticate(self) -> bool:
+        user_id, alternate_id, password = self.__credentials
         auth_context = TwitterAuthenticationContext(self.__twitter_client, user_id, alternate_id, password)
 
         while True:
@@ -63,15 +125,13 @@ class TwitterAuthAPIModule:
             if subtask_id == TwitterAuthFlows.LOGIN_SUCCESS_SUBTASK.value:
                 logger.info('Successfully authenticated')
 
-                if not self.get_viewer():
+                if not self.get_viewer(use_cache=False):
                     logger.warning('Could not get viewer: crsf token with a short expiration time will be used')
 
-                if persist_session:
+                if self.__persist_session:
                     self.__cookies_cache_service.save_cookies(self.__twitter_client.session, user_id)
 
-                self.__is_authenticated = True
-
-                return self.__is_authenticated
+                return self.__set_authenticated()
 
             if subtask_id == TwitterAuthFlows.LOGIN_FAILURE_SUBTASK.value:
                 logger.info('Authentication failed')
@@ -85,7 +145,7 @@ class TwitterAuthAPIModule:
             next_flow = TW_AUTH_FLOWS_TO_STATES.get(subtask_id) if subtask_id is not None else None
 
             if next_flow is None:
-                logger.warning(f'Flow not handled: {subtask_id}')
+                logger.warning('Flow not handled: %s', subtask_id)
                 return False
 
             auth_context.flow_token = flow_token
@@ -93,31 +153,24 @@ class TwitterAuthAPIModule:
 
             auth_context.set_flow(next_flow)
 
-    def get_viewer(self):
+    def get_viewer(self, use_cache: bool = True):
         """
-        This method is only used to request a new csrf token with a longer expiration time (1 year)
+        This method is only used to request a new csrf token with a longer expiration time (1 year).
+        A cached response sets no cookie: the session renewals always bypass the cache.
         """
-        query_id = "5wNTkTJmk8GZlJmd2rL7eQ"
-        endpoint = f'{self.__twitter_client.gql_url}/{query_id}/Viewer'
-
-        # json.dumps is used to convert python dict to json string (required by twitter api to correctly parse variables)
-        params = {
-            'variables': json.dumps({
-                "withCommunitiesMemberships": True,
-                "withSubscribedTab": True,
-                "withCommunitiesCreation": True
-            }),
-            'features': json.dumps({
-                "responsive_web_graphql_exclude_directive_enabled": True,
-                "verified_phone_label_enabled": False,
-                "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
-                "responsive_web_graphql_timeline_navigation_enabled": True
-            }),
-            'fieldToggles': json.dumps({
-                "withAuxiliaryUserLabels": False
-            })
-        }
-
-        response = self.__twitter_client.request(HTTPMethod.GET, endpoint, params=params)
+        operation = self.__graphql_operations.get(VIEWER_OPERATION)
+
+        response = self.__twitter_client.request(
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            params=self.build_viewer_params(operation),
+            use_cache=use_cache)
 
         return response.is_success
+
+    @staticmethod
+    def build_viewer_params(operation: GraphQLOperation | None = None) -> str:
+        # variables, features and field toggles are json encoded (required by twitter api to correctly parse variables)
+        operation = operation or DEFAULT_GRAPHQL_OPERATION_REGISTRY.get(VIEWER_OPERATION)
+
+        return operation.build_params(VIEWER_VARIABLES)
@@ -2,6 +2,7 @@
 import enum
 from typing import Dict, Tuple
 
+from twitter_api.async_twitter_client import AsyncTwitterClient
 from twitter_api.logger import get_logger
 from twitter_api.services.modules.auth.twitter_auth_flows import (
     LoginJsInstrumentationSubtaskFlow, TwitterAbstractAuthenticationFlow,
@@ -34,25 +35,42 @@ TW_AUTH_FLOWS_TO_STATES: Dict[str, TwitterAbstractAuthenticationFlow] = {
 }
 
 
-class TwitterAuthenticationContext:
-    twitter_client: TwitterClient
+class TwitterBaseAuthenticationContext:
     user_id: str
     alternate_id: str
     password: str
     flow_token: str | None = None
     subtask_id: str | None = None
 
-    __flow: TwitterAbstractAuthenticationFlow
+    _flow: TwitterAbstractAuthenticationFlow
 
-    def __init__(self, twitter_client: TwitterClient, user_id: str, alternate_id: str, password: str):
-        self.__flow = TwitterInitAuthFlow()
-        self.twitter_client = twitter_client
+    def __init__(self, user_id: str, alternate_id: str, password: str):
+        self._flow = TwitterInitAuthFlow()
         self.user_id = user_id
         self.alternate_id = alternate_id
         self.password = password
 
+    def set_flow(self, flow: TwitterAbstractAuthenticationFlow) -> None:
+        self._flow = flow
+
+
+class TwitterAuthenticationContext(TwitterBaseAuthenticationContext):
+    twitter_client: TwitterClient
+
+    def __init__(self, twitter_client: TwitterClient, user_id: str, alternate_id: str, password: str):
+        super().__init__(user_id, alternate_id, password)
+        self.twitter_client = twitter_client
+
     def handle(self) -> Tuple[str | None, str | None]:
-        return self.__flow.handle(self)
+        return self._flow.handle(self)
 
-    def set_flow(self, flow: TwitterAbstractAuthenticationFlow) -> None:
-        self.__flow = flow
+
+class AsyncTwitterAuthenticationContext(TwitterBaseAuthenticationContext):
+    twitter_client: AsyncTwitterClient
+
+    def __init__(self, twitter_client: AsyncTwitterClient, user_id: str, alternate_id: str, password: str):
+        super().__init__(user_id, alternate_id, password)
+        self.twitter_client = twitter_client
+
+    async def handle(self) -> Tuple[str | None, str | None]:
+        return await self._flow.async_handle(self)
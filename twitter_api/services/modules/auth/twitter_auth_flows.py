@@ -3,15 +3,19 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Tuple
 
 if TYPE_CHECKING:
-    from twitter_api.services.modules.auth.twitter_auth_context import TwitterAuthenticationContext
+    from twitter_api.services.modules.auth.twitter_auth_context import (
+        AsyncTwitterAuthenticationContext, TwitterAuthenticationContext, TwitterBaseAuthenticationContext
+    )
 
 import abc
 import json
+import logging
 from http import HTTPMethod
 from typing import Any, Dict
 
 from twitter_api.logger import get_logger
 from twitter_api.models.twitter_models import TwitterFlowResponseModel
+from twitter_api.twitter_client import TwitterAPIResponse
 from twitter_api.utils import deep_merge
 
 logger = get_logger(__name__)
@@ -19,22 +23,30 @@ logger = get_logger(__name__)
 
 class TwitterAbstractAuthenticationFlow(abc.ABC):
     @abc.abstractmethod
-    def build_payload(self, context: TwitterAuthenticationContext) -> Dict[str, Any]:
+    def build_payload(self, context: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
         pass
 
     def handle(self, context: TwitterAuthenticationContext) -> Tuple[str | None, str | None]:
-        logger.debug(f'Executing {context.subtask_id or "Init Auth"} subtask')
+        logger.debug('Executing %s subtask', context.subtask_id or 'Init Auth')
 
-        payload = self.build_payload(context)
+        payload, params = self.__prepare_request(context)
 
-        if context.flow_token is not None and context.subtask_id is not None:
-            payload = deep_merge(payload, {
-                "flow_token": context.flow_token,
-            })
+        response = context.twitter_client.request(
+            HTTPMethod.POST,
+            f'{context.twitter_client.api_base_url_v_1_1}/onboarding/task.json',
+            params=params,
+            data=payload,
+            model_type=TwitterFlowResponseModel
+        )
 
-        params = {"flow_name": "login"} if context.flow_token is None else None
+        return self.__process_response(context, response)
 
-        response = context.twitter_client.request(
+    async def async_handle(self, context: AsyncTwitterAuthenticationContext) -> Tuple[str | None, str | None]:
+        logger.debug('Executing %s subtask', context.subtask_id or 'Init Auth')
+
+        payload, params = self.__prepare_request(context)
+
+        response = await context.twitter_client.request(
             HTTPMethod.POST,
             f'{context.twitter_client.api_base_url_v_1_1}/onboarding/task.json',
             params=params,
@@ -42,12 +54,31 @@ class TwitterAbstractAuthenticationFlow(abc.ABC):
             model_type=TwitterFlowResponseModel
         )
 
+        return self.__process_response(context, response)
+
+    def __prepare_request(
+            self, context: TwitterBaseAuthenticationContext) -> Tuple[Dict[str, Any], Dict[str, Any] | None]:
+        payload = self.build_payload(context)
+
+        if context.flow_token is not None and context.subtask_id is not None:
+            payload = deep_merge(payload, {
+                "flow_token": context.flow_token,
+            })
+
+        params = {"flow_name": "login"} if context.flow_token is None else None
+
+        return payload, params
+
+    def __process_response(
+            self,
+            context: TwitterBaseAuthenticationContext,
+            response: TwitterAPIResponse[TwitterFlowResponseModel]) -> Tuple[str | None, str | None]:
         if not response.is_success or response.data is None:
-            logger.error(f'Failed to execute {context.subtask_id} subtask')
-            logger.error(f'Response status code: {response.status_code}')
+            logger.error('Failed to execute %s subtask', context.subtask_id)
+            logger.error('Response status code: %s', response.status_code)
 
-            if response.errors:
-                logger.error(f'Response body: {json.dumps([e.model_dump() for e in response.errors], indent=4)}')
+            if response.errors and logger.isEnabledFor(logging.ERROR):
+                logger.error('Response body: %s', json.dumps([e.model_dump() for e in response.errors], indent=4))
 
             return None, None
 
@@ -57,7 +88,7 @@ class TwitterAbstractAuthenticationFlow(abc.ABC):
 
 
 class TwitterInitAuthFlow(TwitterAbstractAuthenticationFlow):
-    def build_payload(self, _: TwitterAuthenticationContext) -> Dict[str, Any]:
+    def build_payload(self, _: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
         return {
             "input_flow_data": {
                 "flow_context": {
@@ -76,7 +107,7 @@ class TwitterInitAuthFlow(TwitterAbstractAuthenticationFlow):
 
 
 class LoginJsInstrumentationSubtaskFlow(TwitterAbstractAuthenticationFlow):
-    def build_payload(self, context: TwitterAuthenticationContext) -> Dict[str, Any]:
+    def build_payload(self, context: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
         return {
             "subtask_inputs": [
                 {
@@ -87,7 +118,7 @@ class LoginJsInstrumentationSubtaskFlow(TwitterAbstractAuthenticationFlow):
 
 
 class TwitterEnterUserIdentifierSSOFlow(TwitterAbstractAuthenticationFlow):
-    def build_payload(self, context: TwitterAuthenticationContext) -> Dict[str, Any]:
+    def build_payload(self, context: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
         return {
             "subtask_inputs": [
                 {
@@ -111,7 +142,7 @@ class TwitterEnterUserIdentifierSSOFlow(TwitterAbstractAuthenticationFlow):
 
 
 class TwitterEnterAlternateIdentifierFlow(TwitterAbstractAuthenticationFlow):
-    def build_payload(self, context: TwitterAuthenticationContext) -> Dict[str, Any]:
+    def build_payload(self, context: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
         return {
             "subtask_inputs": [
                 {
@@ -126,7 +157,7 @@ class TwitterEnterAlternateIdentifierFlow(TwitterAbstractAuthenticationFlow):
 
 
 class TwitterEnterPasswordFlow(TwitterAbstractAuthenticationFlow):
-    def build_payload(self, context: TwitterAuthenticationContext) -> Dict[str, Any]:
+    def build_payload(self, context: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
         return {
             "subtask_inputs": [
                 {
@@ -141,7 +172,7 @@ class TwitterEnterPasswordFlow(TwitterAbstractAuthenticationFlow):
 
 
 class TwitterAccountDuplicationCheckFlow(TwitterAbstractAuthenticationFlow):
-    def build_payload(self, context: TwitterAuthenticationContext) -> Dict[str, Any]:
+    def build_payload(self, context: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
         return {
             "subtask_inputs": [
                 {
@@ -155,7 +186,7 @@ class TwitterAccountDuplicationCheckFlow(TwitterAbstractAuthenticationFlow):
 
 
 # class TwitterLoginACIDFlow(TwitterAbstractAuthenticationFlow):
-#     def build_payload(self, context: TwitterAuthenticationContext) -> Dict[str, Any]:
+#     def build_payload(self, context: TwitterBaseAuthenticationContext) -> Dict[str, Any]:
 #         return {
 #             "subtask_inputs": [
 #                 {
@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Set
+
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel, TwitterUserModel
+from twitter_api.services.modules.store.tweets_store_interface import TweetsStoreInterface
+
+logger = get_logger(__name__)
+
+# stay well below the sqlite limit of host parameters of a single statement
+MAX_QUERY_PARAMETERS: int = 500
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    rest_id TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    username TEXT NOT NULL,
+    description TEXT,
+    profile_image_url TEXT,
+    profile_banner_url TEXT,
+    verified INTEGER NOT NULL,
+    is_blue_verified INTEGER NOT NULL,
+    favourites_count INTEGER,
+    followers_count INTEGER,
+    friends_count INTEGER,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tweets (
+    rest_id TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    author_rest_id TEXT NOT NULL REFERENCES users (rest_id),
+    is_retweet INTEGER NOT NULL,
+    view_count INTEGER,
+    bookmark_count INTEGER,
+    favorite_count INTEGER,
+    quote_count INTEGER,
+    reply_count INTEGER,
+    retweet_count INTEGER,
+    favorited INTEGER NOT NULL,
+    bookmarked INTEGER NOT NULL,
+    retweeted INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    first_seen_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS tweets_created_at ON tweets (created_at);
+'''
+
+UPSERT_USER = '''
+INSERT INTO users (
+    rest_id, id, full_name, username, description, profile_image_url, profile_banner_url, verified,
+    is_blue_verified, favourites_count, followers_count, friends_count, updated_at
+) VALUES (
+    :rest_id, :id, :full_name, :username, :description, :profile_image_url, :profile_banner_url, :verified,
+    :is_blue_verified, :favourites_count, :followers_count, :friends_count, :updated_at
+)
+ON CONFLICT (rest_id) DO UPDATE SET
+    full_name = excluded.full_name,
+    username = excluded.username,
+    description = excluded.description,
+    profile_image_url = excluded.profile_image_url,
+    profile_banner_url = excluded.profile_banner_url,
+    verified = excluded.verified,
+    is_blue_verified = excluded.is_blue_verified,
+    favourites_count = excluded.favourites_count,
+    followers_count = excluded.followers_count,
+    friends_count = excluded.friends_count,
+    updated_at = excluded.updated_at
+'''
+
+UPSERT_TWEET = '''
+INSERT INTO tweets (
+    rest_id, id, author_rest_id, is_retweet, view_count, bookmark_count, favorite_count, quote_count, reply_count,
+    retweet_count, favorited, bookmarked, retweeted, content, lang, created_at, first_seen_at, updated_at
+) VALUES (
+    :rest_id, :id, :author_rest_id, :is_retweet, :view_count, :bookmark_count, :favorite_count, :quote_count, :reply_count,
+    :retweet_count, :favorited, :bookmarked, :retweeted, :content, :lang, :created_at, :updated_at, :updated_at
+)
+ON CONFLICT (rest_id) DO UPDATE SET
+    view_count = excluded.view_count,
+    bookmark_count = excluded.bookmark_count,
+    favorite_count = excluded.favorite_count,
+    quote_count = excluded.quote_count,
+    reply_count = excluded.reply_count,
+    retweet_count = excluded.retweet_count,
+    favorited = excluded.favorited,
+    bookmarked = excluded.bookmarked,
+    retweeted = excluded.retweeted,
+    updated_at = excluded.updated_at
+'''
+
+SELECT_TWEETS = '''
+SELECT t.*, u.id AS author_id, u.full_name, u.username, u.description, u.profile_image_url, u.profile_banner_url,
+       u.verified, u.is_blue_verified, u.favourites_count, u.followers_count, u.friends_count
+FROM tweets t JOIN users u ON u.rest_id = t.author_rest_id
+'''
+
+
+class SqliteTweetsStore(TweetsStoreInterface):
+    """
+    Tweets store backed by a single sqlite database, safe to share between threads
+    """
+
+    __path = '.store/tweets.db'
+    __connection: sqlite3.Connection
+    __lock: threading.Lock
+
+    def __init__(self, path: str | None = None):
+        # use the default path if no path is provided
+        if path:
+            self.__path = path
+
+        directory = os.path.dirname(self.__path)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(self.__path, check_same_thread=False)
+        self.__connection.row_factory = sqlite3.Row
+
+        with self.__lock, self.__connection:
+            if self.__path != ':memory:':
+                self.__connection.execute('PRAGMA journal_mode = WAL')
+
+            self.__connection.executescript(SCHEMA)
+
+    def save_tweets(self, tweets: Iterable[TwitterTweetModel]) -> int:
+        tweets = list(tweets)
+
+        if not tweets:
+            return 0
+
+        now = time.time()
+        users = {tweet.author.rest_id: self.__user_to_row(tweet.author, now) for tweet in tweets}
+        rows = {tweet.rest_id: self.__tweet_to_row(tweet, now) for tweet in tweets}
+
+        with self.__lock, self.__connection:
+            known_ids = self.__select_known_tweet_ids(list(rows))
+
+            self.__connection.executemany(UPSERT_USER, users.values())
+            self.__connection.executemany(UPSERT_TWEET, rows.values())
+
+        new_count = len(rows) - len(known_ids)
+
+        logger.debug('Stored %d tweets, %d new', len(rows), new_count)
+
+        return new_count
+
+    def get_known_tweet_ids(self, rest_ids: Iterable[str]) -> Set[str]:
+        with self.__lock:
+            return self.__select_known_tweet_ids(list(rest_ids))
+
+    def contains_tweet(self, rest_id: str) -> bool:
+        return len(self.get_known_tweet_ids([rest_id])) > 0
+
+    def get_tweet(self, rest_id: str) -> TwitterTweetModel | None:
+        with self.__lock:
+            row = self.__connection.execute(f'{SELECT_TWEETS} WHERE t.rest_id = ?', (rest_id,)).fetchone()
+
+        return self.__row_to_tweet(row) if row is not None else None
+
+    def get_user(self, rest_id: str) -> TwitterUserModel | None:
+        with self.__lock:
+            row = self.__connection.execute('SELECT * FROM users WHERE rest_id = ?', (rest_id,)).fetchone()
+
+        return self.__row_to_user(row, 'id') if row is not None else None
+
+    def get_latest_tweets(self, limit: int = 20) -> List[TwitterTweetModel]:
+        with self.__lock:
+            rows = self.__connection.execute(f'{SELECT_TWEETS} ORDER BY t.created_at DESC LIMIT ?', (limit,)).fetchall()
+
+        return [self.__row_to_tweet(row) for row in rows]
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def __select_known_tweet_ids(self, rest_ids: List[str]) -> Set[str]:
+        known_ids: Set[str] = set()
+
+        for start in range(0, len(rest_ids), MAX_QUERY_PARAMETERS):
+            chunk = rest_ids[start:start + MAX_QUERY_PARAMETERS]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor = self.__connection.execute(f'SELECT rest_id FROM tweets WHERE rest_id IN ({placeholders})', chunk)
+
+            known_ids.update(row[0] for row in cursor)
+
+        return known_ids
+
+    @staticmethod
+    def __user_to_row(user: TwitterUserModel, updated_at: float) -> Dict[str, Any]:
+        return {**user.model_dump(), 'updated_at': updated_at}
+
+    @staticmethod
+    def __tweet_to_row(tweet: TwitterTweetModel, updated_at: float) -> Dict[str, Any]:
+        row = tweet.model_dump(exclude={'author', 'uri'})
+        row['author_rest_id'] = tweet.author.rest_id
+        row['created_at'] = tweet.created_at.isoformat()
+        row['updated_at'] = updated_at
+
+        return row
+
+    @staticmethod
+    def __row_to_user(row: sqlite3.Row, id_column: str) -> TwitterUserModel:
+        return TwitterUserModel(
+            id=row[id_column],
+            rest_id=row['author_rest_id'] if id_column == 'author_id' else row['rest_id'],
+            full_name=row['full_name'],
+            username=row['username'],
+            description=row['description'],
+            profile_image_url=row['profile_image_url'],
+            profile_banner_url=row['profile_banner_url'],
+            verified=row['verified'],
+            is_blue_verified=row['is_blue_verified'],
+            favourites_count=row['favourites_count'],
+            followers_count=row['followers_count'],
+            friends_count=row['friends_count']
+        )
+
+    @staticmethod
+    def __row_to_tweet(row: sqlite3.Row) -> TwitterTweetModel:
+        return TwitterTweetModel(
+            id=row['id'],
+            rest_id=row['rest_id'],
+            is_retweet=row['is_retweet'],
+            view_count=row['view_count'],
+            bookmark_count=row['bookmark_count'],
+            favorite_count=row['favorite_count'],
+            quote_count=row['quote_count'],
+            reply_count=row['reply_count'],
+            retweet_count=row['retweet_count'],
+            favorited=row['favorited'],
+            bookmarked=row['bookmarked'],
+            retweeted=row['retweeted'],
+            content=row['content'],
+            lang=row['lang'],
+            created_at=datetime.fromisoformat(row['created_at']),
+            author=SqliteTweetsStore.__row_to_user(row, 'author_id')
+        )
@@ -0,0 +1,34 @@
+from typing import Iterable, List, Set
+
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel, TwitterUserModel
+
+
+class TweetsStoreInterface:
+    """
+    This interface is used to define the methods that a tweets store must implement.
+    Tweets and users are indexed by rest_id, saving an already stored tweet or user updates its counters.
+    """
+
+    def save_tweets(self, tweets: Iterable[TwitterTweetModel]) -> int:
+        """
+        Upsert the tweets and their authors, returns the number of tweets that were not stored yet
+        """
+        raise NotImplementedError
+
+    def get_known_tweet_ids(self, rest_ids: Iterable[str]) -> Set[str]:
+        raise NotImplementedError
+
+    def contains_tweet(self, rest_id: str) -> bool:
+        raise NotImplementedError
+
+    def get_tweet(self, rest_id: str) -> TwitterTweetModel | None:
+        raise NotImplementedError
+
+    def get_user(self, rest_id: str) -> TwitterUserModel | None:
+        raise NotImplementedError
+
+    def get_latest_tweets(self, limit: int = 20) -> List[TwitterTweetModel]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
@@ -0,0 +1,197 @@
+import asyncio
+from typing import AsyncGenerator, List, Tuple
+
+from twitter_api.async_twitter_client import AsyncTwitterClient
+from twitter_api.graphql_operations import (
+    DEFAULT_GRAPHQL_OPERATION_REGISTRY, HOME_TIMELINE_OPERATION, GraphQLOperationRegistry
+)
+from twitter_api.json_stream import aiter_json_array_items
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_home_timeline_models import (
+    TwitterHomeTimelineResponseModel, TwitterTweetModel
+)
+from twitter_api.services.modules.store.tweets_store_interface import TweetsStoreInterface
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import (
+    SortType, TwitterHomeTimelineAPIModule
+)
+from twitter_api.services.modules.timeline.twitter_home_timeline_parser import TimelineParserType
+from twitter_api.services.modules.tweets.async_twitter_tweets_api_module import (
+    AsyncTwitterTweetsAPIModule
+)
+from twitter_api.utils import async_prefetch_iterator
+
+logger = get_logger(__name__)
+
+
+class AsyncTwitterHomeTimelineAPIModule:
+    __twitter_client: AsyncTwitterClient
+    __twitter_tweets_api_module: AsyncTwitterTweetsAPIModule
+    __timeline_parser: TimelineParserType
+    __tweets_store: TweetsStoreInterface | None
+    __graphql_operations: GraphQLOperationRegistry
+
+    def __init__(
+            self,
+            twitter_client: AsyncTwitterClient,
+            twitter_tweets_api_module: AsyncTwitterTweetsAPIModule,
+            timeline_parser: TimelineParserType = 'pydantic',
+            tweets_store: TweetsStoreInterface | None = None,
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY):
+        self.__twitter_client = twitter_client
+        self.__twitter_tweets_api_module = twitter_tweets_api_module
+        self.__timeline_parser = timeline_parser
+        self.__tweets_store = tweets_store
+        self.__graphql_operations = graphql_operations
+
+    async def get_home_timeline_tweets_stream(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            prefetch: int = 0,
+            stop_at_known_tweet: bool = False) -> AsyncGenerator[TwitterTweetModel, None]:
+        """
+        Get a stream of home timeline tweets pages, sorted by created_at, default is from newest to oldest.
+        With prefetch > 0, up to `prefetch` next pages are fetched in background while the current one is consumed.
+        With stop_at_known_tweet, the stream ends at the first page containing a tweet already in the tweets store.
+        Please note that you need to be authenticated to use this method.
+        """
+        async for timeline in self.get_home_timeline_stream(count, cursor, sort, prefetch, stop_at_known_tweet):
+            for tweet in timeline.tweets:
+                yield tweet
+
+    async def get_home_timeline_stream(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            prefetch: int = 0,
+            stop_at_known_tweet: bool = False) -> AsyncGenerator[TwitterHomeTimelineResponseModel, None]:
+        """
+        Get a stream of home timeline tweets sorted by created_at, default is from newest to oldest.
+        With prefetch > 0, up to `prefetch` next pages are fetched in background while the current one is consumed.
+        With stop_at_known_tweet, the stream ends at the first page containing a tweet already in the tweets store,
+        only the new tweets of that page are returned.
+        A page is persisted in the tweets store once it is delivered, the prefetched pages left are not.
+        Please note that you need to be authenticated to use this method.
+        """
+        if stop_at_known_tweet and self.__tweets_store is None:
+            raise ValueError('stop_at_known_tweet requires a tweets store')
+
+        timelines = self.__iter_home_timeline(count, cursor, sort, stop_at_known_tweet)
+
+        if prefetch > 0:
+            timelines = async_prefetch_iterator(timelines, prefetch)
+
+        async for timeline, tweets in timelines:
+            try:
+                yield timeline
+            finally:
+                # also when the consumer stops at this page; the store is blocking, keep the event loop free
+                if self.__tweets_store is not None:
+                    await asyncio.to_thread(self.__tweets_store.save_tweets, tweets)
+
+    async def __iter_home_timeline(
+            self,
+            count: int,
+            cursor: str | None,
+            sort: SortType,
+            stop_at_known_tweet: bool) -> AsyncGenerator[Tuple[TwitterHomeTimelineResponseModel, List[TwitterTweetModel]], None]:
+        """
+        The pages and the tweets to persist once the page is delivered, the known tweets included
+        """
+        while True:
+            timeline = await self.get_home_timeline(count, cursor, sort)
+
+            if timeline is None:
+                return
+
+            cursor = timeline.pagination.next_cursor
+            tweets = timeline.tweets
+            reached_known_tweet = False
+
+            if stop_at_known_tweet and self.__tweets_store is not None:
+                timeline, reached_known_tweet = await asyncio.to_thread(
+                    TwitterHomeTimelineAPIModule.filter_known_tweets, self.__tweets_store, timeline)
+
+            yield timeline, tweets
+
+            if cursor is None or reached_known_tweet:
+                break
+
+    async def get_home_timeline_tweets_incremental(
+            self, count: int = 20, cursor: str | None = None) -> AsyncGenerator[TwitterTweetModel, None]:
+        """
+        Get a stream of home timeline tweets decoded entry by entry while the pages are downloaded:
+        the first tweet of a page is available before the end of its download and a single entry is held in memory.
+        Tweets come in the order of the timeline, they are not sorted and not persisted in the tweets store.
+        Please note that you need to be authenticated to use this method.
+        """
+        while True:
+            operation = self.__graphql_operations.get(HOME_TIMELINE_OPERATION)
+            next_cursor: str | None = None
+            entries_count = 0
+
+            async with self.__twitter_client.stream_request(
+                    operation.method,
+                    operation.build_url(self.__twitter_client.gql_url),
+                    data=TwitterHomeTimelineAPIModule.build_home_timeline_payload(count, cursor, operation)) as response:
+                if not response.is_success:
+                    logger.error('Failed to get home timeline')
+                    logger.error('Response status code: %s', response.status_code)
+
+                    if response.errors:
+                        logger.error('Response body: %s', response.errors)
+
+                    return
+
+                async for entry in aiter_json_array_items(response.chunks, 'entries'):
+                    entries_count += 1
+
+                    if next_cursor is None and entry.get('entryId', '').startswith('cursor-bottom'):
+                        next_cursor = entry['content'].get('value')
+
+                    tweet = TwitterHomeTimelineAPIModule.parse_home_timeline_entry(entry)
+
+                    if tweet is not None:
+                        yield tweet
+
+            if entries_count == 0:
+                logger.warning('Home timeline response without entries')
+
+            if next_cursor is None:
+                break
+
+            cursor = next_cursor
+
+    async def get_home_timeline(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            use_cache: bool = True) -> TwitterHomeTimelineResponseModel | None:
+        """
+        Get home timeline tweets sorted by created_at, default is from newest to oldest.
+        Please note that you need to be authenticated to use this method.
+        A page is served from the response cache of the client, if any, unless use_cache is False.
+        """
+        operation = self.__graphql_operations.get(HOME_TIMELINE_OPERATION)
+
+        response = await self.__twitter_client.request(
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            data=TwitterHomeTimelineAPIModule.build_home_timeline_payload(count, cursor, operation),
+            model_type=TwitterHomeTimelineAPIModule.get_home_timeline_model_type(self.__timeline_parser),
+            use_cache=use_cache
+        )
+
+        if not response.is_success or response.data is None:
+            logger.error('Failed to get home timeline')
+            logger.error('Response status code: %s', response.status_code)
+
+            if response.errors:
+                logger.error('Response body: %s', response.errors)
+
+            return None
+
+        return TwitterHomeTimelineAPIModule.prepare_home_timeline_response(response.data, sort)
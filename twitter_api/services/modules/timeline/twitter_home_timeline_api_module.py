@@ -1,16 +1,28 @@
 
-from http import HTTPMethod
-from typing import Generator, List, Literal
+from functools import partial
+from typing import Any, Dict, Generator, List, Literal, Tuple, Type
 
+from twitter_api.graphql_operations import (
+    DEFAULT_GRAPHQL_OPERATION_REGISTRY, HOME_TIMELINE_OPERATION, GraphQLOperation, GraphQLOperationRegistry
+)
+from twitter_api.json_stream import iter_json_array_items
 from twitter_api.logger import get_logger
-from twitter_api.models.twitter_home_timeline_models import TwitterHomeTimelinePaginationModel
+from twitter_api.models.twitter_compact_models import CompactTimelinePage, CompactTweetFactory
+from twitter_api.models.twitter_home_timeline_models import Entry, TwitterHomeTimelinePaginationModel
 from twitter_api.models.twitter_home_timeline_models import \
     TwitterHomeTimelineRequestModel as TwtHomeTimelineReqModel
 from twitter_api.models.twitter_home_timeline_models import (
     TwitterHomeTimelineResponseModel, TwitterHomeTimelineResponseRawModel, TwitterTweetModel
 )
+from twitter_api.models.twitter_models import RawResponseModel
+from twitter_api.parse_pool import ParsePool
+from twitter_api.services.modules.store.tweets_store_interface import TweetsStoreInterface
+from twitter_api.services.modules.timeline.twitter_home_timeline_parser import (
+    TimelineParserType, build_entry_tweet, find_bottom_cursor, parse_home_timeline_response
+)
 from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
 from twitter_api.twitter_client import TwitterClient
+from twitter_api.utils import prefetch_iterator
 
 SortType = Literal['ASC', 'DESC']
 
@@ -20,91 +32,324 @@ logger = get_logger(__name__)
 class TwitterHomeTimelineAPIModule:
     __twitter_client: TwitterClient
     __twitter_tweets_api_module: TwitterTweetsAPIModule
-
-    def __init__(self, twitter_client: TwitterClient, twitter_tweets_api_module: TwitterTweetsAPIModule):
+    __timeline_parser: TimelineParserType
+    __tweets_store: TweetsStoreInterface | None
+    __graphql_operations: GraphQLOperationRegistry
+
+    def __init__(
+            self,
+            twitter_client: TwitterClient,
+            twitter_tweets_api_module: TwitterTweetsAPIModule,
+            timeline_parser: TimelineParserType = 'pydantic',
+            tweets_store: TweetsStoreInterface | None = None,
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY):
+        """
+        timeline_parser: 'pydantic' validates the whole raw GraphQL tree, 'fast' extracts only the needed fields
+        from the decoded json and produces the same tweets with a fraction of the CPU time
+        tweets_store: when provided, every page of the streams is persisted in the store
+        """
         self.__twitter_client = twitter_client
         self.__twitter_tweets_api_module = twitter_tweets_api_module
+        self.__timeline_parser = timeline_parser
+        self.__tweets_store = tweets_store
+        self.__graphql_operations = graphql_operations
 
     def get_home_timeline_tweets_stream(
-            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC') -> Generator[TwitterTweetModel, None, None]:
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            prefetch: int = 0,
+            stop_at_known_tweet: bool = False) -> Generator[TwitterTweetModel, None, None]:
         """
         Get a stream of home timeline tweets pages, sorted by created_at, default is from newest to oldest.
+        With prefetch > 0, up to `prefetch` next pages are fetched in background while the current one is consumed.
+        With stop_at_known_tweet, the stream ends at the first page containing a tweet already in the tweets store.
         Please note that you need to be authenticated to use this method.
         """
+        for timeline in self.get_home_timeline_stream(count, cursor, sort, prefetch, stop_at_known_tweet):
+            yield from timeline.tweets
 
+    def get_home_timeline_stream(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            prefetch: int = 0,
+            stop_at_known_tweet: bool = False) -> Generator[TwitterHomeTimelineResponseModel, None, None]:
+        """
+        Get a stream of home timeline tweets sorted by created_at, default is from newest to oldest.
+        With prefetch > 0, up to `prefetch` next pages are fetched in background while the current one is consumed.
+        With stop_at_known_tweet, the stream ends at the first page containing a tweet already in the tweets store,
+        only the new tweets of that page are returned.
+        A page is persisted in the tweets store once it is delivered, the prefetched pages left are not.
+        Please note that you need to be authenticated to use this method.
+        """
+        if stop_at_known_tweet and self.__tweets_store is None:
+            raise ValueError('stop_at_known_tweet requires a tweets store')
+
+        timelines = self.__iter_home_timeline(count, cursor, sort, stop_at_known_tweet)
+
+        if prefetch > 0:
+            timelines = prefetch_iterator(timelines, prefetch)
+
+        for timeline, tweets in timelines:
+            try:
+                yield timeline
+            finally:
+                # also when the consumer stops at this page
+                if self.__tweets_store is not None:
+                    self.__tweets_store.save_tweets(tweets)
+
+    def __iter_home_timeline(
+            self,
+            count: int,
+            cursor: str | None,
+            sort: SortType,
+            stop_at_known_tweet: bool) -> Generator[Tuple[TwitterHomeTimelineResponseModel, List[TwitterTweetModel]], None, None]:
+        """
+        The pages and the tweets to persist once the page is delivered, the known tweets included
+        """
         while True:
-            response = self.get_home_timeline(count, cursor, sort)
+            timeline = self.get_home_timeline(count, cursor, sort)
 
-            if response is None:
+            if timeline is None:
                 return None
 
-            cursor = response.pagination.next_cursor
+            cursor = timeline.pagination.next_cursor
+            tweets = timeline.tweets
+            reached_known_tweet = False
 
-            for tweet in response.tweets:
-                yield tweet
+            if stop_at_known_tweet and self.__tweets_store is not None:
+                timeline, reached_known_tweet = self.filter_known_tweets(self.__tweets_store, timeline)
 
-            if cursor is None:
+            yield timeline, tweets
+
+            if cursor is None or reached_known_tweet:
                 break
 
-    def get_home_timeline_stream(
-            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC') -> Generator[TwitterHomeTimelineResponseModel, None, None]:
+    def get_home_timeline_tweets_incremental(
+            self, count: int = 20, cursor: str | None = None) -> Generator[TwitterTweetModel, None, None]:
         """
-        Get a stream of home timeline tweets sorted by created_at, default is from newest to oldest.
+        Get a stream of home timeline tweets decoded entry by entry while the pages are downloaded:
+        the first tweet of a page is available before the end of its download and a single entry is held in memory.
+        Tweets come in the order of the timeline, they are not sorted and not persisted in the tweets store.
         Please note that you need to be authenticated to use this method.
         """
         while True:
-            timeline = self.get_home_timeline(count, cursor, sort)
+            operation = self.__graphql_operations.get(HOME_TIMELINE_OPERATION)
+            next_cursor: str | None = None
+            entries_count = 0
 
-            if timeline is None:
-                return None
+            with self.__twitter_client.stream_request(
+                    operation.method,
+                    operation.build_url(self.__twitter_client.gql_url),
+                    data=self.build_home_timeline_payload(count, cursor, operation)) as response:
+                if not response.is_success:
+                    logger.error('Failed to get home timeline')
+                    logger.error('Response status code: %s', response.status_code)
 
-            cursor = timeline.pagination.next_cursor
+                    if response.errors:
+                        logger.error('Response body: %s', response.errors)
+
+                    return None
+
+                for entry in iter_json_array_items(response.chunks, 'entries'):
+                    entries_count += 1
+
+                    if next_cursor is None and entry.get('entryId', '').startswith('cursor-bottom'):
+                        next_cursor = entry['content'].get('value')
+
+                    tweet = self.parse_home_timeline_entry(entry)
+
+                    if tweet is not None:
+                        yield tweet
 
-            yield timeline
+            if entries_count == 0:
+                logger.warning('Home timeline response without entries')
+
+            if next_cursor is None:
+                break
+
+            cursor = next_cursor
+
+    def get_home_timeline_raw_stream(
+            self, count: int = 20, cursor: str | None = None, max_pages: int | None = None) -> Generator[bytes, None, None]:
+        """
+        Get a stream of the raw bodies of the home timeline pages, the fetch stage of get_home_timeline_parsed_stream.
+        The next cursor is read from the raw body, the pages are not decoded.
+        Please note that you need to be authenticated to use this method.
+        """
+        pages = 0
+
+        while max_pages is None or pages < max_pages:
+            operation = self.__graphql_operations.get(HOME_TIMELINE_OPERATION)
+
+            with self.__twitter_client.stream_request(
+                    operation.method,
+                    operation.build_url(self.__twitter_client.gql_url),
+                    data=self.build_home_timeline_payload(count, cursor, operation)) as response:
+                if not response.is_success:
+                    logger.error('Failed to get home timeline')
+                    logger.error('Response status code: %s', response.status_code)
+
+                    if response.errors:
+                        logger.error('Response body: %s', response.errors)
+
+                    return None
+
+                body = b''.join(response.chunks)
+
+            pages += 1
+            yield body
+
+            cursor = find_bottom_cursor(body)
 
             if cursor is None:
                 break
 
-    def get_home_timeline(self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC') -> TwitterHomeTimelineResponseModel | None:
+    def get_home_timeline_parsed_stream(
+            self,
+            parse_pool: ParsePool,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            max_pages: int | None = None,
+            compact_factory: CompactTweetFactory | None = None) -> Generator[CompactTimelinePage, None, None]:
+        """
+        Get a stream of compact home timeline pages parsed by the worker processes of the parse pool, the next page
+        is fetched while the previous ones are parsed. The tweets of a page are sorted by created_at, the pages come
+        in timeline order unless the pool is unordered. Pages are not persisted in the tweets store.
+        Please note that you need to be authenticated to use this method.
+        """
+        compact_factory = compact_factory or CompactTweetFactory()
+        parse = partial(self.parse_compact_home_timeline, sort=sort, timeline_parser=self.__timeline_parser)
+
+        for page in parse_pool.ingest({HOME_TIMELINE_OPERATION: self.get_home_timeline_raw_stream(count, cursor, max_pages)}, parse):
+            for tweet in page.data.tweets:
+                compact_factory.intern(tweet)
+
+            yield page.data
+
+    def get_home_timeline(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            use_cache: bool = True) -> TwitterHomeTimelineResponseModel | None:
         """
         Get home timeline tweets sorted by created_at, default is from newest to oldest.
         Please note that you need to be authenticated to use this method.
+        A page is served from the response cache of the client, if any, unless use_cache is False.
         """
-        query_id = 'W4Tpu1uueTGK53paUgxF0Q'
-        endpoint = f'{self.__twitter_client.gql_url}/{query_id}/HomeTimeline'
-        payload = TwtHomeTimelineReqModel(
-            queryId=query_id,
-            variables=TwtHomeTimelineReqModel.VariablesModel(
-                count=count,
-                cursor=cursor)).model_dump()
+        operation = self.__graphql_operations.get(HOME_TIMELINE_OPERATION)
 
         response = self.__twitter_client.request(
-            HTTPMethod.POST,
-            endpoint,
-            data=payload,
-            model_type=TwitterHomeTimelineResponseRawModel
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            data=self.build_home_timeline_payload(count, cursor, operation),
+            model_type=self.get_home_timeline_model_type(self.__timeline_parser),
+            use_cache=use_cache
         )
 
         if not response.is_success or response.data is None:
             logger.error('Failed to get home timeline')
-            logger.error(f'Response status code: {response.status_code}')
+            logger.error('Response status code: %s', response.status_code)
 
             if response.errors:
-                logger.error(f'Response body: {response.errors}')
+                logger.error('Response body: %s', response.errors)
 
             return None
 
-        pretty_response = self.__prepare_home_timeline_response(response.data)
+        return self.prepare_home_timeline_response(response.data, sort)
+
+    @staticmethod
+    def build_home_timeline_payload(
+            count: int = 20, cursor: str | None = None, operation: GraphQLOperation | None = None) -> bytes:
+        operation = operation or DEFAULT_GRAPHQL_OPERATION_REGISTRY.get(HOME_TIMELINE_OPERATION)
+        variables = TwtHomeTimelineReqModel.VariablesModel(
+            count=count,
+            cursor=cursor)
+
+        return operation.build_body(variables.model_dump())
+
+    @staticmethod
+    def get_home_timeline_model_type(
+            timeline_parser: TimelineParserType) -> Type[TwitterHomeTimelineResponseRawModel | RawResponseModel]:
+        return RawResponseModel if timeline_parser == 'fast' else TwitterHomeTimelineResponseRawModel
+
+    @staticmethod
+    def prepare_home_timeline_response(
+            raw_response: TwitterHomeTimelineResponseRawModel | RawResponseModel, sort: SortType = 'DESC') -> TwitterHomeTimelineResponseModel:
+        """
+        Prepare home timeline response to be more readable, tweets are sorted by created_at.
+        """
+        if isinstance(raw_response, RawResponseModel):
+            try:
+                pretty_response = parse_home_timeline_response(raw_response.root)
+            except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+                logger.warning('Unexpected home timeline payload (%r), falling back to the validated parser', e)
+
+                raw_response = TwitterHomeTimelineResponseRawModel.model_validate(raw_response.root)
+                pretty_response = TwitterHomeTimelineAPIModule.__build_home_timeline_response(raw_response)
+        else:
+            pretty_response = TwitterHomeTimelineAPIModule.__build_home_timeline_response(raw_response)
 
         pretty_response.tweets.sort(key=lambda tweet: tweet.created_at, reverse=sort == 'DESC')
 
         return pretty_response
 
-    def __prepare_home_timeline_response(
-            self, raw_response: TwitterHomeTimelineResponseRawModel) -> TwitterHomeTimelineResponseModel:
+    @staticmethod
+    def parse_compact_home_timeline(
+            body: bytes, sort: SortType = 'DESC', timeline_parser: TimelineParserType = 'fast') -> CompactTimelinePage:
+        """
+        Decode a raw home timeline page into compact tweets, run by the worker processes of a ParsePool:
+        compact records are much cheaper to send back than pydantic models
+        """
+        model_type = TwitterHomeTimelineAPIModule.get_home_timeline_model_type(timeline_parser)
+        timeline = TwitterHomeTimelineAPIModule.prepare_home_timeline_response(model_type.model_validate_json(body), sort)
+
+        return CompactTweetFactory().from_timeline(timeline)
+
+    @staticmethod
+    def parse_home_timeline_entry(entry: Dict[str, Any]) -> TwitterTweetModel | None:
+        """
+        Tweet of a decoded timeline entry, None for the other entries (cursors, modules, promoted content)
+        """
+        if not entry.get('entryId', '').startswith('tweet'):
+            return None
+
+        try:
+            return build_entry_tweet(entry)
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            logger.warning('Unexpected home timeline entry (%r), falling back to the validated parser', e)
+
+            return TwitterHomeTimelineAPIModule.__build_entry_tweet(Entry.model_validate(entry))
+
+    @staticmethod
+    def filter_known_tweets(
+            tweets_store: TweetsStoreInterface,
+            timeline: TwitterHomeTimelineResponseModel) -> Tuple[TwitterHomeTimelineResponseModel, bool]:
         """
-        Prepare home timeline response to be more readable.
+        Remove the tweets already in the store from the page, the second value tells whether the page
+        reached the content of a previous crawl. The store is only read.
         """
+        known_ids = tweets_store.get_known_tweet_ids(tweet.rest_id for tweet in timeline.tweets)
+
+        if not known_ids:
+            return timeline, False
+
+        new_tweets = [tweet for tweet in timeline.tweets if tweet.rest_id not in known_ids]
+
+        logger.info('Reached %d already stored tweets, stopping the home timeline stream', len(known_ids))
+
+        return timeline.model_copy(update={
+            'tweets': new_tweets,
+            'pagination': timeline.pagination.model_copy(update={'total_count': len(new_tweets)})
+        }), True
+
+    @staticmethod
+    def __build_home_timeline_response(raw_response: TwitterHomeTimelineResponseRawModel) -> TwitterHomeTimelineResponseModel:
         empty_response = TwitterHomeTimelineResponseModel(
             tweets=[],
             pagination=TwitterHomeTimelinePaginationModel(
@@ -128,22 +373,7 @@ class TwitterHomeTimelineAPIModule:
         tweet_entries_raw = [entry for entry in entries if entry.entryId.startswith('tweet')]
 
         for tweet_entry_raw in tweet_entries_raw:
-            item_content = tweet_entry_raw.content.itemContent
-
-            if item_content is None:
-                continue
-
-            tweet_results = item_content.tweet_results
-
-            if tweet_results is None:
-                continue
-
-            result = tweet_results.result
-
-            if result is None:
-                continue
-
-            tweet = self.__twitter_tweets_api_module.build_tweet_response(result)
+            tweet = TwitterHomeTimelineAPIModule.__build_entry_tweet(tweet_entry_raw)
 
             if tweet is None:
                 continue
@@ -164,3 +394,17 @@ class TwitterHomeTimelineAPIModule:
                 total_count=total_count
             )
         )
+
+    @staticmethod
+    def __build_entry_tweet(entry: Entry) -> TwitterTweetModel | None:
+        item_content = entry.content.itemContent
+
+        if item_content is None:
+            return None
+
+        tweet_results = item_content.tweet_results
+
+        if tweet_results is None or tweet_results.result is None:
+            return None
+
+        return TwitterTweetsAPIModule.build_tweet_response(tweet_results.result)
@@ -0,0 +1,143 @@
+"""
+Fast path home timeline parser: walks the decoded json once, reads only the fields needed by TwitterTweetModel
+and TwitterUserModel and builds them with model_construct, skipping the validation of the raw GraphQL tree.
+Required fields are read by key, so a payload that the raw models would reject raises KeyError or TypeError
+and the caller can fall back to the validated path.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Literal
+
+from twitter_api.models.twitter_home_timeline_models import (
+    TwitterHomeTimelinePaginationModel, TwitterHomeTimelineResponseModel
+)
+from twitter_api.models.twitter_tweets_models import TwitterTweetModel, TwitterUserModel
+from twitter_api.timestamps import parse_twitter_datetime
+
+TimelineParserType = Literal['pydantic', 'fast']
+
+# quotes inside json strings are escaped, so these keys can only match the keys of the document
+_BOTTOM_CURSOR_ENTRY = re.compile(rb'"entryId"\s*:\s*"cursor-bottom')
+_CURSOR_VALUE = re.compile(rb'"value"\s*:\s*("(?:[^"\\]|\\.)*")')
+# bytes after the entry id searched for the value of the cursor
+_CURSOR_ENTRY_WINDOW: int = 1024
+
+
+def parse_home_timeline_response(json_data: Dict[str, Any]) -> TwitterHomeTimelineResponseModel:
+    instructions: List[Dict[str, Any]] = json_data['data']['home']['home_timeline_urt']['instructions']
+    entries: List[Dict[str, Any]] = instructions[0].get('entries', []) if len(instructions) > 0 else []
+
+    tweets: List[TwitterTweetModel] = []
+    top_cursor: str | None = None
+    bottom_cursor: str | None = None
+    top_cursor_found = False
+    bottom_cursor_found = False
+
+    for entry in entries:
+        entry_id: str = entry['entryId']
+        content: Dict[str, Any] = entry['content']
+
+        if entry_id.startswith('tweet'):
+            tweet = build_entry_tweet(entry)
+
+            if tweet is not None:
+                tweets.append(tweet)
+
+        elif entry_id.startswith('cursor-top') and not top_cursor_found:
+            top_cursor = content.get('value')
+            top_cursor_found = True
+
+        elif entry_id.startswith('cursor-bottom') and not bottom_cursor_found:
+            bottom_cursor = content.get('value')
+            bottom_cursor_found = True
+
+    return TwitterHomeTimelineResponseModel.model_construct(
+        tweets=tweets,
+        pagination=TwitterHomeTimelinePaginationModel.model_construct(
+            previous_cursor=top_cursor,
+            next_cursor=bottom_cursor,
+            total_count=len(tweets)
+        )
+    )
+
+
+def find_bottom_cursor(body: bytes) -> str | None:
+    """
+    Next cursor of a raw home timeline page, found without decoding the page: the fetch stage of an ingestion
+    needs it before the page is parsed. The page is decoded only if its bottom cursor entry has an unexpected shape.
+    """
+    entry = _BOTTOM_CURSOR_ENTRY.search(body)
+
+    if entry is None:
+        return None
+
+    value = _CURSOR_VALUE.search(body, entry.end(), entry.end() + _CURSOR_ENTRY_WINDOW)
+
+    if value is not None:
+        return json.loads(value.group(1))
+
+    return parse_home_timeline_response(json.loads(body)).pagination.next_cursor
+
+
+def build_entry_tweet(entry: Dict[str, Any]) -> TwitterTweetModel | None:
+    item_content = entry['content'].get('itemContent')
+    tweet_results = item_content.get('tweet_results') if item_content is not None else None
+    result = tweet_results.get('result') if tweet_results is not None else None
+
+    return build_tweet(result) if result is not None else None
+
+
+def build_tweet(tweet_result: Dict[str, Any]) -> TwitterTweetModel | None:
+    legacy = tweet_result.get('legacy')
+    core = tweet_result.get('core')
+    views = tweet_result.get('views')
+    rest_id = tweet_result.get('rest_id')
+
+    author = build_user(core['user_results']['result']) if core is not None else None
+
+    if legacy is None or author is None or views is None or rest_id is None:
+        return None
+
+    return TwitterTweetModel.model_construct(
+        id=legacy['id_str'],
+        rest_id=rest_id,
+        is_retweet=legacy.get('retweeted_status_result') is not None,
+        view_count=_to_int(views.get('count', 0)),
+        bookmark_count=_to_int(legacy.get('bookmark_count', 0)),
+        favorite_count=_to_int(legacy.get('favorite_count', 0)),
+        quote_count=_to_int(legacy.get('quote_count', 0)),
+        reply_count=_to_int(legacy.get('reply_count', 0)),
+        retweet_count=_to_int(legacy.get('retweet_count', 0)),
+        favorited=legacy['favorited'],
+        bookmarked=legacy['bookmarked'],
+        retweeted=legacy['retweeted'],
+        content=legacy['full_text'],
+        lang=legacy['lang'],
+        created_at=parse_twitter_datetime(legacy['created_at']),
+        author=author
+    )
+
+
+def build_user(user_result: Dict[str, Any]) -> TwitterUserModel:
+    legacy = user_result['legacy']
+
+    return TwitterUserModel.model_construct(
+        id=user_result['id'],
+        rest_id=user_result['rest_id'],
+        full_name=legacy['name'],
+        username=legacy['screen_name'],
+        description=legacy['description'],
+        profile_image_url=legacy['profile_image_url_https'],
+        profile_banner_url=legacy.get('profile_banner_url'),
+        verified=legacy['verified'],
+        is_blue_verified=user_result['is_blue_verified'],
+        favourites_count=_to_int(legacy.get('favourites_count', 0)),
+        followers_count=_to_int(legacy.get('followers_count', 0)),
+        friends_count=_to_int(legacy.get('friends_count', 0)),
+    )
+
+
+def _to_int(value: Any) -> int | None:
+    # same coercion of the `int | None` fields of the raw models, e.g. views count is a string
+    return int(value) if value is not None else None
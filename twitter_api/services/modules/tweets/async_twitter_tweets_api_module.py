@@ -0,0 +1,124 @@
+import asyncio
+from typing import List
+
+import httpx
+
+from twitter_api.async_twitter_client import AsyncTwitterClient
+from twitter_api.graphql_operations import (
+    CREATE_TWEET_OPERATION, DEFAULT_GRAPHQL_OPERATION_REGISTRY, FAVORITE_TWEET_OPERATION, GraphQLOperationRegistry
+)
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_tweets_models import (
+    CreateTweetItem, FavoriteTweetResponse, TweetResult, TwitterTweetActionResultModel, TwitterTweetModel,
+    TwitterTweetResponseModel
+)
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import (
+    DEFAULT_BULK_CONCURRENCY, TwitterTweetsAPIModule
+)
+from twitter_api.twitter_client import TwitterAPIResponse
+
+logger = get_logger(__name__)
+
+
+class AsyncTwitterTweetsAPIModule:
+    __twitter_client: AsyncTwitterClient
+    __graphql_operations: GraphQLOperationRegistry
+
+    def __init__(
+            self,
+            twitter_client: AsyncTwitterClient,
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY) -> None:
+        self.__twitter_client = twitter_client
+        self.__graphql_operations = graphql_operations
+
+    async def create_tweet(self, content: str, in_reply_to_tweet_id: str | None = None) -> str | None:
+        """
+        Create a tweet, optionally in reply to a tweet by providing the tweet rest id
+        Returns the tweet id of the created tweet
+        """
+        return TwitterTweetsAPIModule.parse_create_tweet_response(await self.__create_tweet(content, in_reply_to_tweet_id))
+
+    async def create_tweets(
+            self, items: List[CreateTweetItem], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        """
+        Create many tweets with at most `concurrency` requests in flight, the client rate limiter is still applied.
+        Returns a result for each item, in the same order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create(item: CreateTweetItem) -> TwitterTweetActionResultModel:
+            async with semaphore:
+                return await self.try_create_tweet(item.content, item.in_reply_to_tweet_id)
+
+        return list(await asyncio.gather(*[create(item) for item in items]))
+
+    async def try_create_tweet(self, content: str, in_reply_to_tweet_id: str | None = None) -> TwitterTweetActionResultModel:
+        """
+        Same as create_tweet, but returns the detailed outcome instead of raising
+        """
+        try:
+            response = await self.__create_tweet(content, in_reply_to_tweet_id)
+
+            return TwitterTweetsAPIModule.build_action_result(
+                response, TwitterTweetsAPIModule.parse_create_tweet_response(response))
+        except (httpx.HTTPError, ValueError) as e:
+            return TwitterTweetsAPIModule.build_action_error_result(e)
+        except Exception as e:
+            return TwitterTweetsAPIModule.build_action_error_result(e, unexpected=True)
+
+    async def __create_tweet(self, content: str, in_reply_to_tweet_id: str | None) -> TwitterAPIResponse[TwitterTweetResponseModel]:
+        operation = self.__graphql_operations.get(CREATE_TWEET_OPERATION)
+
+        return await self.__twitter_client.request(
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            data=TwitterTweetsAPIModule.build_create_tweet_payload(content, in_reply_to_tweet_id, operation),
+            model_type=TwitterTweetResponseModel
+        )
+
+    def build_tweet_response(self, tweet_result: TweetResult) -> TwitterTweetModel | None:
+        return TwitterTweetsAPIModule.build_tweet_response(tweet_result)
+
+    async def favorite_tweet(self, tweet_id: str) -> bool:
+        return TwitterTweetsAPIModule.parse_favorite_tweet_response(await self.__favorite_tweet(tweet_id))
+
+    async def favorite_tweets(
+            self, tweet_ids: List[str], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        """
+        Favorite many tweets with at most `concurrency` requests in flight, the client rate limiter is still applied.
+        Returns a result for each tweet id, in the same order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def favorite(tweet_id: str) -> TwitterTweetActionResultModel:
+            async with semaphore:
+                return await self.try_favorite_tweet(tweet_id)
+
+        return list(await asyncio.gather(*[favorite(tweet_id) for tweet_id in tweet_ids]))
+
+    async def try_favorite_tweet(self, tweet_id: str) -> TwitterTweetActionResultModel:
+        """
+        Same as favorite_tweet, but returns the detailed outcome instead of raising
+        """
+        try:
+            response = await self.__favorite_tweet(tweet_id)
+
+            return TwitterTweetsAPIModule.build_action_result(
+                response, tweet_id if TwitterTweetsAPIModule.parse_favorite_tweet_response(response) else None)
+        except (httpx.HTTPError, ValueError) as e:
+            return TwitterTweetsAPIModule.build_action_error_result(e)
+        except Exception as e:
+            return TwitterTweetsAPIModule.build_action_error_result(e, unexpected=True)
+
+    async def __favorite_tweet(self, tweet_id: str) -> TwitterAPIResponse[FavoriteTweetResponse]:
+        operation = self.__graphql_operations.get(FAVORITE_TWEET_OPERATION)
+
+        return await self.__twitter_client.request(
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            data=TwitterTweetsAPIModule.build_favorite_tweet_payload(tweet_id, operation),
+            model_type=FavoriteTweetResponse
+        )
+
+    async def get_tweet_details(self, tweet_id: str):
+        raise NotImplementedError()
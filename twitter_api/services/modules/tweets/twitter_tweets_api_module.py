@@ -1,58 +1,105 @@
-from datetime import datetime
-from http import HTTPMethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
 
+import requests
+
+from twitter_api.graphql_operations import (
+    CREATE_TWEET_OPERATION, DEFAULT_GRAPHQL_OPERATION_REGISTRY, FAVORITE_TWEET_OPERATION, GraphQLOperation,
+    GraphQLOperationRegistry
+)
 from twitter_api.logger import get_logger
 from twitter_api.models.twitter_tweets_models import (
-    FavoriteTweetRequest, FavoriteTweetResponse, FavoriteTweetVariables, Reply, TweetResult,
-    TwitterCreateTweetRequestModel, TwitterTweetModel, TwitterTweetResponseModel, TwitterUserModel,
-    Variables
+    CreateTweetItem, FavoriteTweetResponse, FavoriteTweetVariables, Reply, TweetResult, TwitterTweetActionResultModel,
+    TwitterTweetModel, TwitterTweetResponseModel, TwitterUserModel, Variables
 )
-from twitter_api.twitter_client import TwitterClient
+from twitter_api.timestamps import parse_twitter_datetime
+from twitter_api.twitter_client import TwitterAPIResponse, TwitterClient
 
 logger = get_logger(__name__)
 
+DEFAULT_BULK_CONCURRENCY: int = 4
+
 
 class TwitterTweetsAPIModule:
     __twitter_client: TwitterClient
+    __graphql_operations: GraphQLOperationRegistry
 
-    def __init__(self, twitter_client: TwitterClient) -> None:
+    def __init__(
+            self,
+            twitter_client: TwitterClient,
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY) -> None:
         self.__twitter_client = twitter_client
+        self.__graphql_operations = graphql_operations
 
     def create_tweet(self, content: str, in_reply_to_tweet_id: str | None = None) -> str | None:
         """
         Create a tweet, optionally in reply to a tweet by providing the tweet rest id
         Returns the tweet id of the created tweet
         """
-        query_id = 'SoVnbfCycZ7fERGCwpZkYA'
-        endpoint = f'{self.__twitter_client.gql_url}/{query_id}/CreateTweet'
+        return self.parse_create_tweet_response(self.__create_tweet(content, in_reply_to_tweet_id))
 
+    def create_tweets(self, items: List[CreateTweetItem], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        """
+        Create many tweets with at most `concurrency` requests in flight, the client rate limiter is still applied.
+        Returns a result for each item, in the same order.
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(lambda item: self.try_create_tweet(item.content, item.in_reply_to_tweet_id), items))
+
+    def try_create_tweet(self, content: str, in_reply_to_tweet_id: str | None = None) -> TwitterTweetActionResultModel:
+        """
+        Same as create_tweet, but returns the detailed outcome instead of raising
+        """
+        try:
+            response = self.__create_tweet(content, in_reply_to_tweet_id)
+
+            return self.build_action_result(response, self.parse_create_tweet_response(response))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return self.build_action_error_result(e)
+        except Exception as e:
+            return self.build_action_error_result(e, unexpected=True)
+
+    def __create_tweet(self, content: str, in_reply_to_tweet_id: str | None) -> TwitterAPIResponse[TwitterTweetResponseModel]:
+        operation = self.__graphql_operations.get(CREATE_TWEET_OPERATION)
+
+        return self.__twitter_client.request(
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            data=self.build_create_tweet_payload(content, in_reply_to_tweet_id, operation),
+            model_type=TwitterTweetResponseModel
+        )
+
+    @staticmethod
+    def build_create_tweet_payload(
+            content: str, in_reply_to_tweet_id: str | None = None, operation: GraphQLOperation | None = None) -> bytes:
+        operation = operation or DEFAULT_GRAPHQL_OPERATION_REGISTRY.get(CREATE_TWEET_OPERATION)
         reply: Reply | None = None
 
         if in_reply_to_tweet_id is not None:
             reply = Reply(in_reply_to_tweet_id=in_reply_to_tweet_id)
 
-        payload = TwitterCreateTweetRequestModel(
-            variables=Variables(
-                tweet_text=content,
-                reply=reply
-            ),
-            queryId=query_id
-        ).model_dump(exclude_none=True)
-
-        response = self.__twitter_client.request(
-            HTTPMethod.POST,
-            endpoint,
-            data=payload,
-            model_type=TwitterTweetResponseModel
+        variables = Variables(
+            tweet_text=content,
+            reply=reply
         )
 
+        return operation.build_body(variables.model_dump(exclude_none=True))
+
+    @staticmethod
+    def build_favorite_tweet_payload(tweet_id: str, operation: GraphQLOperation | None = None) -> bytes:
+        operation = operation or DEFAULT_GRAPHQL_OPERATION_REGISTRY.get(FAVORITE_TWEET_OPERATION)
+
+        return operation.build_body(FavoriteTweetVariables(tweet_id=tweet_id).model_dump())
+
+    @staticmethod
+    def parse_create_tweet_response(response: TwitterAPIResponse[TwitterTweetResponseModel]) -> str | None:
         if not response.is_success or response.data is None:
             logger.error('Failed to create tweet')
 
-            logger.error(f'Response status code: {response.status_code}')
+            logger.error('Response status code: %s', response.status_code)
 
             if response.errors:
-                logger.error(f'Response body: {response.errors}')
+                logger.error('Response body: %s', response.errors)
 
             return None
 
@@ -63,7 +110,8 @@ class TwitterTweetsAPIModule:
 
         return None
 
-    def build_tweet_response(self, tweet_result: TweetResult) -> TwitterTweetModel | None:
+    @staticmethod
+    def build_tweet_response(tweet_result: TweetResult) -> TwitterTweetModel | None:
         if (
             tweet_result.legacy is None or
             tweet_result.core is None or
@@ -93,7 +141,7 @@ class TwitterTweetsAPIModule:
             retweeted=legacy.retweeted,
             content=legacy.full_text,
             lang=legacy.lang,
-            created_at=datetime.strptime(legacy.created_at, "%a %b %d %H:%M:%S %z %Y"),
+            created_at=parse_twitter_datetime(legacy.created_at),
             author=TwitterUserModel(
                 id=user.id,
                 rest_id=user.rest_id,
@@ -111,22 +159,41 @@ class TwitterTweetsAPIModule:
         )
 
     def favorite_tweet(self, tweet_id: str) -> bool:
-        query_id = 'lI07N6Otwv1PhnEgXILM7A'
-        endpoint = f'{self.__twitter_client.gql_url}/{query_id}/FavoriteTweet'
+        return self.parse_favorite_tweet_response(self.__favorite_tweet(tweet_id))
 
-        payload = FavoriteTweetRequest(
-            variables=FavoriteTweetVariables(
-                tweet_id=tweet_id
-            ),
-        )
+    def favorite_tweets(self, tweet_ids: List[str], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        """
+        Favorite many tweets with at most `concurrency` requests in flight, the client rate limiter is still applied.
+        Returns a result for each tweet id, in the same order.
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(self.try_favorite_tweet, tweet_ids))
 
-        response = self.__twitter_client.request(
-            HTTPMethod.POST,
-            endpoint,
-            data=payload.model_dump(),
+    def try_favorite_tweet(self, tweet_id: str) -> TwitterTweetActionResultModel:
+        """
+        Same as favorite_tweet, but returns the detailed outcome instead of raising
+        """
+        try:
+            response = self.__favorite_tweet(tweet_id)
+
+            return self.build_action_result(response, tweet_id if self.parse_favorite_tweet_response(response) else None)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return self.build_action_error_result(e)
+        except Exception as e:
+            return self.build_action_error_result(e, unexpected=True)
+
+    def __favorite_tweet(self, tweet_id: str) -> TwitterAPIResponse[FavoriteTweetResponse]:
+        operation = self.__graphql_operations.get(FAVORITE_TWEET_OPERATION)
+
+        return self.__twitter_client.request(
+            operation.method,
+            operation.build_url(self.__twitter_client.gql_url),
+            data=self.build_favorite_tweet_payload(tweet_id, operation),
             model_type=FavoriteTweetResponse
         )
 
+    @staticmethod
+    def parse_favorite_tweet_response(response: TwitterAPIResponse[FavoriteTweetResponse]) -> bool:
         if (
             not response.is_success or
             response.data is None or
@@ -136,14 +203,36 @@ class TwitterTweetsAPIModule:
         ):
             logger.error('Failed to favorite tweet')
 
-            logger.error(f'Response status code: {response.status_code}')
+            logger.error('Response status code: %s', response.status_code)
 
             if response.errors:
-                logger.error(f'Response body: {response.errors}')
+                logger.error('Response body: %s', response.errors)
 
             return False
 
         return True
 
+    @staticmethod
+    def build_action_result(response: TwitterAPIResponse[Any], rest_id: str | None) -> TwitterTweetActionResultModel:
+        error = response.errors[0] if response.errors else None
+
+        return TwitterTweetActionResultModel(
+            success=rest_id is not None,
+            rest_id=rest_id,
+            status_code=response.status_code,
+            error_code=error.code if error else None,
+            error_message=error.message if error else None
+        )
+
+    @staticmethod
+    def build_action_error_result(error: Exception, unexpected: bool = False) -> TwitterTweetActionResultModel:
+        # an item of a bulk operation never fails the others, the unexpected errors are logged with their traceback
+        if unexpected:
+            logger.exception('Unexpected error: %r', error)
+        else:
+            logger.error('Request failed: %s', error)
+
+        return TwitterTweetActionResultModel(success=False, error_message=str(error))
+
     def get_tweet_details(self, tweet_id: str):
         raise NotImplementedError()
@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from typing import Generator, List
+
+from twitter_api.logger import get_logger
+from twitter_api.models.twitter_compact_models import CompactTimelinePage, CompactTweetFactory
+from twitter_api.models.twitter_home_timeline_models import (
+    TwitterHomeTimelineResponseModel, TwitterTweetModel
+)
+from twitter_api.models.twitter_tweets_models import CreateTweetItem, TwitterTweetActionResultModel
+from twitter_api.parse_pool import ParsedPage, ParsePool
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import (
+    SortType, TwitterHomeTimelineAPIModule
+)
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import DEFAULT_BULK_CONCURRENCY, TwitterTweetsAPIModule
+from twitter_api.twitter_client_pool import TwitterClientPool
+
+logger = get_logger(__name__)
+
+
+def authenticated(func):
+    @wraps(func)
+    def wrapper(self: 'PooledTwitterAPIService', *args, **kwargs):
+        if self.is_authenticated:
+            return func(self, *args, **kwargs)
+        else:
+            raise ValueError("Not authenticated. Please log in before using this method.")
+
+    return wrapper
+
+
+class PooledTwitterAPIService:
+    """
+    Same interface of TwitterAPIService, every call is executed by the least loaded healthy session of the pool
+    """
+
+    __twitter_client_pool: TwitterClientPool
+
+    def __init__(self, twitter_client_pool: TwitterClientPool):
+        self.__twitter_client_pool = twitter_client_pool
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.__twitter_client_pool.is_authenticated
+
+    def login(self) -> bool:
+        return self.__twitter_client_pool.login() > 0
+
+    @authenticated
+    def get_home_timeline_tweets_stream(
+            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            prefetch: int = 0, stop_at_known_tweet: bool = False) -> Generator[TwitterTweetModel, None, None]:
+        # the cursor belongs to the timeline of an account, so the whole stream is served by the same session
+        with self.__twitter_client_pool.acquire('HomeTimeline') as session:
+            yield from session.twitter_home_timeline_api_module.get_home_timeline_tweets_stream(count, cursor, sort, prefetch, stop_at_known_tweet)
+
+    @authenticated
+    def get_home_timeline_tweets_incremental(
+            self, count: int = 20, cursor: str | None = None) -> Generator[TwitterTweetModel, None, None]:
+        with self.__twitter_client_pool.acquire('HomeTimeline') as session:
+            yield from session.twitter_home_timeline_api_module.get_home_timeline_tweets_incremental(count, cursor)
+
+    @authenticated
+    def get_home_timeline_parsed_stream(
+            self, parse_pool: ParsePool, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            max_pages: int | None = None) -> Generator[CompactTimelinePage, None, None]:
+        with self.__twitter_client_pool.acquire('HomeTimeline') as session:
+            yield from session.twitter_home_timeline_api_module.get_home_timeline_parsed_stream(parse_pool, count, cursor, sort, max_pages)
+
+    @authenticated
+    def get_home_timeline_stream(
+            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            prefetch: int = 0, stop_at_known_tweet: bool = False) -> Generator[TwitterHomeTimelineResponseModel, None, None]:
+        with self.__twitter_client_pool.acquire('HomeTimeline') as session:
+            yield from session.twitter_home_timeline_api_module.get_home_timeline_stream(count, cursor, sort, prefetch, stop_at_known_tweet)
+
+    @authenticated
+    def crawl_home_timelines(
+            self,
+            parse_pool: ParsePool,
+            count: int = 20,
+            sort: SortType = 'DESC',
+            max_pages: int | None = None,
+            compact_factory: CompactTweetFactory | None = None) -> Generator[ParsedPage[CompactTimelinePage], None, None]:
+        """
+        Crawl the home timelines of every healthy session at once: the pages are fetched by a thread per account
+        and parsed by the worker processes of the parse pool. The source of a page is the key of its account,
+        the authors of the tweets are shared across accounts.
+        """
+        compact_factory = compact_factory or CompactTweetFactory()
+        keys = [session.key for session in self.__twitter_client_pool.sessions if session.is_healthy('HomeTimeline')]
+        pages = parse_pool.ingest(
+            {key: self.__get_home_timeline_raw_stream(key, count, max_pages) for key in keys},
+            partial(TwitterHomeTimelineAPIModule.parse_compact_home_timeline, sort=sort))
+
+        for page in pages:
+            for tweet in page.data.tweets:
+                compact_factory.intern(tweet)
+
+            yield page
+
+    @authenticated
+    def get_home_timeline(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            use_cache: bool = True) -> TwitterHomeTimelineResponseModel | None:
+        with self.__twitter_client_pool.acquire('HomeTimeline') as session:
+            return session.twitter_home_timeline_api_module.get_home_timeline(count, cursor, sort, use_cache)
+
+    @authenticated
+    def create_tweet(self, content: str, in_reply_to_tweet_id: str | None = None) -> str | None:
+        with self.__twitter_client_pool.acquire('CreateTweet') as session:
+            return session.twitter_tweets_api_module.create_tweet(content, in_reply_to_tweet_id)
+
+    @authenticated
+    def favorite_tweet(self, tweet_id: str) -> bool:
+        with self.__twitter_client_pool.acquire('FavoriteTweet') as session:
+            return session.twitter_tweets_api_module.favorite_tweet(tweet_id)
+
+    @authenticated
+    def create_tweets(self, items: List[CreateTweetItem], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        """
+        Create many tweets, every item is routed to the least loaded healthy session
+        """
+        def create(item: CreateTweetItem) -> TwitterTweetActionResultModel:
+            try:
+                with self.__twitter_client_pool.acquire('CreateTweet') as session:
+                    return session.twitter_tweets_api_module.try_create_tweet(item.content, item.in_reply_to_tweet_id)
+            except ValueError as e:
+                # no healthy session left, e.g. all of them are rate limited
+                return TwitterTweetsAPIModule.build_action_error_result(e)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(create, items))
+
+    @authenticated
+    def favorite_tweets(self, tweet_ids: List[str], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        """
+        Favorite many tweets, every tweet is routed to the least loaded healthy session
+        """
+        def favorite(tweet_id: str) -> TwitterTweetActionResultModel:
+            try:
+                with self.__twitter_client_pool.acquire('FavoriteTweet') as session:
+                    return session.twitter_tweets_api_module.try_favorite_tweet(tweet_id)
+            except ValueError as e:
+                # no healthy session left, e.g. all of them are rate limited
+                return TwitterTweetsAPIModule.build_action_error_result(e)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(favorite, tweet_ids))
+
+    def __get_home_timeline_raw_stream(self, key: str, count: int, max_pages: int | None) -> Generator[bytes, None, None]:
+        # the session of the account stays reserved for the whole crawl of its timeline
+        with self.__twitter_client_pool.acquire('HomeTimeline', key) as session:
+            yield from session.twitter_home_timeline_api_module.get_home_timeline_raw_stream(count, max_pages=max_pages)
@@ -1,17 +1,22 @@
 
 
 from functools import wraps
-from typing import Generator
+from typing import Generator, List
 
 from twitter_api.logger import get_logger
+from twitter_api.models.twitter_compact_models import CompactTimelinePage
 from twitter_api.models.twitter_home_timeline_models import (
     TwitterHomeTimelineResponseModel, TwitterTweetModel
 )
+from twitter_api.models.twitter_tweets_models import CreateTweetItem, TwitterTweetActionResultModel
+from twitter_api.parse_pool import ParsePool
 from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
 from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import (
     SortType, TwitterHomeTimelineAPIModule
 )
-from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import (
+    DEFAULT_BULK_CONCURRENCY, TwitterTweetsAPIModule
+)
 
 logger = get_logger(__name__)
 
@@ -50,17 +55,35 @@ class TwitterAPIService:
 
     @authenticated
     def get_home_timeline_tweets_stream(
-            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC') -> Generator[TwitterTweetModel, None, None]:
-        return self.__twitter_home_timeline_api_module.get_home_timeline_tweets_stream(count, cursor, sort)
+            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            prefetch: int = 0, stop_at_known_tweet: bool = False) -> Generator[TwitterTweetModel, None, None]:
+        return self.__twitter_home_timeline_api_module.get_home_timeline_tweets_stream(count, cursor, sort, prefetch, stop_at_known_tweet)
+
+    @authenticated
+    def get_home_timeline_tweets_incremental(
+            self, count: int = 20, cursor: str | None = None) -> Generator[TwitterTweetModel, None, None]:
+        return self.__twitter_home_timeline_api_module.get_home_timeline_tweets_incremental(count, cursor)
+
+    @authenticated
+    def get_home_timeline_parsed_stream(
+            self, parse_pool: ParsePool, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            max_pages: int | None = None) -> Generator[CompactTimelinePage, None, None]:
+        return self.__twitter_home_timeline_api_module.get_home_timeline_parsed_stream(parse_pool, count, cursor, sort, max_pages)
 
     @authenticated
     def get_home_timeline_stream(
-            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC') -> Generator[TwitterHomeTimelineResponseModel, None, None]:
-        return self.__twitter_home_timeline_api_module.get_home_timeline_stream(count, cursor, sort)
+            self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC',
+            prefetch: int = 0, stop_at_known_tweet: bool = False) -> Generator[TwitterHomeTimelineResponseModel, None, None]:
+        return self.__twitter_home_timeline_api_module.get_home_timeline_stream(count, cursor, sort, prefetch, stop_at_known_tweet)
 
     @authenticated
-    def get_home_timeline(self, count: int = 20, cursor: str | None = None, sort: SortType = 'DESC') -> TwitterHomeTimelineResponseModel | None:
-        return self.__twitter_home_timeline_api_module.get_home_timeline(count, cursor, sort)
+    def get_home_timeline(
+            self,
+            count: int = 20,
+            cursor: str | None = None,
+            sort: SortType = 'DESC',
+            use_cache: bool = True) -> TwitterHomeTimelineResponseModel | None:
+        return self.__twitter_home_timeline_api_module.get_home_timeline(count, cursor, sort, use_cache)
 
     @authenticated
     def create_tweet(self, content: str, in_reply_to_tweet_id: str | None = None) -> str | None:
@@ -69,3 +92,11 @@ class TwitterAPIService:
     @authenticated
     def favorite_tweet(self, tweet_id: str) -> bool:
         return self.__twitter_tweets_api_module.favorite_tweet(tweet_id)
+
+    @authenticated
+    def create_tweets(self, items: List[CreateTweetItem], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        return self.__twitter_tweets_api_module.create_tweets(items, concurrency)
+
+    @authenticated
+    def favorite_tweets(self, tweet_ids: List[str], concurrency: int = DEFAULT_BULK_CONCURRENCY) -> List[TwitterTweetActionResultModel]:
+        return self.__twitter_tweets_api_module.favorite_tweets(tweet_ids, concurrency)
@@ -0,0 +1,159 @@
+import threading
+import time
+from typing import List, Protocol
+
+from pydantic import BaseModel
+
+from twitter_api.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SessionKeeperOptions(BaseModel):
+    # cookies whose expiration decides when a session must be refreshed
+    tracked_cookies: List[str] = ['auth_token', 'ct0', 'twid']
+    # refresh a session when one of its tracked cookies expires within this many seconds
+    refresh_before: float = 24 * 60 * 60
+    # seconds between two checks of the sessions
+    check_interval: float = 10 * 60
+
+
+class KeptSession(Protocol):
+    @property
+    def is_authenticated(self) -> bool:
+        ...
+
+    @property
+    def user_id(self) -> str | None:
+        ...
+
+    def get_session_expiration(self, cookies_to_check: List[str]) -> float | None:
+        ...
+
+    def refresh_session(self) -> bool:
+        ...
+
+    def relogin(self) -> bool:
+        ...
+
+
+class SessionKeeper:
+    """
+    Background thread refreshing the authenticated sessions before their cookies expire: the csrf token
+    is renewed with the Viewer query and the account logs in again only when it is not enough,
+    so that request threads never wait for an authentication.
+    """
+
+    __options: SessionKeeperOptions
+    __sessions: List[KeptSession]
+    __lock: threading.Lock
+    __check_lock: threading.Lock
+    __wake_up: threading.Event
+    __stop: threading.Event
+    __thread: threading.Thread | None = None
+
+    def __init__(self, options: SessionKeeperOptions | None = None) -> None:
+        self.__options = options or SessionKeeperOptions()
+        self.__sessions = []
+        self.__lock = threading.Lock()
+        self.__check_lock = threading.Lock()
+        self.__wake_up = threading.Event()
+        self.__stop = threading.Event()
+
+    def __enter__(self) -> 'SessionKeeper':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    @property
+    def sessions(self) -> List[KeptSession]:
+        with self.__lock:
+            return list(self.__sessions)
+
+    def start(self) -> None:
+        if self.__thread is not None:
+            return
+
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name='session-keeper', daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        if self.__thread is None:
+            return
+
+        self.__stop.set()
+        self.__wake_up.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def add(self, session: KeptSession) -> None:
+        with self.__lock:
+            # a session logging in again is already kept, waking up would check it again right away
+            if session in self.__sessions:
+                return
+
+            self.__sessions.append(session)
+
+        # the new session may already be close to its expiration
+        self.__wake_up.set()
+
+    def remove(self, session: KeptSession) -> None:
+        with self.__lock:
+            if session in self.__sessions:
+                self.__sessions.remove(session)
+
+    def check(self) -> int:
+        """
+        Refresh every authenticated session expiring soon, returns the number of refreshed sessions
+        """
+        refreshed = 0
+
+        # a manual check and the background one must not refresh the same session twice
+        with self.__check_lock:
+            for session in self.sessions:
+                if self.__stop.is_set():
+                    break
+
+                try:
+                    if session.is_authenticated and self.__keep_alive(session):
+                        refreshed += 1
+                except Exception as e:
+                    logger.warning('Failed to refresh session %s: %r', session.user_id, e)
+
+        return refreshed
+
+    def __is_expiring(self, session: KeptSession) -> bool:
+        expiration = session.get_session_expiration(self.__options.tracked_cookies)
+
+        return expiration is not None and expiration - time.time() < self.__options.refresh_before
+
+    def __keep_alive(self, session: KeptSession) -> bool:
+        if not self.__is_expiring(session):
+            return False
+
+        logger.info('Session %s expires soon, refreshing it', session.user_id)
+
+        if session.refresh_session() and not self.__is_expiring(session):
+            return True
+
+        # the Viewer query only renews the csrf token, the other cookies require a new login
+        logger.info('Session %s is still expiring after the refresh, logging in again', session.user_id)
+
+        if not session.relogin():
+            logger.error('Failed to login again session %s', session.user_id)
+            return False
+
+        return True
+
+    def __run(self) -> None:
+        while not self.__stop.is_set():
+            self.__wake_up.wait(self.__options.check_interval)
+            self.__wake_up.clear()
+
+            refreshed = self.check()
+
+            if refreshed:
+                logger.info('Refreshed %d sessions', refreshed)
@@ -0,0 +1,218 @@
+"""
+Decoding of the legacy dates of the twitter api, e.g. "Wed Oct 10 20:19:24 +0000 2018". The format has fixed
+width fields, so they are read at known positions with a month lookup table instead of going through strptime.
+Values that do not match the format exactly are decoded by strptime, which raises the usual ValueError.
+numpy is optional, installed with the `timestamps` extra (`poetry install --extras timestamps`):
+with numpy, parse_twitter_timestamps decodes a whole page with a few array operations.
+"""
+
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TWITTER_DATE_FORMAT: str = "%a %b %d %H:%M:%S %z %Y"
+TWITTER_DATE_LENGTH: int = 30
+
+_MONTHS: Dict[str, int] = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+_WEEKDAYS = frozenset(('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'))
+# days of the year before the first day of each month, in a common year
+_DAYS_BEFORE_MONTH = (0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# days from 0001-01-01 to 1970-01-01
+_EPOCH_ORDINAL: int = 719162
+
+# positions of the separators and of the digits in a date
+_SPACES = (3, 7, 10, 19, 25)
+_COLONS = (13, 16)
+_DIGITS = (8, 9, 11, 12, 14, 15, 17, 18, 21, 22, 23, 24, 26, 27, 28, 29)
+
+# the tweets of a page span a few days: the calendar part of a date, e.g. "Wed Oct 10 2018", is decoded once
+_DATES_CACHE_SIZE: int = 4096
+_DATES: Dict[str, Tuple[int, int, int, int] | None] = {}
+
+# one tzinfo per offset: datetimes sharing the same tzinfo object are compared field by field when sorted
+_TIMEZONES: Dict[int, timezone] = {}
+
+
+def _get_timezone(offset: int) -> timezone:
+    tz = _TIMEZONES.get(offset)
+
+    if tz is None:
+        tz = _TIMEZONES[offset] = timezone(timedelta(seconds=offset))
+
+    return tz
+
+
+def _is_leap(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _decode_date(text: str) -> Tuple[int, int, int, int] | None:
+    """
+    Year, month, day and days since the epoch of the calendar part of a date, e.g. "Wed Oct 10 2018"
+    """
+    month = _MONTHS.get(text[4:7])
+
+    if month is None or text[0:3] not in _WEEKDAYS or text[3] != ' ' or text[7] != ' ' or text[10] != ' ' \
+            or not (text[8:10] + text[11:15]).isdigit():
+        return None
+
+    year = int(text[11:15])
+    day = int(text[8:10])
+    leap = _is_leap(year)
+
+    if year == 0 or day == 0 or day > (29 if month == 2 and leap else _DAYS_IN_MONTH[month]):
+        return None
+
+    y = year - 1
+    days = y * 365 + y // 4 - y // 100 + y // 400 + _DAYS_BEFORE_MONTH[month] + day - 1 - _EPOCH_ORDINAL
+
+    return year, month, day, days + 1 if month > 2 and leap else days
+
+
+def _split(value: str) -> Tuple[int, int, int, int, int, int, int, int] | None:
+    """
+    Year, month, day, days since the epoch, hour, minute, second and offset in seconds of a date,
+    None when it does not match the format
+    """
+    if len(value) != TWITTER_DATE_LENGTH or not value.isascii() or value[20] not in '+-' or value[19] != ' ' \
+            or value[25] != ' ' or value[13] != ':' or value[16] != ':' \
+            or not (value[11:13] + value[14:16] + value[17:19] + value[21:25]).isdigit():
+        return None
+
+    key = value[:11] + value[26:]
+    date = _DATES.get(key)
+
+    if date is None:
+        if len(_DATES) >= _DATES_CACHE_SIZE:
+            _DATES.clear()
+
+        date = _DATES[key] = _decode_date(key)
+
+        if date is None:
+            return None
+
+    hour = int(value[11:13])
+    minute = int(value[14:16])
+    second = int(value[17:19])
+    offset_hours = int(value[21:23])
+    offset_minutes = int(value[23:25])
+
+    if hour > 23 or minute > 59 or second > 59 or offset_hours > 23 or offset_minutes > 59:
+        return None
+
+    offset = offset_hours * 3600 + offset_minutes * 60
+
+    return *date, hour, minute, second, -offset if value[20] == '-' else offset
+
+
+def parse_twitter_datetime(value: str) -> datetime:
+    """
+    Same aware datetime as datetime.strptime(value, TWITTER_DATE_FORMAT)
+    """
+    fields = _split(value)
+
+    if fields is None:
+        return datetime.strptime(value, TWITTER_DATE_FORMAT)
+
+    year, month, day, _, hour, minute, second, offset = fields
+
+    return datetime(year, month, day, hour, minute, second, tzinfo=_get_timezone(offset))
+
+
+def parse_twitter_timestamp(value: str) -> int:
+    """
+    Unix timestamp in seconds of a date
+    """
+    fields = _split(value)
+
+    if fields is None:
+        return int(datetime.strptime(value, TWITTER_DATE_FORMAT).timestamp())
+
+    _, _, _, days, hour, minute, second, offset = fields
+
+    return days * 86400 + hour * 3600 + minute * 60 + second - offset
+
+
+def parse_twitter_timestamps(values: Sequence[str]) -> Any:
+    """
+    Unix timestamps in seconds of many dates, e.g. the tweets of a page, as an int64 numpy array,
+    or as an array('q') without numpy
+    """
+    if numpy is None:
+        return array('q', map(parse_twitter_timestamp, values))
+
+    if len(values) == 0:
+        return numpy.zeros(0, dtype=numpy.int64)
+
+    try:
+        # one extra byte tells the longer values apart, they are truncated by the conversion
+        raw = numpy.array(values, dtype=f'S{TWITTER_DATE_LENGTH + 1}')
+    except UnicodeEncodeError:
+        return numpy.fromiter(map(parse_twitter_timestamp, values), dtype=numpy.int64, count=len(values))
+
+    return _parse_timestamps_array(values, raw.view(numpy.uint8).reshape(len(values), TWITTER_DATE_LENGTH + 1))
+
+
+def _parse_timestamps_array(values: Sequence[str], chars: Any) -> Any:
+    digits = chars[:, _DIGITS].astype(numpy.int64) - ord('0')
+
+    def number(*positions: int) -> Any:
+        result = digits[:, _DIGITS.index(positions[0])]
+
+        for position in positions[1:]:
+            result = result * 10 + digits[:, _DIGITS.index(position)]
+
+        return result
+
+    valid = (chars[:, TWITTER_DATE_LENGTH] == 0) & (chars[:, TWITTER_DATE_LENGTH - 1] != 0)
+    valid &= (chars[:, _SPACES] == ord(' ')).all(axis=1) & (chars[:, _COLONS] == ord(':')).all(axis=1)
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= (chars[:, 20] == ord('+')) | (chars[:, 20] == ord('-'))
+
+    def names(start: int) -> Any:
+        return (chars[:, start].astype(numpy.int64) << 16) | (chars[:, start + 1].astype(numpy.int64) << 8) \
+            | chars[:, start + 2]
+
+    month_keys = numpy.array([int.from_bytes(name.encode(), 'big') for name in _MONTHS], dtype=numpy.int64)
+    weekday_keys = numpy.array([int.from_bytes(name.encode(), 'big') for name in _WEEKDAYS], dtype=numpy.int64)
+    month_names = names(4)
+    month = numpy.zeros(len(values), dtype=numpy.int64)
+
+    for number_of_month, key in enumerate(month_keys, 1):
+        month[month_names == key] = number_of_month
+
+    valid &= (month > 0) & numpy.isin(names(0), weekday_keys)
+
+    year = number(26, 27, 28, 29)
+    day = number(8, 9)
+    hour = number(11, 12)
+    minute = number(14, 15)
+    second = number(17, 18)
+    offset_hours = number(21, 22)
+    offset_minutes = number(23, 24)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = numpy.array(_DAYS_IN_MONTH, dtype=numpy.int64)[month] + (leap & (month == 2))
+
+    valid &= (year > 0) & (day > 0) & (day <= days_in_month) & (hour <= 23) & (minute <= 59) & (second <= 59) \
+        & (offset_hours <= 23) & (offset_minutes <= 59)
+
+    y = year - 1
+    days = y * 365 + y // 4 - y // 100 + y // 400 + numpy.array(_DAYS_BEFORE_MONTH, dtype=numpy.int64)[month] \
+        + day - 1 - _EPOCH_ORDINAL + (leap & (month > 2))
+    offset = (offset_hours * 3600 + offset_minutes * 60) * numpy.where(chars[:, 20] == ord('-'), -1, 1)
+    timestamps = days * 86400 + hour * 3600 + minute * 60 + second - offset
+
+    # the values outside of the format go through the fallback, which raises on invalid dates
+    for i in numpy.flatnonzero(~valid):
+        timestamps[i] = parse_twitter_timestamp(values[i])
+
+    return timestamps
@@ -1,41 +1,63 @@
-import random
+import abc
+import logging
 import time
+from contextlib import contextmanager
+from functools import partial
 from http import HTTPMethod
-from typing import Any, Dict, Generic, List, Type, TypeVar
+from typing import (
+    Any, AsyncIterable, Callable, Dict, Generator, Generic, Iterable, List, Mapping, Protocol, Tuple, Type, TypeVar
+)
 
 import requests
-from pydantic import BaseModel, FieldValidationInfo, field_validator
+from pydantic import BaseModel, ValidationError
 
-from twitter_api.logger import get_logger
+from twitter_api.guest_token_pool import GuestTokenPool
+from twitter_api.instrumentation import InstrumentationHooks, RequestEvent, ResponseEvent, WaitReason
+from twitter_api.logger import body_excerpt, get_logger, should_log_body
 from twitter_api.models.twitter_models import EmptyResponseModel, GuestTokenResponseModel
+from twitter_api.rate_limiter import (
+    RateLimiterInterface, RateLimiterOptions, RateLimitQuota, TokenBucketRateLimiter, get_operation_name
+)
+from twitter_api.replay_transport import ReplayTransportOptions, build_adapter
+from twitter_api.response_cache import CachedResponse, ResponseCache, build_cache_key, get_account_key
+from twitter_api.retry_policy import RetryOptions, RetryPolicy
+from twitter_api.services.modules.timeline.twitter_home_timeline_parser import TimelineParserType
 
 logger = get_logger(__name__)
 
 
-MIN_WAIT_TIME: int = 1
-MAX_WAIT_TIME: int = 5
+MAX_CONNECTIONS: int = 100
+MAX_KEEPALIVE_CONNECTIONS: int = 20
 
+GUEST_TOKEN_OPERATION: str = 'guest/activate.json'
+# "Bad guest token", returned with 401 or 403 when the guest token expired
+GUEST_TOKEN_ERROR_CODES = {239}
+GUEST_TOKEN_REQUEST_TIMEOUT: float = 30
 
-class TwitterClientOptions(BaseModel):
-    proxies: Dict[str, str] | None = None
-    min_wait_time: int = MIN_WAIT_TIME
-    max_wait_time: int = MAX_WAIT_TIME
-
-    @field_validator('min_wait_time', 'max_wait_time')
-    @classmethod
-    def validate_wait_times(cls, v: int, info: FieldValidationInfo) -> int:
-        if v < 1 or v > 20:
-            raise ValueError(f"{info.field_name} must be greater than 1 and lower than 20 seconds")
+API_BASE_URL_V_1_1: str = "https://api.twitter.com/1.1"
+BASE_URL: str = "https://twitter.com"
+GQL_URL: str = "https://twitter.com/i/api/graphql"
+# size of the chunks read from the body of streamed responses
+STREAM_CHUNK_SIZE: int = 16 * 1024
 
-        return v
 
-    @field_validator('min_wait_time', 'max_wait_time')
-    @classmethod
-    def validate_min_max_times(cls, v: int, info: FieldValidationInfo) -> int:
-        if 'max_wait_time' in info.data and v >= info.data['max_wait_time']:
-            raise ValueError("min_wait_time must be less than max_wait_time")
-
-        return v
+class TwitterClientOptions(BaseModel):
+    proxies: Dict[str, str] | None = None
+    # requests are delayed only when the token bucket of their operation is exhausted
+    rate_limiter: RateLimiterOptions = RateLimiterOptions()
+    # idempotent reads are retried with backoff on 429, 5xx and connection errors
+    retry: RetryOptions = RetryOptions()
+    # connection pool limits, used by the async client to share keep-alive connections between requests
+    max_connections: int = MAX_CONNECTIONS
+    max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS
+    # endpoints, overridden e.g. to replay recorded responses from a local server
+    api_base_url_v_1_1: str = API_BASE_URL_V_1_1
+    base_url: str = BASE_URL
+    gql_url: str = GQL_URL
+    # record the exchanges in an archive, or replay them without reaching the network
+    transport: ReplayTransportOptions | None = None
+    # home timeline parser: 'pydantic' validates the whole raw GraphQL tree, 'fast' extracts only the needed fields
+    timeline_parser: TimelineParserType = 'pydantic'
 
 
 T = TypeVar("T", bound=BaseModel)
@@ -53,135 +75,667 @@ class TwitterAPIResponse(BaseModel, Generic[T]):
     errors: List[TwitterAPIErrorResponse] | None = None
 
 
-class TwitterClient:
+class TwitterAPIStreamResponse:
+    """
+    Response of a streamed request, the chunks of the body of a successful response are read from `chunks`
+    """
+
+    is_success: bool
+    status_code: int
+    errors: List[TwitterAPIErrorResponse] | None
+    chunks: Iterable[bytes] | AsyncIterable[bytes]
+
+    def __init__(
+            self,
+            is_success: bool,
+            status_code: int,
+            chunks: Iterable[bytes] | AsyncIterable[bytes] = (),
+            errors: List[TwitterAPIErrorResponse] | None = None) -> None:
+        self.is_success = is_success
+        self.status_code = status_code
+        self.chunks = chunks
+        self.errors = errors
+
+
+class HTTPResponse(Protocol):
+    """
+    Subset of the response interface shared by requests and httpx
+    """
+
+    @property
+    def status_code(self) -> int:
+        ...
+
+    @property
+    def text(self) -> str:
+        ...
+
+    @property
+    def content(self) -> bytes:
+        ...
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        ...
+
+    def json(self, **kwargs: Any) -> Any:
+        ...
+
+
+class TwitterBaseClient(abc.ABC):
+    """
+    Shared state and helpers of the sync and async twitter clients: options, default headers, endpoints
+    and the conversion of raw http responses into TwitterAPIResponse objects
+    """
+
     # This bearer token is used to authenticate requests to the Twitter API and seems to be always the same,
     # I don't know if it's a good idea to hardcode it but it's the only way I found to make requests to the API
-    __DEFAULT_BEARER_TOKEN: str = "AAAAAAAAAAAAAAAAAAAAANRILgAAAAAAnNwIzUejRCOuH5E6I8xnZz4puTs%3D1Zv7ttfk8LF81IUq16cHjhLTvJu4FA33AGWWjCpTnA"
-    __DEFAULT_LANG: str = "en"
-
-    __session: requests.Session
-    __options: TwitterClientOptions | None = None
-    __headers: Dict[str, str] = {
+    _DEFAULT_BEARER_TOKEN: str = "AAAAAAAAAAAAAAAAAAAAANRILgAAAAAAnNwIzUejRCOuH5E6I8xnZz4puTs%3D1Zv7ttfk8LF81IUq16cHjhLTvJu4FA33AGWWjCpTnA"
+    _DEFAULT_LANG: str = "en"
+    _DEFAULT_HEADERS: Dict[str, str] = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.45 Safari/537.36',
         'Content-Type': 'application/json',
         "x-twitter-active-user": "yes",
-        "x-twitter-client-language": __DEFAULT_LANG,
+        "x-twitter-client-language": _DEFAULT_LANG,
     }
 
-    def __init__(self, options: TwitterClientOptions | None = None) -> None:
-        self.__options = options
-
-    def __enter__(self) -> "TwitterClient":
-        self.__session = requests.Session()
-        self.__get_guest_token()
-        return self
-
-    def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self.__session.close()
+    _options: TwitterClientOptions | None = None
+    _headers: Dict[str, str]
+    _rate_limiter: RateLimiterInterface
+    _retry_policy: RetryPolicy
+    _hooks: List[InstrumentationHooks]
+    _guest_token_pool: GuestTokenPool | None
+    _response_cache: ResponseCache | None
 
-    @property
-    def session(self) -> requests.Session:
-        return self.__session
+    def __init__(
+            self,
+            options: TwitterClientOptions | None = None,
+            rate_limiter: RateLimiterInterface | None = None,
+            hooks: List[InstrumentationHooks] | None = None,
+            guest_token_pool: GuestTokenPool | None = None,
+            response_cache: ResponseCache | None = None) -> None:
+        self._options = options
+        self._rate_limiter = rate_limiter or TokenBucketRateLimiter(options.rate_limiter if options else None)
+        self._retry_policy = RetryPolicy(options.retry if options else None)
+        self._hooks = list(hooks or [])
+        self._guest_token_pool = guest_token_pool
+        self._response_cache = response_cache
+        # every client owns its headers, they hold the guest token and the csrf token of its session
+        self._headers = dict(self._DEFAULT_HEADERS)
 
     @property
     def options(self) -> TwitterClientOptions | None:
-        return self.__options
+        return self._options
 
     @options.setter
     def options(self, options: TwitterClientOptions) -> None:
-        self.__options = options
+        self._options = options
+
+    @property
+    def rate_limiter(self) -> RateLimiterInterface:
+        return self._rate_limiter
+
+    @property
+    def quotas(self) -> Dict[str, RateLimitQuota]:
+        """
+        Last known server quota of each operation, from the x-rate-limit-* response headers
+        """
+        return self._rate_limiter.quotas
 
     @property
     def headers(self) -> Dict[str, Any]:
-        self.__headers.update({'x-csrf-token': self.__session.cookies.get('ct0') or ''})
-        return self.__headers
+        self._headers.update({'x-csrf-token': self._get_cookie('ct0') or ''})
+        return self._headers
 
     @headers.setter
     def headers(self, headers: Dict[str, Any]) -> None:
-        self.__headers = headers
+        self._headers = headers
+
+    @property
+    def response_cache(self) -> ResponseCache | None:
+        return self._response_cache
+
+    @property
+    def guest_token(self) -> str | None:
+        return self._headers.get('x-guest-token')
 
     @property
     def api_base_url_v_1_1(self) -> str:
-        return "https://api.twitter.com/1.1"
+        return self._options.api_base_url_v_1_1 if self._options else API_BASE_URL_V_1_1
 
     @property
     def base_url(self) -> str:
-        return "https://twitter.com"
+        return self._options.base_url if self._options else BASE_URL
 
     @property
     def gql_url(self) -> str:
-        return "https://twitter.com/i/api/graphql"
+        return self._options.gql_url if self._options else GQL_URL
 
-    def request(
+    @property
+    def guest_token_url(self) -> str:
+        return f"{self.api_base_url_v_1_1}/guest/activate.json"
+
+    def add_hooks(self, hooks: InstrumentationHooks) -> None:
+        """
+        Register instrumentation hooks, e.g. a MetricsCollector, invoked around every request of the client
+        """
+        self._hooks.append(hooks)
+
+    def _emit_request(self, operation: str, method: HTTPMethod, url: str, attempt: int) -> None:
+        if not self._hooks:
+            return
+
+        event = RequestEvent(operation=operation, method=method.value, url=url, attempt=attempt)
+
+        for hooks in self._hooks:
+            self.__call_hook(hooks.on_request, event)
+
+    def _emit_response(
             self,
+            operation: str,
             method: HTTPMethod,
             url: str,
-            model_type: Type[T] = EmptyResponseModel,
-            headers: Dict[str, Any] | None = None,
-            params: Dict[str, Any] | None = None,
-            data: Dict[str, Any] | None = None) -> 'TwitterAPIResponse[T]':
-        headers = headers or self.headers
+            attempt: int,
+            elapsed: float,
+            response: HTTPResponse | None = None,
+            error: Exception | None = None,
+            bytes_received: int | None = None,
+            guest_token_rejected: bool = False) -> None:
+        """
+        bytes_received is the size of the body read from a streamed response, None reads the downloaded body
+        """
+        if not self._hooks:
+            return
+
+        if bytes_received is None:
+            bytes_received = len(response.content) if response is not None else 0
+
+        event = ResponseEvent(
+            operation=operation,
+            method=method.value,
+            url=url,
+            attempt=attempt,
+            status_code=response.status_code if response is not None else None,
+            elapsed=elapsed,
+            bytes_received=bytes_received,
+            error=repr(error) if error is not None else None,
+            guest_token_rejected=guest_token_rejected)
+
+        for hooks in self._hooks:
+            self.__call_hook(hooks.on_response, event)
+
+    def _emit_wait(self, operation: str, seconds: float, reason: WaitReason) -> None:
+        for hooks in self._hooks:
+            self.__call_hook(hooks.on_wait, operation, seconds, reason)
+
+    def _emit_deserialize(self, operation: str, seconds: float) -> None:
+        for hooks in self._hooks:
+            self.__call_hook(hooks.on_deserialize, operation, seconds)
+
+    def _log_response(
+            self,
+            method: HTTPMethod,
+            data: Dict[str, Any] | bytes | None,
+            response: HTTPResponse,
+            url: Any,
+            streamed: bool = False) -> None:
+        # only the head of the body is decoded, and only when debug logging is enabled
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
 
-        wait_time = random.randint(
-            self.__options.min_wait_time if self.__options else MIN_WAIT_TIME,
-            self.__options.max_wait_time if self.__options else MAX_WAIT_TIME)
+        body = body_excerpt(response.content) if should_log_body() and not streamed else None
 
-        time.sleep(wait_time)
+        logger.debug(
+            "Request to %s with method %s and body %s returned status code %s. Response: %s",
+            url, method.value, data or 'null', response.status_code, body or 'null',
+            extra={'url': str(url), 'method': method.value, 'status_code': response.status_code, 'body_excerpt': body})
 
-        response = self.__session.request(
-            method.value.lower(),
-            url,
-            headers=headers,
-            params=params,
-            json=data,
-            proxies=self.__options.proxies if self.__options else None)
+    @abc.abstractmethod
+    def _get_cookie(self, name: str) -> str | None:
+        pass
 
-        logger.debug(
-            f"Request to {response.url} with method {method.value} and body {data or 'null'}" +
-            f"returned status code {response.status_code}. Response: {response.text if response.text and len(response.text) < 5000 else 'null'}")
+    def _get_wait_time(self, operation: str) -> float:
+        return self._rate_limiter.acquire(operation)
 
-        if 400 <= response.status_code and response.status_code < 500:
-            logger.warning(f"Request failed with status code {response.status_code} and body {response.text or 'null'}")
+    def _get_attempt_wait(self, operation: str, retry_delay: float | None) -> Tuple[float, WaitReason]:
+        """
+        Get the seconds to wait before an attempt and the reason of the wait.
+        After a 429 the retry delay and the limiter both wait for the reset of the same window:
+        the longest of the two is waited once, instead of one after the other.
+        """
+        wait_time = self._get_wait_time(operation)
 
-            try:
-                errors_json = response.json()
-                errors = [TwitterAPIErrorResponse(**error) for error in errors_json['errors'] if 'errors' in errors_json]
+        if retry_delay is not None and retry_delay >= wait_time:
+            return retry_delay, 'retry'
+
+        return wait_time, 'rate_limit'
+
+    def _update_quota(self, operation: str, response: HTTPResponse) -> RateLimitQuota | None:
+        quota = RateLimitQuota.from_headers(response.headers)
 
-            except ValueError:
-                errors = None
+        if quota is None:
+            return None
 
-            return TwitterAPIResponse[T](
-                is_success=False,
-                status_code=response.status_code,
-                errors=errors
-            )
+        if response.status_code == 429:
+            # the window is closed whatever the remaining header says
+            quota.remaining = 0
+
+        self._rate_limiter.update_quota(operation, quota)
+
+        return quota
+
+    def _get_retry_delay(
+            self,
+            operation: str,
+            attempt: int,
+            status_code: int | None = None,
+            quota: RateLimitQuota | None = None) -> float | None:
+        """
+        Get the seconds to wait before retrying the request, None if it must not be retried.
+        A missing status code means that the request failed with a connection error.
+        """
+        if status_code is None:
+            if not self._retry_policy.can_retry(operation, attempt):
+                return None
+
+        elif not self._retry_policy.should_retry(operation, status_code, attempt):
+            return None
+
+        retry_delay = self._retry_policy.get_delay(attempt, quota if status_code == 429 else None)
+
+        if retry_delay is not None:
+            logger.warning(
+                "%s failed with %s, retrying in %.2f seconds (attempt %d)",
+                operation, status_code or 'connection error', retry_delay, attempt + 1)
+
+        return retry_delay
+
+    def _get_cache_key(
+            self,
+            operation: str,
+            params: Dict[str, Any] | str | None,
+            data: Dict[str, Any] | bytes | None) -> str | None:
+        """
+        Key of the response in the cache, None when the operation is not cached
+        """
+        if self._response_cache is None or not self._response_cache.is_cacheable(operation):
+            return None
 
+        return build_cache_key(operation, get_account_key(self._get_cookie('auth_token')), params, data)
+
+    def _get_revalidation_headers(self, headers: Dict[str, Any] | None, entry: CachedResponse | None) -> Dict[str, Any] | None:
+        if entry is None or not entry.can_revalidate:
+            return headers
+
+        return {**(headers or self.headers), **entry.get_revalidation_headers()}
+
+    def _store_response(
+            self,
+            operation: str,
+            key: str,
+            entry: CachedResponse | None,
+            response: HTTPResponse) -> HTTPResponse:
+        """
+        Cache a successful response, a 304 answering a conditional request renews the stale entry instead
+        """
+        if response.status_code == 304 and entry is not None:
+            logger.debug("%s revalidated, the cached response is still valid", operation)
+            return self._response_cache.refresh(operation, key, entry)
+
+        if 200 <= response.status_code < 300:
+            self._response_cache.set(operation, key, response.status_code, response.headers, response.content)
+
+        return response
+
+    def _build_session(self) -> requests.Session:
+        """
+        A requests session sending through the record/replay transport of the options, if any
+        """
+        session = requests.Session()
+        transport = self._options.transport if self._options else None
+
+        if transport is not None:
+            adapter = build_adapter(transport)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+        return session
+
+    def activate_guest_token(self) -> str:
+        """
+        Activate a guest token with a standalone request, the session and the headers of the client are untouched.
+        This is the activator used by GuestTokenPool.
+        """
+        wait_time = self._get_wait_time(GUEST_TOKEN_OPERATION)
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        with self._build_session() as session:
+            response = session.post(
+                self.guest_token_url,
+                headers={**self._DEFAULT_HEADERS, 'Authorization': f'Bearer {self._DEFAULT_BEARER_TOKEN}'},
+                proxies=self._options.proxies if self._options else None,
+                timeout=GUEST_TOKEN_REQUEST_TIMEOUT)
+
+        self._update_quota(GUEST_TOKEN_OPERATION, response)
         response.raise_for_status()
 
-        model_response = self.__deserialize_response_to_model(response, model_type)
+        return GuestTokenResponseModel.model_validate(response.json()).guest_token
 
-        return TwitterAPIResponse[T](
-            is_success=response.ok,
-            status_code=response.status_code,
-            data=model_response
-        )
+    def _is_guest_token_error(self, operation: str, response: HTTPResponse) -> bool:
+        if operation == GUEST_TOKEN_OPERATION or response.status_code not in (401, 403) or self.guest_token is None:
+            return False
 
-    def __get_guest_token(self) -> None:
-        self.__headers.update({'Authorization': f'Bearer {self.__DEFAULT_BEARER_TOKEN}'})
-        guest_response = self.request(HTTPMethod.POST, f"{self.api_base_url_v_1_1}/guest/activate.json", model_type=GuestTokenResponseModel)
+        # without a session every 401/403 is caused by the guest token, otherwise the error code tells
+        if self._get_cookie('auth_token') is None:
+            return True
+
+        try:
+            errors = response.json().get('errors') or []
+        except (ValueError, AttributeError):
+            return False
+
+        return any(isinstance(error, dict) and error.get('code') in GUEST_TOKEN_ERROR_CODES for error in errors)
+
+    def _is_guest_token_retired(self, operation: str) -> bool:
+        """
+        Whether the pool retired the guest token of the client, so that it is replaced before being rejected
+        """
+        guest_token = self.guest_token
+
+        return self._guest_token_pool is not None and operation != GUEST_TOKEN_OPERATION \
+            and guest_token is not None and not self._guest_token_pool.is_valid(guest_token)
+
+    def _invalidate_guest_token(self) -> None:
+        guest_token = self._headers.pop('x-guest-token', None)
+
+        if self._guest_token_pool is not None and guest_token is not None:
+            self._guest_token_pool.invalidate(guest_token)
 
+    def _set_guest_token_value(self, guest_token: str) -> None:
+        self._headers.update({'Authorization': f'Bearer {self._DEFAULT_BEARER_TOKEN}', 'x-guest-token': guest_token})
+
+    def _prepare_guest_token_request(self) -> None:
+        self._headers.update({'Authorization': f'Bearer {self._DEFAULT_BEARER_TOKEN}'})
+
+    def _set_guest_token(self, guest_response: 'TwitterAPIResponse[GuestTokenResponseModel]') -> None:
         if not guest_response.is_success or guest_response.data is None or guest_response.data.guest_token is None:
             raise Exception("Failed to hydratate session: missing guest token")
 
-        self.headers.update({'x-guest-token': guest_response.data.guest_token})
+        self._set_guest_token_value(guest_response.data.guest_token)
+
+    def _build_failed_response(self, response: HTTPResponse) -> 'TwitterAPIResponse[Any]':
+        logger.warning(
+            "Request failed with status code %s and body %s", response.status_code, body_excerpt(response.content) or 'null')
+
+        try:
+            errors_json = response.json()
+        except ValueError:
+            errors_json = None
 
-    def __deserialize_response_to_model(self, response: requests.Response, model_type: Type[T]) -> T:
+        # the body of an error is not always the usual {"errors": [...]}, e.g. a proxy page or a bare list
+        items = errors_json.get('errors') if isinstance(errors_json, dict) else None
+        errors: List[TwitterAPIErrorResponse] | None = None
+
+        if isinstance(items, list):
+            errors = []
+
+            for item in items:
+                try:
+                    errors.append(TwitterAPIErrorResponse.model_validate(item))
+                except ValidationError:
+                    logger.debug("Ignoring malformed error %r", item)
+
+        return TwitterAPIResponse(
+            is_success=False,
+            status_code=response.status_code,
+            errors=errors
+        )
+
+    def _deserialize_response_to_model(self, response: HTTPResponse, model_type: Type[T], operation: str | None = None) -> T:
         if model_type is EmptyResponseModel:
             return model_type()
 
+        started_at = time.perf_counter()
+
         try:
             json_data = response.json()
             return model_type.model_validate(json_data)
-        except (requests.exceptions.HTTPError, ValueError, TypeError, KeyError) as e:
+        except (ValueError, TypeError, KeyError) as e:
             logger.error("Error occurred during deserialization: %s", e)
             raise e
+        finally:
+            if operation is not None:
+                self._emit_deserialize(operation, time.perf_counter() - started_at)
+
+    @staticmethod
+    def __call_hook(hook: Any, *args: Any) -> None:
+        # a broken hook must never fail the request
+        try:
+            hook(*args)
+        except Exception as e:
+            logger.exception("Instrumentation hook %s failed: %r", hook.__qualname__, e)
+
+
+class TwitterClient(TwitterBaseClient):
+    __session: requests.Session
+
+    def __enter__(self) -> "TwitterClient":
+        self.__session = self._build_session()
+        self.__get_guest_token()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.__session.close()
+
+    @property
+    def session(self) -> requests.Session:
+        return self.__session
+
+    def request(
+            self,
+            method: HTTPMethod,
+            url: str,
+            model_type: Type[T] = EmptyResponseModel,
+            headers: Dict[str, Any] | None = None,
+            params: Dict[str, Any] | str | None = None,
+            data: Dict[str, Any] | bytes | None = None,
+            use_cache: bool = True) -> 'TwitterAPIResponse[T]':
+        """
+        data is sent as json, a pre-encoded json body can be given as bytes.
+        The reads cached by the response cache of the client are sent to the network only when use_cache is False.
+        """
+        operation = get_operation_name(url)
+        cache_key = self._get_cache_key(operation, params, data) if use_cache else None
+
+        if cache_key is None:
+            response, _ = self.__send(operation, method, url, headers, params, data)
+        else:
+            response = self.__send_cached(cache_key, operation, method, url, headers, params, data)
+
+        if 400 <= response.status_code and response.status_code < 500:
+            return self._build_failed_response(response)
+
+        response.raise_for_status()
+
+        model_response = self._deserialize_response_to_model(response, model_type, operation)
+
+        return TwitterAPIResponse[T](
+            is_success=response.ok,
+            status_code=response.status_code,
+            data=model_response
+        )
+
+    @contextmanager
+    def stream_request(
+            self,
+            method: HTTPMethod,
+            url: str,
+            headers: Dict[str, Any] | None = None,
+            params: Dict[str, Any] | str | None = None,
+            data: Dict[str, Any] | bytes | None = None) -> Generator['TwitterAPIStreamResponse', None, None]:
+        """
+        Same as request, but the body of a successful response is not downloaded upfront:
+        its chunks are read from `chunks` while the context is open, the connection is released on exit
+        """
+        operation = get_operation_name(url)
+        response, emit_response = self.__send(operation, method, url, headers, params, data, stream=True)
+        bytes_received = 0
+
+        def count_chunks(chunks: Iterable[bytes]) -> Generator[bytes, None, None]:
+            nonlocal bytes_received
+
+            for chunk in chunks:
+                bytes_received += len(chunk)
+                yield chunk
+
+        try:
+            if 400 <= response.status_code and response.status_code < 500:
+                failed_response = self._build_failed_response(response)
+
+                yield TwitterAPIStreamResponse(False, response.status_code, errors=failed_response.errors)
+                return
+
+            response.raise_for_status()
+
+            yield TwitterAPIStreamResponse(
+                response.ok, response.status_code, chunks=count_chunks(response.iter_content(chunk_size=STREAM_CHUNK_SIZE)))
+        finally:
+            response.close()
+
+            if emit_response is not None:
+                emit_response(bytes_received=bytes_received)
+
+    def _get_cookie(self, name: str) -> str | None:
+        return self.__session.cookies.get(name)
+
+    def __send_cached(
+            self,
+            key: str,
+            operation: str,
+            method: HTTPMethod,
+            url: str,
+            headers: Dict[str, Any] | None,
+            params: Dict[str, Any] | str | None,
+            data: Dict[str, Any] | bytes | None) -> HTTPResponse:
+        """
+        Return the fresh cached response, otherwise send the request once for all the threads asking for the same key
+        """
+        entry = self._response_cache.get(key)
+
+        if entry is not None and entry.is_fresh:
+            return entry
+
+        future, is_owner = self._response_cache.join(key)
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            response, _ = self.__send(
+                operation, method, url, self._get_revalidation_headers(headers, entry), params, data)
+            response = self._store_response(operation, key, entry, response)
+        except BaseException as e:
+            self._response_cache.leave(key, future, error=e)
+            raise
+
+        self._response_cache.leave(key, future, response)
+
+        return response
+
+    def __send(
+            self,
+            operation: str,
+            method: HTTPMethod,
+            url: str,
+            headers: Dict[str, Any] | None,
+            params: Dict[str, Any] | str | None,
+            data: Dict[str, Any] | bytes | None,
+            stream: bool = False) -> Tuple[requests.Response, Callable[..., None] | None]:
+        """
+        Send the request, retried on rate limits, server errors and rejected guest tokens.
+        With stream, the body of the returned response is read only on demand, except for error responses:
+        the response event is then emitted by the returned callback, given the bytes read from the body.
+        """
+        json_data, body = (None, data) if isinstance(data, bytes) else (data, None)
+
+        if self._is_guest_token_retired(operation):
+            self.__get_guest_token()
+
+        headers = headers or self.headers
+        attempt = 0
+        # set by a failed attempt, waited at the top of the next one
+        retry_delay: float | None = None
+        guest_token_refreshed = False
+
+        while True:
+            wait_time, wait_reason = self._get_attempt_wait(operation, retry_delay)
+
+            if wait_time > 0:
+                self._emit_wait(operation, wait_time, wait_reason)
+                time.sleep(wait_time)
+
+            retry_delay = None
+
+            self._emit_request(operation, method, url, attempt)
+            started_at = time.perf_counter()
+
+            try:
+                response = self.__session.request(
+                    method.value.lower(),
+                    url,
+                    headers=headers,
+                    params=params,
+                    json=json_data,
+                    data=body,
+                    proxies=self._options.proxies if self._options else None,
+                    stream=stream)
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._emit_response(operation, method, url, attempt, time.perf_counter() - started_at, error=e)
+                retry_delay = self._get_retry_delay(operation, attempt)
+
+                if retry_delay is None:
+                    raise
+
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - started_at
+            streamed = stream and response.ok
+            guest_token_rejected = not guest_token_refreshed and self._is_guest_token_error(operation, response)
+            # the hooks read the quota of the response, e.g. to bench a rate limited session
+            quota = None if guest_token_rejected else self._update_quota(operation, response)
+
+            if not streamed:
+                self._emit_response(operation, method, url, attempt, elapsed, response, guest_token_rejected=guest_token_rejected)
+
+            self._log_response(method, data, response, response.url, streamed=streamed)
+
+            if guest_token_rejected:
+                logger.warning("%s was rejected with %s, retrying with a new guest token", operation, response.status_code)
+                response.close()
+                self._invalidate_guest_token()
+                self.__get_guest_token()
+                headers = {**headers, 'x-guest-token': self._headers['x-guest-token']}
+                guest_token_refreshed = True
+                continue
+
+            retry_delay = self._get_retry_delay(operation, attempt, response.status_code, quota)
+
+            if retry_delay is None:
+                emit_response = partial(self._emit_response, operation, method, url, attempt, elapsed, response)
+
+                return response, emit_response if streamed else None
+
+            response.close()
+            attempt += 1
+
+    def __get_guest_token(self) -> None:
+        if self._guest_token_pool is not None:
+            self._set_guest_token_value(self._guest_token_pool.acquire())
+            return
+
+        self._prepare_guest_token_request()
+        self._set_guest_token(self.request(HTTPMethod.POST, self.guest_token_url, model_type=GuestTokenResponseModel))
@@ -0,0 +1,256 @@
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Generator, List
+
+from pydantic import BaseModel
+
+from twitter_api.graphql_operations import (
+    DEFAULT_GRAPHQL_OPERATION_REGISTRY, VIEWER_OPERATION, GraphQLOperationRegistry
+)
+from twitter_api.guest_token_pool import GuestTokenPool
+from twitter_api.instrumentation import InstrumentationHooks, ResponseEvent
+from twitter_api.logger import get_logger
+from twitter_api.response_cache import ResponseCache
+from twitter_api.services.modules.auth.session.cookies_cache_service_interface import (
+    CookiesCacheServiceInterface
+)
+from twitter_api.services.modules.auth.twitter_auth_api_module import TwitterAuthAPIModule
+from twitter_api.services.modules.store.tweets_store_interface import TweetsStoreInterface
+from twitter_api.services.modules.timeline.twitter_home_timeline_api_module import TwitterHomeTimelineAPIModule
+from twitter_api.services.modules.tweets.twitter_tweets_api_module import TwitterTweetsAPIModule
+from twitter_api.session_keeper import SessionKeeper
+from twitter_api.twitter_client import TwitterClient, TwitterClientOptions
+
+logger = get_logger(__name__)
+
+# seconds a session stays out of rotation for an operation when it is rate limited and the reset time is unknown
+DEFAULT_COOLDOWN: float = 15 * 60
+
+
+class TwitterAccountCredentials(BaseModel):
+    user_id: str
+    alternate_id: str
+    password: str
+
+
+class TwitterPoolSession(InstrumentationHooks):
+    """
+    An authenticated account of the pool, with its own client (cookie jar, guest token and rate limits)
+    and its own api modules. The session watches the responses of its client to leave the rotation
+    when it is rate limited or unauthorized.
+    """
+
+    credentials: TwitterAccountCredentials
+    twitter_client: TwitterClient
+    twitter_auth_api_module: TwitterAuthAPIModule
+    twitter_tweets_api_module: TwitterTweetsAPIModule
+    twitter_home_timeline_api_module: TwitterHomeTimelineAPIModule
+    in_flight: int = 0
+    requests_count: int = 0
+
+    __cookies_cache_service: CookiesCacheServiceInterface
+    __cooldown: float
+    __disabled_until: Dict[str, float]
+    __needs_login: bool = False
+
+    def __init__(
+            self,
+            credentials: TwitterAccountCredentials,
+            twitter_client: TwitterClient,
+            cookies_cache_service: CookiesCacheServiceInterface,
+            cooldown: float = DEFAULT_COOLDOWN,
+            tweets_store: TweetsStoreInterface | None = None,
+            session_keeper: SessionKeeper | None = None,
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY) -> None:
+        self.credentials = credentials
+        self.twitter_client = twitter_client
+        self.twitter_auth_api_module = TwitterAuthAPIModule(
+            twitter_client, cookies_cache_service, session_keeper, graphql_operations)
+        self.twitter_tweets_api_module = TwitterTweetsAPIModule(twitter_client, graphql_operations)
+        self.twitter_home_timeline_api_module = TwitterHomeTimelineAPIModule(
+            twitter_client,
+            self.twitter_tweets_api_module,
+            timeline_parser=twitter_client.options.timeline_parser if twitter_client.options else 'pydantic',
+            tweets_store=tweets_store,
+            graphql_operations=graphql_operations)
+        self.__cookies_cache_service = cookies_cache_service
+        self.__cooldown = cooldown
+        self.__disabled_until = {}
+
+        twitter_client.add_hooks(self)
+
+    @property
+    def key(self) -> str:
+        return self.credentials.user_id
+
+    def is_healthy(self, operation: str | None = None) -> bool:
+        if self.__needs_login or not self.twitter_auth_api_module.is_authenticated:
+            return False
+
+        if operation is None:
+            return True
+
+        return self.__disabled_until.get(operation, 0) <= time.time()
+
+    def login(self) -> bool:
+        if self.__needs_login and self.__cookies_cache_service.cookies_exists(self.key):
+            # the persisted cookies were rejected by the server, they must not be restored again
+            self.__cookies_cache_service.delete_cookies(self.key)
+
+        self.__needs_login = False
+
+        return self.twitter_auth_api_module.login(
+            self.credentials.user_id, self.credentials.alternate_id, self.credentials.password)
+
+    def on_response(self, event: ResponseEvent) -> None:
+        operation = event.operation
+
+        if event.status_code == 401 and not event.guest_token_rejected:
+            logger.warning('Session %s is not authorized anymore, removing it from rotation', self.key)
+            self.__needs_login = True
+
+        elif self.__needs_login and operation == VIEWER_OPERATION and event.status_code == 200:
+            # the Viewer query ends every login and session refresh, e.g. by the session keeper
+            logger.info('Session %s is authorized again, back in rotation', self.key)
+            self.__needs_login = False
+
+        elif event.status_code == 429:
+            quota = self.twitter_client.quotas.get(operation)
+            cooldown = quota.reset_in if quota is not None and quota.reset_in > 0 else self.__cooldown
+
+            logger.warning('Session %s is rate limited on %s, removing it from rotation for %.0f seconds', self.key, operation, cooldown)
+            self.__disabled_until[operation] = time.time() + cooldown
+
+
+class TwitterClientPool:
+    """
+    Pool of authenticated accounts: every call is routed to the least loaded healthy session,
+    sessions are taken out of rotation when they are rate limited (429) or unauthorized (401).
+    Rate limited reads are retried by the client, set `retry.status_codes` without 429 in the options
+    to fail fast and move to another session instead.
+    """
+
+    __accounts: List[TwitterAccountCredentials]
+    __cookies_cache_service: CookiesCacheServiceInterface
+    __options: TwitterClientOptions | None
+    __cooldown: float
+    __tweets_store: TweetsStoreInterface | None
+    __hooks: List[InstrumentationHooks]
+    __guest_token_pool: GuestTokenPool | None
+    __session_keeper: SessionKeeper | None
+    __graphql_operations: GraphQLOperationRegistry
+    __response_cache: ResponseCache | None
+    __sessions: List[TwitterPoolSession]
+    __exit_stack: contextlib.ExitStack
+    __lock: threading.Lock
+
+    def __init__(
+            self,
+            accounts: List[TwitterAccountCredentials],
+            cookies_cache_service: CookiesCacheServiceInterface,
+            options: TwitterClientOptions | None = None,
+            cooldown: float = DEFAULT_COOLDOWN,
+            tweets_store: TweetsStoreInterface | None = None,
+            hooks: List[InstrumentationHooks] | None = None,
+            guest_token_pool: GuestTokenPool | None = None,
+            session_keeper: SessionKeeper | None = None,
+            graphql_operations: GraphQLOperationRegistry = DEFAULT_GRAPHQL_OPERATION_REGISTRY,
+            response_cache: ResponseCache | None = None) -> None:
+        self.__accounts = accounts
+        self.__cookies_cache_service = cookies_cache_service
+        self.__options = options
+        self.__cooldown = cooldown
+        self.__tweets_store = tweets_store
+        self.__hooks = hooks or []
+        self.__guest_token_pool = guest_token_pool
+        self.__session_keeper = session_keeper
+        self.__graphql_operations = graphql_operations
+        self.__response_cache = response_cache
+        self.__sessions = []
+        self.__lock = threading.Lock()
+
+    def __enter__(self) -> "TwitterClientPool":
+        sessions: List[TwitterPoolSession] = []
+
+        # the clients already started are closed when one of them fails to start
+        with contextlib.ExitStack() as exit_stack:
+            for credentials in self.__accounts:
+                twitter_client = exit_stack.enter_context(TwitterClient(
+                    self.__options,
+                    hooks=self.__hooks,
+                    guest_token_pool=self.__guest_token_pool,
+                    response_cache=self.__response_cache))
+
+                sessions.append(
+                    TwitterPoolSession(
+                        credentials,
+                        twitter_client,
+                        self.__cookies_cache_service,
+                        self.__cooldown,
+                        self.__tweets_store,
+                        self.__session_keeper,
+                        self.__graphql_operations))
+
+            self.__exit_stack = exit_stack.pop_all()
+
+        self.__sessions = sessions
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.__session_keeper is not None:
+            for session in self.__sessions:
+                self.__session_keeper.remove(session.twitter_auth_api_module)
+
+        self.__sessions = []
+        self.__exit_stack.close()
+
+    @property
+    def sessions(self) -> List[TwitterPoolSession]:
+        return list(self.__sessions)
+
+    @property
+    def is_authenticated(self) -> bool:
+        return any(session.is_healthy() for session in self.__sessions)
+
+    def login(self, max_workers: int = 8) -> int:
+        """
+        Login every session that is not healthy, restoring persisted cookies when possible.
+        Returns the number of authenticated sessions.
+        """
+        sessions = [session for session in self.__sessions if not session.is_healthy()]
+
+        if sessions:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for session, logged_in in zip(sessions, executor.map(TwitterPoolSession.login, sessions)):
+                    if not logged_in:
+                        logger.error('Authentication failed for session %s', session.key)
+
+        return sum(1 for session in self.__sessions if session.is_healthy())
+
+    @contextlib.contextmanager
+    def acquire(self, operation: str | None = None, key: str | None = None) -> Generator[TwitterPoolSession, None, None]:
+        """
+        Reserve the least loaded healthy session for the operation until the context is exited,
+        or the session of the account `key`
+        """
+        with self.__lock:
+            candidates = [
+                session for session in self.__sessions
+                if session.is_healthy(operation) and (key is None or session.key == key)
+            ]
+
+            if not candidates:
+                raise ValueError(f"No healthy session available for {operation or 'any operation'}")
+
+            session = min(candidates, key=lambda candidate: (candidate.in_flight, candidate.requests_count))
+            session.in_flight += 1
+            session.requests_count += 1
+
+        try:
+            yield session
+        finally:
+            with self.__lock:
+                session.in_flight -= 1
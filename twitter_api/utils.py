@@ -1,4 +1,12 @@
-from typing import Any, Dict
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, Generator, Iterable, Tuple, TypeVar
+
+V = TypeVar("V")
+
+# marks the end of a prefetched iterable
+_PREFETCH_DONE = object()
 
 
 def deep_merge(orig_dict: Dict[str, Any], new_dict: Dict[str, Any]) -> Dict[str, Any]:
@@ -14,3 +22,108 @@ def deep_merge(orig_dict: Dict[str, Any], new_dict: Dict[str, Any]) -> Dict[str,
             orig_dict[key] = new_dict[key]
 
     return orig_dict
+
+
+def prefetch_iterator(iterable: Iterable[V], size: int) -> Generator[V, None, None]:
+    """
+    Iterate an iterable in a background thread, keeping up to `size` items ready ahead of the consumer:
+    the next item is fetched only once a slot is free, the item being fetched takes one.
+    Exceptions raised by the iterable are raised to the consumer, closing the generator stops the thread
+    and closes the iterable.
+    """
+    items: queue.Queue[Tuple[Any, BaseException | None]] = queue.Queue()
+    slots = threading.Semaphore(size)
+    stopped = threading.Event()
+
+    def produce() -> None:
+        iterator = iter(iterable)
+
+        try:
+            while True:
+                while not slots.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+
+                if stopped.is_set():
+                    return
+
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    items.put((_PREFETCH_DONE, None))
+                    return
+
+                items.put((item, None))
+        except Exception as e:
+            items.put((_PREFETCH_DONE, e))
+        finally:
+            # a generator is closed by the thread running it
+            close = getattr(iterator, 'close', None)
+
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, name='prefetch-iterator', daemon=True).start()
+
+    try:
+        while True:
+            item, error = items.get()
+
+            if error is not None:
+                raise error
+
+            if item is _PREFETCH_DONE:
+                return
+
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+
+
+async def async_prefetch_iterator(iterable: AsyncIterable[V], size: int) -> AsyncGenerator[V, None]:
+    """
+    Async counterpart of prefetch_iterator, the iterable is consumed by a background task
+    """
+    items: asyncio.Queue[Tuple[Any, BaseException | None]] = asyncio.Queue()
+    slots = asyncio.Semaphore(size)
+    iterator = aiter(iterable)
+
+    async def produce() -> None:
+        try:
+            while True:
+                await slots.acquire()
+
+                try:
+                    item = await anext(iterator)
+                except StopAsyncIteration:
+                    items.put_nowait((_PREFETCH_DONE, None))
+                    return
+
+                items.put_nowait((item, None))
+        except Exception as e:
+            items.put_nowait((_PREFETCH_DONE, e))
+
+    task = asyncio.create_task(produce())
+
+    try:
+        while True:
+            item, error = await items.get()
+
+            if error is not None:
+                raise error
+
+            if item is _PREFETCH_DONE:
+                return
+
+            slots.release()
+            yield item
+    finally:
+        task.cancel()
+        # the cancellation of the task is its result, a cancellation of the consumer is still raised
+        await asyncio.gather(task, return_exceptions=True)
+
+        aclose = getattr(iterator, 'aclose', None)
+
+        if aclose is not None:
+            await aclose()